@@ -0,0 +1,110 @@
+"""
+Bulk runner shared by clickup_create_task.py, clickup_update_task.py and
+clickup_delete_task.py (--bulk FILE).
+
+Items are read from CSV (header row) or JSONL, processed by a worker pool
+over one ClickUpClient, and throttled by a RateLimitGovernor that follows
+ClickUp's X-RateLimit-* headers. Each result is appended to a JSONL
+report as soon as it completes.
+"""
+
+import os
+import csv
+import json
+import time
+import inspect
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from clickup_client import ClickUpClient
+from clickup_ratelimit import RateLimitGovernor
+import clickup_session
+
+WORKERS = int(os.getenv("CLICKUP_BULK_WORKERS", "4"))
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TMP_DIR = os.path.join(BASE_DIR, ".tmp")
+
+
+def read_items(path):
+    """Yield dicts from a .csv (with header) or .jsonl file"""
+    if path.lower().endswith(".csv"):
+        with open(path, "r", newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                yield {k: v for k, v in row.items() if v not in (None, "")}
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+
+
+def default_report_path(operation):
+    os.makedirs(TMP_DIR, exist_ok=True)
+    stamp = time.strftime("%Y%m%d_%H%M%S")
+    return os.path.join(TMP_DIR, f"clickup_bulk_{operation}_{stamp}.jsonl")
+
+
+def run_bulk(operation, func, items, report_path=None, workers=WORKERS):
+    """
+    Call func(client=..., **item) for every item and write one JSONL
+    report line per item: {"line", "input", "ok", "result" | "error"}.
+    Returns (succeeded, failed, report_path).
+    """
+    report_path = report_path or default_report_path(operation)
+    client = ClickUpClient()
+    clickup_session.set_governor(RateLimitGovernor())
+    write_lock = threading.Lock()
+    succeeded = 0
+    failed = 0
+    start = time.perf_counter()
+
+    signature = inspect.signature(func)
+    required = [
+        name for name, param in signature.parameters.items()
+        if param.default is inspect.Parameter.empty and name != "client"
+    ]
+
+    def work(item):
+        # Only binding errors are bad input; a TypeError raised inside func is a real failure
+        try:
+            signature.bind(client=client, **item)
+        except TypeError as e:
+            return False, f"Bad input fields: {e}"
+        missing = [name for name in required if item.get(name) in (None, "")]
+        if missing:
+            return False, f"Missing required fields: {', '.join(missing)}"
+        try:
+            result = func(client=client, **item)
+        except Exception as e:
+            return False, str(e)
+        if result is None:
+            return False, "Nothing to send"
+        return True, result
+
+    try:
+        with open(report_path, "w", encoding="utf-8") as report, \
+                ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(work, item): (n, item) for n, item in enumerate(items, 1)}
+            for future in as_completed(futures):
+                n, item = futures[future]
+                ok, payload = future.result()
+                record = {"line": n, "input": item, "ok": ok}
+                record["result" if ok else "error"] = payload
+                with write_lock:
+                    report.write(json.dumps(record) + "\n")
+                    report.flush()
+                if ok:
+                    succeeded += 1
+                else:
+                    failed += 1
+                done = succeeded + failed
+                if done % 25 == 0:
+                    print(f"{operation}: {done}/{len(futures)} done")
+    finally:
+        clickup_session.set_governor(None)
+
+    elapsed = time.perf_counter() - start
+    print(f"{operation}: {succeeded} succeeded, {failed} failed in {elapsed:.1f}s")
+    print(clickup_session.format_connection_stats())
+    print(f"Report written to {report_path}")
+    return succeeded, failed, report_path
@@ -1,6 +1,8 @@
 import os
-import requests
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+import clickup_session
+from clickup_session import ClickUpError
 
 load_dotenv()
 
@@ -15,23 +17,13 @@ class ClickUpClient:
             "Content-Type": "application/json"
         }
 
-    def _request(self, method, endpoint, data=None):
+    def _request(self, method, endpoint, data=None, params=None):
+        """
+        Send one API call (transient failures are retried by clickup_session).
+        Raises clickup_session.ClickUpError subclasses on failure.
+        """
         url = f"{self.base_url}{endpoint}"
-        try:
-            response = requests.request(method, url, headers=self.headers, json=data)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.HTTPError as errh:
-            print(f"ClickUp API Http Error: {errh}")
-            print(f"Status Code: {errh.response.status_code}")
-            print(f"Response Body: {errh.response.text}")
-        except requests.exceptions.ConnectionError as errc:
-            print(f"Error Connecting: {errc}")
-        except requests.exceptions.Timeout as errt:
-            print(f"Timeout Error: {errt}")
-        except requests.exceptions.RequestException as err:
-            print(f"OOps: Something Else: {err}")
-        return None
+        return clickup_session.request_json(method, url, headers=self.headers, json=data, params=params)
 
     def get_teams(self):
         """Get all teams (workspaces)"""
@@ -49,14 +41,69 @@ class ClickUpClient:
         """Get lists in a folder"""
         return self._request("GET", f"folder/{folder_id}/list")
 
-    def get_tasks(self, list_id):
-        """Get tasks in a list"""
-        return self._request("GET", f"list/{list_id}/task")
+    def get_tasks(self, list_id, page=None, **filters):
+        """Get tasks in a list (first page unless `page` is given)"""
+        params = self._task_params(filters)
+        if page is not None:
+            params["page"] = page
+        return self._request("GET", f"list/{list_id}/task", params=params or None)
+
+    def iter_tasks(self, list_id, date_updated_gt=None, statuses=None, include_closed=False, prefetch=True):
+        """
+        Yield every task in a list, following ClickUp's `page` parameter.
+        While the caller works through one page, the next one is fetched
+        in the background, so only about two pages are held in memory.
+
+        date_updated_gt: Unix time in milliseconds
+        statuses: list of status names to include
+        """
+        filters = {
+            "date_updated_gt": date_updated_gt,
+            "statuses": statuses,
+            "include_closed": include_closed,
+        }
+
+        def fetch(page):
+            return self.get_tasks(list_id, page=page, **filters)
+
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            page = 0
+            pending = pool.submit(fetch, page)
+            while pending is not None:
+                result = pending.result()
+                if not result:
+                    return
+                tasks = result.get("tasks", [])
+                last_page = result.get("last_page", len(tasks) == 0)
+                pending = pool.submit(fetch, page + 1) if prefetch and not last_page else None
+
+                yield from tasks
+
+                if last_page:
+                    return
+                page += 1
+                if pending is None:
+                    pending = pool.submit(fetch, page)
+
+    @staticmethod
+    def _task_params(filters):
+        params = {}
+        if filters.get("date_updated_gt") is not None:
+            params["date_updated_gt"] = int(filters["date_updated_gt"])
+        if filters.get("statuses"):
+            params["statuses[]"] = list(filters["statuses"])
+        if filters.get("include_closed"):
+            params["include_closed"] = "true"
+        return params
 
 if __name__ == '__main__':
     # Example usage:
     client = ClickUpClient()
-    teams = client.get_teams()
+    try:
+        teams = client.get_teams()
+    except ClickUpError as e:
+        print(f"ClickUp API Error: {e}")
+        teams = None
     if teams and teams.get('teams'):
         for team in teams['teams']:
             print(f"Team: {team['name']} (ID: {team['id']})")
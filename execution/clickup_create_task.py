@@ -1,11 +1,15 @@
 import argparse
+import sys
 from clickup_client import ClickUpClient
+from clickup_session import ClickUpError
 
-def create_task(list_id, name, description=None):
+def create_task(list_id, name, description=None, client=None):
     """
     Creates a new task in a ClickUp list.
     """
-    client = ClickUpClient()
+    if not list_id:
+        raise ClickUpError("list_id is required")
+    client = client or ClickUpClient()
     endpoint = f"list/{list_id}/task"
     data = {
         "name": name,
@@ -15,13 +19,29 @@ def create_task(list_id, name, description=None):
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Create a new task in ClickUp.")
-    parser.add_argument("list_id", help="The ID of the list to create the task in.")
-    parser.add_argument("name", help="The name of the task.")
+    parser.add_argument("list_id", nargs="?", help="The ID of the list to create the task in (default list in bulk mode).")
+    parser.add_argument("name", nargs="?", help="The name of the task.")
     parser.add_argument("-d", "--description", help="The description of the task.")
+    parser.add_argument("--bulk", metavar="FILE", help="CSV or JSONL of tasks (columns: list_id, name, description).")
+    parser.add_argument("--report", help="JSONL report path for bulk mode (default: .tmp/clickup_bulk_create_*.jsonl).")
+    parser.add_argument("--workers", type=int, help="Concurrent workers in bulk mode.")
     args = parser.parse_args()
 
-    task = create_task(args.list_id, args.name, args.description)
-    if task:
-        print(f"Task created successfully! ID: {task['id']}")
-    else:
-        print("Failed to create task. Check the console for API error details.")
+    if args.bulk:
+        from clickup_bulk import read_items, run_bulk, WORKERS
+        items = [
+            dict(item, list_id=item.get("list_id", args.list_id))
+            for item in read_items(args.bulk)
+        ]
+        _, failed, _ = run_bulk("create", create_task, items, args.report, args.workers or WORKERS)
+        sys.exit(1 if failed else 0)
+
+    if not args.list_id or not args.name:
+        parser.error("list_id and name are required unless --bulk is given")
+
+    try:
+        task = create_task(args.list_id, args.name, args.description)
+    except ClickUpError as e:
+        print(f"Failed to create task: {e}")
+        sys.exit(1)
+    print(f"Task created successfully! ID: {task['id']}")
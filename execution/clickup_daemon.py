@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Long-lived ClickUp daemon.
+
+Agent-driven CRM sequences used to launch one interpreter per call, each
+re-importing requests, re-reading .env and opening a new TLS connection.
+The daemon keeps one warm ClickUpClient, the pooled session and the name
+index in memory and answers JSON-lines requests on a Unix socket (or on
+stdin/stdout with --stdio).
+
+Protocol: one JSON object per line in, one per line out.
+    {"op": "request", "endpoint": "list/{list:Leads}/task", "method": "GET", "data": null, "params": null}
+    {"op": "create_task", "args": {"list_id": "...", "name": "..."}}
+    {"op": "update_task" | "delete_task" | "get_task", "args": {...}}
+    {"op": "resolve", "kind": "space", "name": "Template creative agency space"}
+    {"op": "ping"} / {"op": "stats"}
+Responses: {"ok": true, "result": ...} or {"ok": false, "error": "...", "status_code": 404}
+
+Usage:
+    python execution/clickup_daemon.py serve &
+    python execution/clickup_daemon.py call "list/{list:Leads}/task" GET
+    python execution/clickup_daemon.py bench --endpoint team -n 10
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import statistics
+import subprocess
+
+EXECUTION_DIR = os.path.dirname(os.path.abspath(__file__))
+BASE_DIR = os.path.dirname(EXECUTION_DIR)
+SOCKET_PATH = os.path.join(BASE_DIR, ".tmp", "clickup.sock")
+
+
+class Handler:
+    """Dispatches protocol messages to one warm client (heavy imports happen here, once)"""
+
+    def __init__(self):
+        from clickup_client import ClickUpClient
+        import clickup_session
+        import clickup_universal
+        self.session = clickup_session
+        self.universal = clickup_universal
+        self.client = ClickUpClient()
+        self.calls = 0
+        self.started = time.time()
+
+    def handle(self, message):
+        self.calls += 1
+        try:
+            if not isinstance(message, dict):
+                raise ValueError("Message must be a JSON object")
+            return {"ok": True, "result": self.dispatch(message.get("op"), message)}
+        except self.session.ClickUpHTTPError as e:
+            return {"ok": False, "error": str(e), "status_code": e.status_code}
+        except Exception as e:
+            return {"ok": False, "error": f"{type(e).__name__}: {e}"}
+
+    def dispatch(self, op, message):
+        args = message.get("args", {})
+        if op == "ping":
+            return "pong"
+        if op == "stats":
+            return {
+                "calls": self.calls,
+                "uptime": round(time.time() - self.started, 1),
+                "connections": self.session.connection_stats(),
+            }
+        if op == "request":
+            endpoint = self.universal.resolve_endpoint(message["endpoint"])
+            return self.universal.clickup_request(
+                endpoint, message.get("method", "GET"), message.get("data"), message.get("params")
+            )
+        if op == "resolve":
+            return self.universal.resolve_id(message["kind"], message["name"])
+        if op == "create_task":
+            from clickup_create_task import create_task
+            return create_task(client=self.client, **args)
+        if op == "update_task":
+            from clickup_update_task import update_task
+            return update_task(client=self.client, **args)
+        if op == "delete_task":
+            from clickup_delete_task import delete_task
+            return delete_task(client=self.client, **args)
+        if op == "get_task":
+            from clickup_get_task import get_task
+            return get_task(client=self.client, **args)
+        raise ValueError(f"Unknown op: {op}")
+
+
+def serve_socket(path=SOCKET_PATH):
+    import socketserver
+
+    handler = Handler()
+
+    class StreamHandler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for line in self.rfile:
+                if not line.strip():
+                    continue
+                try:
+                    response = handler.handle(json.loads(line))
+                except ValueError as e:
+                    response = {"ok": False, "error": f"Invalid JSON: {e}"}
+                self.wfile.write((json.dumps(response) + "\n").encode())
+                self.wfile.flush()
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if os.path.exists(path):
+        os.remove(path)
+    server = socketserver.ThreadingUnixStreamServer(path, StreamHandler)
+    server.daemon_threads = True
+    print(f"ClickUp daemon listening on {path}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.remove(path)
+
+
+def serve_stdio():
+    handler = Handler()
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        try:
+            response = handler.handle(json.loads(line))
+        except ValueError as e:
+            response = {"ok": False, "error": f"Invalid JSON: {e}"}
+        sys.stdout.write(json.dumps(response) + "\n")
+        sys.stdout.flush()
+
+
+class DaemonClient:
+    """Stdlib-only client, so callers don't pay for importing requests"""
+
+    def __init__(self, path=SOCKET_PATH):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(path)
+        self.file = self.sock.makefile("rwb")
+
+    def call(self, message):
+        self.file.write((json.dumps(message) + "\n").encode())
+        self.file.flush()
+        line = self.file.readline()
+        if not line:
+            raise ConnectionError("daemon closed the connection")
+        return json.loads(line)
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
+
+
+def call_once(message, path=SOCKET_PATH):
+    """Send one message; fall back to an in-process handler if no daemon is running"""
+    if os.path.exists(path):
+        try:
+            client = DaemonClient(path)
+            try:
+                return client.call(message)
+            finally:
+                client.close()
+        except (ConnectionRefusedError, FileNotFoundError):
+            pass
+    return Handler().handle(message)
+
+
+def _summary(label, samples):
+    mean = statistics.mean(samples)
+    median = statistics.median(samples)
+    print(f"  {label:<34} mean {mean * 1000:8.1f} ms   median {median * 1000:8.1f} ms   (n={len(samples)})")
+    return mean
+
+
+def bench(endpoint, n, path=SOCKET_PATH):
+    """
+    Compare per-call latency:
+      cold          a fresh `clickup_universal.py` process per call (today's directive flow)
+      daemon (CLI)  a fresh stdlib-only `clickup_daemon.py call` process per call
+      daemon (warm) repeated calls over one open socket
+    """
+    if not os.path.exists(path):
+        print(f"No daemon at {path}; start one with: python execution/clickup_daemon.py serve")
+        return 1
+
+    python = sys.executable
+    print(f"Benchmarking GET {endpoint}, {n} calls each")
+
+    cold = []
+    for _ in range(n):
+        start = time.perf_counter()
+        subprocess.run([python, os.path.join(EXECUTION_DIR, "clickup_universal.py"), endpoint, "GET"],
+                       cwd=BASE_DIR, stdout=subprocess.DEVNULL, check=False)
+        cold.append(time.perf_counter() - start)
+
+    cli = []
+    for _ in range(n):
+        start = time.perf_counter()
+        subprocess.run([python, os.path.join(EXECUTION_DIR, "clickup_daemon.py"), "call", endpoint, "GET"],
+                       cwd=BASE_DIR, stdout=subprocess.DEVNULL, check=False)
+        cli.append(time.perf_counter() - start)
+
+    warm = []
+    client = DaemonClient(path)
+    try:
+        for _ in range(n):
+            start = time.perf_counter()
+            client.call({"op": "request", "endpoint": endpoint, "method": "GET"})
+            warm.append(time.perf_counter() - start)
+    finally:
+        client.close()
+
+    cold_mean = _summary("cold (process per call)", cold)
+    _summary("daemon via CLI (process per call)", cli)
+    warm_mean = _summary("daemon warm (one connection)", warm)
+    print(f"  Warm speed-up: {cold_mean / warm_mean:.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Warm ClickUp client daemon (JSON lines over a Unix socket).")
+    parser.add_argument("--socket", default=SOCKET_PATH)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_serve = sub.add_parser("serve", help="Run the daemon.")
+    p_serve.add_argument("--stdio", action="store_true", help="Read requests from stdin instead of a socket.")
+
+    p_call = sub.add_parser("call", help="Same arguments as clickup_universal.py, answered by the daemon.")
+    p_call.add_argument("endpoint")
+    p_call.add_argument("method")
+    p_call.add_argument("data", nargs="?")
+
+    p_bench = sub.add_parser("bench", help="Compare cold vs. warm per-call latency.")
+    p_bench.add_argument("--endpoint", default="team")
+    p_bench.add_argument("-n", type=int, default=10)
+
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        if args.stdio:
+            serve_stdio()
+        else:
+            serve_socket(args.socket)
+    elif args.command == "call":
+        response = call_once({
+            "op": "request",
+            "endpoint": args.endpoint,
+            "method": args.method,
+            "data": json.loads(args.data) if args.data else None,
+        }, args.socket)
+        if not response["ok"]:
+            print(f"API Request Failed: {response['error']}")
+            sys.exit(1)
+        print(json.dumps(response["result"], indent=2))
+    elif args.command == "bench":
+        sys.exit(bench(args.endpoint, args.n, args.socket))
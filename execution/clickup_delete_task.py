@@ -1,26 +1,35 @@
 import argparse
+import sys
 from clickup_client import ClickUpClient
+from clickup_session import ClickUpError
 
-def delete_task(task_id):
+def delete_task(task_id, client=None):
     """
     Deletes a task from ClickUp.
     """
-    client = ClickUpClient()
+    client = client or ClickUpClient()
     endpoint = f"task/{task_id}"
     return client._request("DELETE", endpoint)
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Delete a task from ClickUp.")
-    parser.add_argument("task_id", help="The ID of the task to delete.")
+    parser.add_argument("task_id", nargs="?", help="The ID of the task to delete.")
+    parser.add_argument("--bulk", metavar="FILE", help="CSV or JSONL of task IDs (column: task_id).")
+    parser.add_argument("--report", help="JSONL report path for bulk mode (default: .tmp/clickup_bulk_delete_*.jsonl).")
+    parser.add_argument("--workers", type=int, help="Concurrent workers in bulk mode.")
     args = parser.parse_args()
 
-    result = delete_task(args.task_id)
-    if result is None:
-        # _request returns None on failure, and for DELETE on success the body is empty
-        # but the status code is 204. requests.request with response.raise_for_status()
-        # does not return a value on success, so result is None.
-        # A bit of a hack to check for success.
-        # A better implementation would be to have _request return the response object.
-        print(f"Task {args.task_id} deleted successfully (or did not exist).")
-    else:
-        print("Failed to delete task.")
+    if args.bulk:
+        from clickup_bulk import read_items, run_bulk, WORKERS
+        _, failed, _ = run_bulk("delete", delete_task, list(read_items(args.bulk)), args.report, args.workers or WORKERS)
+        sys.exit(1 if failed else 0)
+
+    if not args.task_id:
+        parser.error("task_id is required unless --bulk is given")
+
+    try:
+        delete_task(args.task_id)
+    except ClickUpError as e:
+        print(f"Failed to delete task: {e}")
+        sys.exit(1)
+    print(f"Task {args.task_id} deleted successfully.")
@@ -1,23 +1,121 @@
 import os
 import json
+import sys
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
 from clickup_universal import clickup_request
+from clickup_session import ClickUpError
+from clickup_ratelimit import clickup_bucket
+from clickup_index import build_index, save_index
 
-def discover_hierarchy():
+# Parallel requests per level; the token bucket keeps the total under ClickUp's limit
+MAX_WORKERS = int(os.getenv("CLICKUP_DISCOVER_WORKERS", "8"))
+
+# Seconds before a cached node's children are re-fetched
+MAP_TTL = int(os.getenv("CLICKUP_MAP_TTL", "3600"))
+MAP_FILE = ".tmp/crm_map.json"
+CACHE_FILE = ".tmp/crm_cache.json"
+
+
+def load_cache():
+    """
+    Per-endpoint cache of hierarchy fetches:
+    {endpoint: {"fetched_at": epoch_seconds, "items": [{"id", "name"}, ...]}}
+    """
+    if not os.path.exists(CACHE_FILE):
+        return {}
+    try:
+        with open(CACHE_FILE, "r") as f:
+            return json.load(f).get("endpoints", {})
+    except (OSError, ValueError) as e:
+        print(f"Ignoring unreadable cache {CACHE_FILE}: {e}")
+        return {}
+
+
+def save_cache(endpoints):
+    os.makedirs(".tmp", exist_ok=True)
+    tmp_file = f"{CACHE_FILE}.part"
+    with open(tmp_file, "w") as f:
+        json.dump({"endpoints": endpoints}, f)
+    os.replace(tmp_file, CACHE_FILE)
+
+
+def map_age():
+    """Seconds since crm_map.json was written, or None if it does not exist"""
+    if not os.path.exists(MAP_FILE):
+        return None
+    return time.time() - os.path.getmtime(MAP_FILE)
+
+
+def discover_hierarchy(max_workers=MAX_WORKERS, ttl=MAP_TTL, force=False):
+    """
+    Build .tmp/crm_map.json, re-fetching only nodes whose cached children
+    are older than `ttl` seconds. `force` ignores the cache entirely.
+
+    ClickUp's hierarchy endpoints expose no ETag or date_updated for
+    spaces/folders, so staleness is judged by fetch time per endpoint.
+    """
     print("Discovering ClickUp Hierarchy...")
-    
-    # 1. Get Teams (Workspaces)
-    teams = clickup_request("team")["teams"]
+    bucket = clickup_bucket()
+    cache = {} if force else load_cache()
+    timings = []
+
+    def fetch(endpoint):
+        bucket.acquire()
+        return clickup_request(endpoint)
+
+    def run_level(label, endpoints, key):
+        now = time.time()
+        stale = [
+            ep for ep in endpoints
+            if ep not in cache or now - cache[ep]["fetched_at"] > ttl
+        ]
+        start = time.perf_counter()
+        for ep, result in zip(stale, pool.map(fetch, stale)):
+            cache[ep] = {
+                "fetched_at": time.time(),
+                "items": [{"id": item["id"], "name": item["name"]} for item in result[key]]
+            }
+        elapsed = time.perf_counter() - start
+        timings.append((label, len(stale), elapsed))
+        print(f"  {label}: {len(stale)} fetched, {len(endpoints) - len(stale)} cached in {elapsed:.2f}s")
+        return [cache[ep]["items"] for ep in endpoints]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        # 1. Get Teams (Workspaces)
+        teams = run_level("Teams", ["team"], "teams")[0]
+
+        # 2. Get Spaces
+        spaces_per_team = run_level(
+            "Spaces", [f"team/{team['id']}/space" for team in teams], "spaces"
+        )
+        all_spaces = [space for spaces in spaces_per_team for space in spaces]
+
+        # 3. Get Folders
+        folders_per_space = run_level(
+            "Folders", [f"space/{space['id']}/folder" for space in all_spaces], "folders"
+        )
+        all_folders = [folder for folders in folders_per_space for folder in folders]
+
+        # 4. Get Lists in Folders and 5. Folderless Lists, fetched as one level
+        list_endpoints = [f"folder/{folder['id']}/list" for folder in all_folders]
+        list_endpoints += [f"space/{space['id']}/list" for space in all_spaces]
+        list_results = run_level("Lists", list_endpoints, "lists")
+        folder_lists = list_results[:len(all_folders)]
+        space_lists = list_results[len(all_folders):]
+
+    # Assemble in the original team -> space -> folder -> list order
     hierarchy = []
-    
-    for team in teams:
+    space_index = 0
+    folder_index = 0
+    for team, spaces in zip(teams, spaces_per_team):
         team_data = {
             "id": team["id"],
             "name": team["name"],
             "spaces": []
         }
-        
-        # 2. Get Spaces
-        spaces = clickup_request(f"team/{team['id']}/space")["spaces"]
+
         for space in spaces:
             space_data = {
                 "id": space["id"],
@@ -25,38 +123,52 @@ def discover_hierarchy():
                 "folders": [],
                 "lists": [] # Folderless lists
             }
-            
-            # 3. Get Folders
-            folders = clickup_request(f"space/{space['id']}/folder")["folders"]
-            for folder in folders:
+
+            for folder in folders_per_space[space_index]:
                 folder_data = {
                     "id": folder["id"],
                     "name": folder["name"],
-                    "lists": []
+                    "lists": [
+                        {"id": lst["id"], "name": lst["name"]}
+                        for lst in folder_lists[folder_index]
+                    ]
                 }
-                
-                # 4. Get Lists in Folders
-                lists = clickup_request(f"folder/{folder['id']}/list")["lists"]
-                for lst in lists:
-                    folder_data["lists"].append({"id": lst["id"], "name": lst["name"]})
-                
                 space_data["folders"].append(folder_data)
-            
-            # 5. Get Folderless Lists
-            lists = clickup_request(f"space/{space['id']}/list")["lists"]
-            for lst in lists:
+                folder_index += 1
+
+            for lst in space_lists[space_index]:
                 space_data["lists"].append({"id": lst["id"], "name": lst["name"]})
-            
+
             team_data["spaces"].append(space_data)
-        
+            space_index += 1
+
         hierarchy.append(team_data)
-    
-    # Save to .tmp
+
+    # Save to .tmp, dropping cache entries for nodes that no longer exist
+    live = {"team"}
+    live.update(f"team/{team['id']}/space" for team in teams)
+    live.update(f"space/{space['id']}/folder" for space in all_spaces)
+    live.update(list_endpoints)
+    save_cache({ep: entry for ep, entry in cache.items() if ep in live})
+
     os.makedirs(".tmp", exist_ok=True)
-    with open(".tmp/crm_map.json", "w") as f:
+    with open(MAP_FILE, "w") as f:
         json.dump(hierarchy, f, indent=2)
-    
-    print("Discovery complete! Saved to .tmp/crm_map.json")
+    save_index(build_index(hierarchy))
+
+    total = sum(elapsed for _, _, elapsed in timings)
+    fetched = sum(count for _, count, _ in timings)
+    print(f"Discovery complete in {total:.2f}s ({fetched} requests)! Saved to {MAP_FILE}")
+    return hierarchy
 
 if __name__ == "__main__":
-    discover_hierarchy()
+    parser = argparse.ArgumentParser(description="Build the ClickUp hierarchy map in .tmp/crm_map.json.")
+    parser.add_argument("--ttl", type=int, default=MAP_TTL, help="Re-fetch nodes cached longer than this many seconds.")
+    parser.add_argument("--force", action="store_true", help="Ignore the cache and crawl everything.")
+    args = parser.parse_args()
+
+    try:
+        discover_hierarchy(ttl=args.ttl, force=args.force)
+    except ClickUpError as e:
+        print(f"Discovery failed: {e}")
+        sys.exit(1)
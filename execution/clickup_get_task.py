@@ -1,12 +1,14 @@
 import argparse
 import json
+import sys
 from clickup_client import ClickUpClient
+from clickup_session import ClickUpError
 
-def get_task(task_id):
+def get_task(task_id, client=None):
     """
     Gets a task from ClickUp.
     """
-    client = ClickUpClient()
+    client = client or ClickUpClient()
     endpoint = f"task/{task_id}"
     return client._request("GET", endpoint)
 
@@ -15,8 +17,9 @@ if __name__ == "__main__":
     parser.add_argument("task_id", help="The ID of the task to get.")
     args = parser.parse_args()
 
-    task = get_task(args.task_id)
-    if task:
-        print(json.dumps(task, indent=2))
-    else:
-        print("Failed to get task.")
+    try:
+        task = get_task(args.task_id)
+    except ClickUpError as e:
+        print(f"Failed to get task: {e}")
+        sys.exit(1)
+    print(json.dumps(task, indent=2))
@@ -0,0 +1,225 @@
+"""
+Name -> ID lookup index for the ClickUp hierarchy.
+
+Built alongside .tmp/crm_map.json by clickup_discover and persisted to
+.tmp/crm_index.json, so resolving "Template creative agency space" to a
+space ID is a dictionary hit instead of a scan of the whole map.
+
+Lookups, in order:
+    exact      name as written in ClickUp
+    folded     case- and whitespace-insensitive
+    prefix     folded prefix, via the trigram postings
+    fuzzy      trigram similarity (search only)
+
+Usage:
+    python execution/clickup_index.py "template creative" --kind space
+    python execution/clickup_index.py "leds" --fuzzy
+"""
+
+import os
+import json
+import argparse
+
+INDEX_FILE = ".tmp/crm_index.json"
+KINDS = ("team", "space", "folder", "list")
+
+_index = None
+_index_mtime = None
+
+
+def normalize(name):
+    return " ".join(name.casefold().split())
+
+
+def trigrams(text):
+    """Trigrams of a normalized name, padded at the front so prefixes share them"""
+    padded = f"  {text}"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def build_index(hierarchy):
+    """Build the index from the crm_map.json structure"""
+    entries = []
+
+    def add(kind, node, path):
+        entries.append({
+            "kind": kind,
+            "id": node["id"],
+            "name": node["name"],
+            "path": " / ".join(path + [node["name"]])
+        })
+
+    for team in hierarchy:
+        add("team", team, [])
+        for space in team["spaces"]:
+            add("space", space, [team["name"]])
+            for folder in space["folders"]:
+                add("folder", folder, [team["name"], space["name"]])
+                for lst in folder["lists"]:
+                    add("list", lst, [team["name"], space["name"], folder["name"]])
+            for lst in space["lists"]:
+                add("list", lst, [team["name"], space["name"]])
+
+    exact = {}
+    folded = {}
+    postings = {}
+    for i, entry in enumerate(entries):
+        key = normalize(entry["name"])
+        exact.setdefault(entry["name"], []).append(i)
+        folded.setdefault(key, []).append(i)
+        grams = trigrams(key)
+        entry["grams"] = len(grams)
+        for gram in grams:
+            postings.setdefault(gram, []).append(i)
+
+    return {"entries": entries, "exact": exact, "folded": folded, "trigrams": postings}
+
+
+def save_index(index):
+    os.makedirs(".tmp", exist_ok=True)
+    tmp_file = f"{INDEX_FILE}.part"
+    with open(tmp_file, "w") as f:
+        json.dump(index, f)
+    os.replace(tmp_file, INDEX_FILE)
+
+
+def load_index(refresh=False):
+    """
+    Load the persisted index, keeping it in memory between lookups.
+    Re-runs discovery (incrementally) when the map is missing or stale,
+    and rebuilds the index if it is older than the map. Both checks run on
+    every call, so a long-lived process (clickup_daemon) sees new or renamed
+    spaces and lists; the file is only re-read when its mtime changes.
+    """
+    global _index, _index_mtime
+    import clickup_discover
+    age = clickup_discover.map_age()
+    if refresh or age is None or age > clickup_discover.MAP_TTL:
+        # discover_hierarchy writes a fresh index next to the map
+        clickup_discover.discover_hierarchy()
+    elif not os.path.exists(INDEX_FILE) or os.path.getmtime(INDEX_FILE) < os.path.getmtime(clickup_discover.MAP_FILE):
+        with open(clickup_discover.MAP_FILE, "r") as f:
+            save_index(build_index(json.load(f)))
+
+    mtime = os.path.getmtime(INDEX_FILE)
+    if _index is None or mtime != _index_mtime:
+        with open(INDEX_FILE, "r") as f:
+            _index = json.load(f)
+        _index_mtime = mtime
+    return _index
+
+
+def _filter(index, ids, kind):
+    entries = [index["entries"][i] for i in ids]
+    return [e for e in entries if kind is None or e["kind"] == kind]
+
+
+def _candidates(index, key):
+    """Entries sharing every trigram of `key` (superset of the prefix matches)"""
+    grams = trigrams(key)
+    lists = sorted((index["trigrams"].get(g, []) for g in grams), key=len)
+    if not lists or not lists[0]:
+        return set()
+    ids = set(lists[0])
+    for ids_for_gram in lists[1:]:
+        ids.intersection_update(ids_for_gram)
+        if not ids:
+            break
+    return ids
+
+
+def lookup(name, kind=None, index=None):
+    """Exact, then case-folded, then prefix matches for `name`"""
+    index = index or load_index()
+    matches = _filter(index, index["exact"].get(name, []), kind)
+    if matches:
+        return matches
+
+    key = normalize(name)
+    matches = _filter(index, index["folded"].get(key, []), kind)
+    if matches:
+        return matches
+
+    ids = _candidates(index, key)
+    return [
+        e for e in _filter(index, sorted(ids), kind)
+        if normalize(e["name"]).startswith(key)
+    ]
+
+
+def search(name, kind=None, limit=5, index=None):
+    """Rank entries by trigram (Jaccard) similarity to `name`"""
+    index = index or load_index()
+    query = trigrams(normalize(name))
+    shared = {}
+    for gram in query:
+        for i in index["trigrams"].get(gram, []):
+            shared[i] = shared.get(i, 0) + 1
+
+    scored = []
+    for i, count in shared.items():
+        entry = index["entries"][i]
+        if kind is not None and entry["kind"] != kind:
+            continue
+        score = count / (len(query) + entry["grams"] - count)
+        scored.append((round(score, 3), entry))
+    scored.sort(key=lambda pair: pair[0], reverse=True)
+    return scored[:limit]
+
+
+class AmbiguousName(LookupError):
+    """Several nodes match a name equally well; `candidates` holds their paths"""
+
+    def __init__(self, kind, name, candidates):
+        self.candidates = candidates
+        super().__init__(
+            f"'{name}' matches {len(candidates)} {kind or 'node'}s: {'; '.join(candidates)}. "
+            f"Use a path suffix to pick one, e.g. '{candidates[0].split(' / ', 1)[-1]}'"
+        )
+
+
+def _segments(path):
+    return [normalize(part) for part in path.split("/")]
+
+
+def lookup_path(path, kind=None, index=None):
+    """Entries whose path ends with `path` ("Space / Leads"), compared segment by segment"""
+    index = index or load_index()
+    want = _segments(path)
+    return [
+        e for e in index["entries"]
+        if (kind is None or e["kind"] == kind) and _segments(e["path"])[-len(want):] == want
+    ]
+
+
+def resolve(kind, name, index=None):
+    """
+    ID for a name that identifies exactly one node (exact, folded or unique
+    prefix match, or a path suffix such as "Sales Space / Leads"), or None
+    if nothing matches. Raises AmbiguousName listing the candidate paths
+    when several nodes match equally, e.g. a "Leads" list in two spaces.
+    """
+    matches = lookup_path(name, kind, index) if "/" in name else lookup(name, kind, index)
+    if len(matches) > 1:
+        same = [m for m in matches if normalize(m["name"]) == normalize(name)]
+        if len(same) != 1:
+            raise AmbiguousName(kind, name, [m["path"] for m in (same or matches)])
+        matches = same
+    return matches[0]["id"] if matches else None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Look up ClickUp IDs by name.")
+    parser.add_argument("name", help="Team, space, folder or list name (or prefix).")
+    parser.add_argument("-k", "--kind", choices=KINDS, help="Restrict to one node type.")
+    parser.add_argument("--fuzzy", action="store_true", help="Rank by similarity instead of exact/prefix matching.")
+    parser.add_argument("--refresh", action="store_true", help="Refresh the map and index first.")
+    args = parser.parse_args()
+
+    index = load_index(refresh=args.refresh)
+    if args.fuzzy:
+        results = [dict(entry, score=score) for score, entry in search(args.name, args.kind, index=index)]
+    else:
+        results = lookup(args.name, args.kind, index=index)
+
+    print(json.dumps([{k: v for k, v in e.items() if k != "grams"} for e in results], indent=2))
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Local SQLite mirror of ClickUp tasks.
+
+`sync` copies lists, tasks and custom field values into
+.tmp/clickup_mirror.db. After the first run only tasks whose date_updated
+is newer than the list's watermark are fetched, so a re-sync costs one
+request per list when nothing changed. Read-heavy CRM lookups then become
+local queries instead of clickup_get_task.py round trips.
+
+Usage:
+    python execution/clickup_mirror.py sync                     # every list in the hierarchy map
+    python execution/clickup_mirror.py sync --list-id 901234 --full
+    python execution/clickup_mirror.py task 86abc123
+    python execution/clickup_mirror.py find --status "in progress" --field "Lead Source=Website"
+    python execution/clickup_mirror.py query "SELECT status, COUNT(*) FROM tasks GROUP BY status"
+"""
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import argparse
+from clickup_client import ClickUpClient
+from clickup_session import ClickUpError
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_FILE = os.path.join(BASE_DIR, ".tmp", "clickup_mirror.db")
+BATCH_SIZE = 200
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS lists (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    path TEXT,
+    watermark INTEGER NOT NULL DEFAULT 0,
+    synced_at REAL
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY,
+    list_id TEXT NOT NULL,
+    name TEXT,
+    status TEXT,
+    assignees TEXT,
+    date_created INTEGER,
+    date_updated INTEGER,
+    date_closed INTEGER,
+    url TEXT,
+    raw TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_list ON tasks(list_id);
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status);
+CREATE INDEX IF NOT EXISTS idx_tasks_updated ON tasks(date_updated);
+CREATE INDEX IF NOT EXISTS idx_tasks_name ON tasks(name COLLATE NOCASE);
+CREATE TABLE IF NOT EXISTS custom_fields (
+    task_id TEXT NOT NULL,
+    field_id TEXT NOT NULL,
+    name TEXT,
+    type TEXT,
+    value TEXT,
+    display TEXT,
+    PRIMARY KEY (task_id, field_id)
+);
+CREATE INDEX IF NOT EXISTS idx_fields_name_value ON custom_fields(name, value);
+"""
+DISPLAY_INDEX = "CREATE INDEX IF NOT EXISTS idx_fields_name_display ON custom_fields(name, display COLLATE NOCASE)"
+
+
+def connect(db_file=DB_FILE):
+    os.makedirs(os.path.dirname(db_file), exist_ok=True)
+    conn = sqlite3.connect(db_file)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    columns = {row["name"] for row in conn.execute("PRAGMA table_info(custom_fields)")}
+    if "display" not in columns:
+        # Mirrors from before option names were stored: add the column and
+        # reset the watermarks so the next sync re-fetches every task
+        with conn:
+            conn.execute("ALTER TABLE custom_fields ADD COLUMN display TEXT")
+            conn.execute("UPDATE lists SET watermark = 0")
+    conn.execute(DISPLAY_INDEX)
+    return conn
+
+
+def _ms(value):
+    return int(value) if value not in (None, "") else None
+
+
+def _field_value(field):
+    value = field.get("value")
+    if value is None:
+        return None
+    return value if isinstance(value, str) else json.dumps(value)
+
+
+def _field_display(field):
+    """
+    Human-readable value: the option name for a dropdown (the API returns
+    its orderindex), the label names for a labels field, else the value.
+    """
+    value = field.get("value")
+    if value is None:
+        return None
+    options = (field.get("type_config") or {}).get("options") or []
+    if field.get("type") == "drop_down":
+        for option in options:
+            if str(option.get("orderindex")) == str(value) or option.get("id") == value:
+                return option.get("name")
+    elif field.get("type") == "labels" and isinstance(value, list):
+        names = {option.get("id"): option.get("label") or option.get("name") for option in options}
+        return ", ".join(str(names.get(v, v)) for v in value)
+    return _field_value(field)
+
+
+def upsert_tasks(conn, list_id, tasks):
+    """Insert or replace a batch of tasks and their custom field values"""
+    task_rows = []
+    field_rows = []
+    for task in tasks:
+        task_rows.append((
+            task["id"],
+            list_id,
+            task.get("name"),
+            (task.get("status") or {}).get("status"),
+            json.dumps([a.get("username") or a.get("email") for a in task.get("assignees", [])]),
+            _ms(task.get("date_created")),
+            _ms(task.get("date_updated")),
+            _ms(task.get("date_closed")),
+            task.get("url"),
+            json.dumps(task),
+        ))
+        for field in task.get("custom_fields", []):
+            field_rows.append((
+                task["id"], field["id"], field.get("name"), field.get("type"),
+                _field_value(field), _field_display(field),
+            ))
+
+    conn.executemany(
+        "INSERT OR REPLACE INTO tasks (id, list_id, name, status, assignees, date_created, "
+        "date_updated, date_closed, url, raw) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        task_rows,
+    )
+    conn.executemany("DELETE FROM custom_fields WHERE task_id = ?", [(row[0],) for row in task_rows])
+    conn.executemany(
+        "INSERT INTO custom_fields (task_id, field_id, name, type, value, display) VALUES (?, ?, ?, ?, ?, ?)",
+        field_rows,
+    )
+
+
+def sync_list(conn, client, list_id, name=None, path=None, full=False):
+    """
+    Mirror one list. Returns the number of tasks fetched.
+    A full sync also prunes tasks that no longer exist in the list.
+    """
+    row = conn.execute("SELECT watermark FROM lists WHERE id = ?", (list_id,)).fetchone()
+    watermark = 0 if full or row is None else row["watermark"]
+
+    fetched = 0
+    seen = set()
+    batch = []
+    newest = watermark
+    for task in client.iter_tasks(list_id, date_updated_gt=watermark or None, include_closed=True):
+        batch.append(task)
+        seen.add(task["id"])
+        newest = max(newest, _ms(task.get("date_updated")) or 0)
+        if len(batch) >= BATCH_SIZE:
+            with conn:
+                upsert_tasks(conn, list_id, batch)
+            fetched += len(batch)
+            batch = []
+
+    with conn:
+        if batch:
+            upsert_tasks(conn, list_id, batch)
+            fetched += len(batch)
+        if full:
+            stale = [r["id"] for r in conn.execute("SELECT id FROM tasks WHERE list_id = ?", (list_id,))
+                     if r["id"] not in seen]
+            conn.executemany("DELETE FROM tasks WHERE id = ?", [(i,) for i in stale])
+            conn.executemany("DELETE FROM custom_fields WHERE task_id = ?", [(i,) for i in stale])
+        conn.execute(
+            "INSERT INTO lists (id, name, path, watermark, synced_at) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET name = COALESCE(excluded.name, name), "
+            "path = COALESCE(excluded.path, path), watermark = excluded.watermark, synced_at = excluded.synced_at",
+            (list_id, name, path, newest, time.time()),
+        )
+    return fetched
+
+
+def sync(list_ids=None, full=False, db_file=DB_FILE):
+    """Sync the given lists, or every list in the hierarchy map"""
+    if list_ids:
+        targets = [{"id": list_id, "name": None, "path": None} for list_id in list_ids]
+    else:
+        from clickup_index import load_index
+        targets = [e for e in load_index()["entries"] if e["kind"] == "list"]
+
+    client = ClickUpClient()
+    conn = connect(db_file)
+    start = time.perf_counter()
+    total = 0
+    try:
+        for target in targets:
+            count = sync_list(conn, client, target["id"], target.get("name"), target.get("path"), full)
+            total += count
+            print(f"  {target.get('path') or target['id']}: {count} tasks updated")
+    finally:
+        conn.close()
+    print(f"Synced {len(targets)} lists, {total} tasks in {time.perf_counter() - start:.1f}s -> {db_file}")
+    return total
+
+
+def connect_readonly(db_file=DB_FILE):
+    """Open an existing mirror read-only (no schema setup or migration)"""
+    conn = sqlite3.connect(f"file:{os.path.abspath(db_file)}?mode=ro", uri=True)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def query(sql, params=(), db_file=DB_FILE, readonly=False):
+    """Run a read query against the mirror and return rows as dicts"""
+    conn = connect_readonly(db_file) if readonly else connect(db_file)
+    try:
+        return [dict(row) for row in conn.execute(sql, params)]
+    finally:
+        conn.close()
+
+
+def get_task(task_id, db_file=DB_FILE):
+    """Mirrored task (the full API payload), or None"""
+    rows = query("SELECT raw FROM tasks WHERE id = ?", (task_id,), db_file)
+    return json.loads(rows[0]["raw"]) if rows else None
+
+
+def find_tasks(list_id=None, status=None, name_like=None, field=None, limit=100, db_file=DB_FILE):
+    """
+    Filter mirrored tasks. `field` is a (custom field name, value) pair;
+    the value matches the raw value or, for dropdowns and labels, the
+    option name (case-insensitive). Returns summary rows, newest first.
+    """
+    sql = "SELECT t.id, t.list_id, t.name, t.status, t.assignees, t.date_updated, t.url FROM tasks t"
+    where = []
+    params = []
+    if field:
+        sql += " JOIN custom_fields f ON f.task_id = t.id"
+        where.append("f.name = ? AND (f.value = ? OR f.display = ? COLLATE NOCASE)")
+        params += [field[0], field[1], field[1]]
+    if list_id:
+        where.append("t.list_id = ?")
+        params.append(list_id)
+    if status:
+        where.append("t.status = ?")
+        params.append(status)
+    if name_like:
+        where.append("t.name LIKE ? COLLATE NOCASE")
+        params.append(f"%{name_like}%")
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY t.date_updated DESC LIMIT ?"
+    params.append(limit)
+    return query(sql, params, db_file)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mirror ClickUp tasks into a local SQLite database.")
+    parser.add_argument("--db", default=DB_FILE)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_sync = sub.add_parser("sync", help="Fetch tasks updated since the last sync.")
+    p_sync.add_argument("--list-id", action="append", help="List to sync (repeatable; default: all lists).")
+    p_sync.add_argument("--full", action="store_true", help="Ignore watermarks and prune deleted tasks.")
+
+    p_task = sub.add_parser("task", help="Print one mirrored task.")
+    p_task.add_argument("task_id")
+
+    p_find = sub.add_parser("find", help="Filter mirrored tasks.")
+    p_find.add_argument("--list-id")
+    p_find.add_argument("--status")
+    p_find.add_argument("--name", help="Substring of the task name.")
+    p_find.add_argument("--field", help="Custom field filter as NAME=VALUE.")
+    p_find.add_argument("--limit", type=int, default=100)
+
+    p_query = sub.add_parser("query", help="Run a SQL query.")
+    p_query.add_argument("sql")
+
+    args = parser.parse_args()
+
+    if args.command == "sync":
+        try:
+            sync(args.list_id, args.full, args.db)
+        except ClickUpError as e:
+            print(f"Sync failed: {e}")
+            sys.exit(1)
+    elif args.command == "task":
+        task = get_task(args.task_id, args.db)
+        if task is None:
+            print(f"Task {args.task_id} is not in the mirror (run sync first).")
+            sys.exit(1)
+        print(json.dumps(task, indent=2))
+    elif args.command == "find":
+        if args.field and "=" not in args.field:
+            p_find.error(f"--field must be NAME=VALUE, got {args.field!r}")
+        field = tuple(args.field.split("=", 1)) if args.field else None
+        rows = find_tasks(args.list_id, args.status, args.name, field, args.limit, args.db)
+        print(json.dumps(rows, indent=2))
+    elif args.command == "query":
+        if not os.path.exists(args.db):
+            print(f"No mirror at {args.db} (run sync first).")
+            sys.exit(1)
+        try:
+            rows = query(args.sql, db_file=args.db, readonly=True)
+        except sqlite3.Error as e:
+            print(f"Query failed: {e}")
+            sys.exit(1)
+        print(json.dumps(rows, indent=2))
@@ -0,0 +1,84 @@
+"""
+Client-side rate limiting for ClickUp API calls.
+
+ClickUp allows 100 requests per minute per token on the standard plans,
+so concurrent callers share one token bucket instead of each sleeping
+on its own.
+"""
+
+import os
+import time
+import threading
+from token_bucket import TokenBucket
+
+REQUESTS_PER_MINUTE = int(os.getenv("CLICKUP_RATE_LIMIT", "100"))
+
+
+def clickup_bucket(requests_per_minute=REQUESTS_PER_MINUTE, burst=10):
+    """Token bucket sized to ClickUp's per-minute limit"""
+    return TokenBucket(requests_per_minute / 60.0, burst)
+
+
+class RateLimitGovernor:
+    """
+    Adaptive limiter for concurrent ClickUp workers.
+
+    Starts from a token bucket at the nominal per-minute limit, then
+    follows the X-RateLimit-Remaining / X-RateLimit-Reset headers of each
+    response: the bucket rate is re-spread over what is left of the
+    window, and once the remaining budget drops to `reserve` every worker
+    waits for the reset instead of collecting 429s.
+    """
+
+    def __init__(self, requests_per_minute=REQUESTS_PER_MINUTE, burst=10, reserve=2):
+        self.bucket = clickup_bucket(requests_per_minute, burst)
+        self.base_rate = self.bucket.rate
+        self.reserve = reserve
+        self.remaining = None
+        self.reset_at = None
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a request may be sent"""
+        while True:
+            with self.lock:
+                now = time.time()
+                if self.reset_at is not None and now >= self.reset_at:
+                    # Window rolled over; go back to the nominal rate until told otherwise
+                    self.remaining = None
+                    self.reset_at = None
+                    self.bucket.rate = self.base_rate
+                if self.remaining is None or self.remaining > self.reserve:
+                    if self.remaining is not None:
+                        self.remaining -= 1  # count in-flight requests against the budget
+                    break
+                wait = self.reset_at - now
+            time.sleep(min(max(wait, 0.05), 60))
+        self.bucket.acquire()
+
+    def observe(self, response):
+        """Update the budget from a response's rate-limit headers"""
+        headers = response.headers
+        try:
+            remaining = int(headers["X-RateLimit-Remaining"])
+            reset_at = float(headers["X-RateLimit-Reset"])
+        except (KeyError, TypeError, ValueError):
+            remaining = None
+            reset_at = None
+
+        with self.lock:
+            if response.status_code == 429:
+                self.remaining = 0
+                if reset_at is None:
+                    try:
+                        reset_at = time.time() + float(headers.get("Retry-After", 60))
+                    except ValueError:
+                        reset_at = time.time() + 60
+                self.reset_at = reset_at
+                return
+            if remaining is None:
+                return
+            self.remaining = remaining
+            self.reset_at = reset_at
+            window = max(reset_at - time.time(), 1.0)
+            self.bucket.rate = max(min(remaining / window, self.base_rate * 2), self.base_rate / 10)
@@ -0,0 +1,217 @@
+"""
+Shared pooled HTTP session for ClickUp API calls.
+
+Both ClickUpClient and clickup_universal.clickup_request go through this
+module, so every call in a process reuses the same keep-alive connections
+instead of paying a fresh TCP+TLS handshake per request.
+
+Transient failures (connection errors, 429, 5xx) are retried with
+exponential backoff and full jitter, honouring Retry-After. Requests that
+are not idempotent (POST) are only replayed when ClickUp certainly did
+not process them: a 429, or a connect timeout. Anything that
+still fails is raised as a ClickUpError subclass.
+
+Tuning via .env:
+    CLICKUP_POOL_CONNECTIONS  number of per-host pools to keep (default 10)
+    CLICKUP_POOL_MAXSIZE      connections kept alive per host (default 20)
+    CLICKUP_CONNECT_TIMEOUT   seconds to establish a connection (default 5)
+    CLICKUP_READ_TIMEOUT      seconds to wait for a response (default 30)
+    CLICKUP_MAX_RETRIES       retries after the first attempt (default 4)
+    CLICKUP_BACKOFF_BASE      first backoff ceiling in seconds (default 1)
+"""
+
+import os
+import time
+import random
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+load_dotenv()
+
+POOL_CONNECTIONS = int(os.getenv("CLICKUP_POOL_CONNECTIONS", "10"))
+POOL_MAXSIZE = int(os.getenv("CLICKUP_POOL_MAXSIZE", "20"))
+CONNECT_TIMEOUT = float(os.getenv("CLICKUP_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.getenv("CLICKUP_READ_TIMEOUT", "30"))
+MAX_RETRIES = int(os.getenv("CLICKUP_MAX_RETRIES", "4"))
+BACKOFF_BASE = float(os.getenv("CLICKUP_BACKOFF_BASE", "1"))
+BACKOFF_MAX = 60.0
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+_session = None
+_adapter = None
+_governor = None
+_lock = threading.Lock()
+
+
+class ClickUpError(Exception):
+    """Base class for ClickUp request failures"""
+
+
+class ClickUpConnectionError(ClickUpError):
+    """Network failure or timeout after all retries"""
+
+
+class ClickUpHTTPError(ClickUpError):
+    """Non-2xx response from ClickUp"""
+
+    def __init__(self, status_code, body, url):
+        super().__init__(f"HTTP {status_code} for {url}: {body[:500]}")
+        self.status_code = status_code
+        self.body = body
+        self.url = url
+
+
+class ClickUpRateLimitError(ClickUpHTTPError):
+    """429 that persisted through all retries"""
+
+
+def get_session():
+    """Return the process-wide session, creating it on first use"""
+    global _session, _adapter
+    if _session is None:
+        with _lock:
+            if _session is None:
+                adapter = HTTPAdapter(
+                    pool_connections=POOL_CONNECTIONS,
+                    pool_maxsize=POOL_MAXSIZE,
+                    pool_block=False
+                )
+                session = requests.Session()
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers.update({"Connection": "keep-alive"})
+                _adapter = adapter
+                _session = session
+    return _session
+
+
+def set_governor(governor):
+    """
+    Route every request through a rate limiter with acquire() and
+    observe(response), e.g. clickup_ratelimit.RateLimitGovernor.
+    Pass None to remove it.
+    """
+    global _governor
+    _governor = governor
+
+
+def backoff_delay(attempt, response=None):
+    """Seconds to wait before retry number `attempt` (0-based)"""
+    if response is not None:
+        retry_after = response.headers.get("Retry-After")
+        if retry_after:
+            try:
+                return min(float(retry_after), BACKOFF_MAX)
+            except ValueError:
+                pass
+        reset = response.headers.get("X-RateLimit-Reset")
+        if response.status_code == 429 and reset:
+            try:
+                return min(max(float(reset) - time.time(), 0) + random.uniform(0, 1), BACKOFF_MAX)
+            except ValueError:
+                pass
+    # Full jitter: uniform over [0, base * 2^attempt]
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+
+def request(method, url, retries=MAX_RETRIES, **kwargs):
+    """
+    Send a request through the shared session, retrying transient failures.
+    Accepts the same keyword arguments as requests.request and returns the
+    final response (which may still be an error status).
+    Raises ClickUpConnectionError if the network fails on every attempt.
+    """
+    kwargs.setdefault("timeout", (CONNECT_TIMEOUT, READ_TIMEOUT))
+    method = method.upper()
+    idempotent = method in IDEMPOTENT_METHODS
+
+    for attempt in range(retries + 1):
+        governor = _governor
+        if governor is not None:
+            governor.acquire()
+        try:
+            response = get_session().request(method, url, **kwargs)
+        except requests.exceptions.RequestException as e:
+            # A connect timeout means nothing reached ClickUp, so even a POST is safe to replay;
+            # other connection errors may have hit mid-request and are only retried when idempotent
+            not_sent = isinstance(e, requests.exceptions.ConnectTimeout)
+            retryable = isinstance(e, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+            if attempt < retries and retryable and (idempotent or not_sent):
+                time.sleep(backoff_delay(attempt))
+                continue
+            raise ClickUpConnectionError(f"{method} {url} failed: {e}") from e
+
+        if governor is not None:
+            governor.observe(response)
+
+        retry_status = response.status_code in RETRY_STATUSES
+        if attempt < retries and retry_status and (idempotent or response.status_code == 429):
+            time.sleep(backoff_delay(attempt, response))
+            continue
+        return response
+
+
+def request_json(method, url, **kwargs):
+    """
+    Like request(), but raises ClickUpHTTPError / ClickUpRateLimitError on
+    error statuses and returns the decoded body ({} when it is empty).
+    """
+    response = request(method, url, **kwargs)
+    if response.status_code == 429:
+        raise ClickUpRateLimitError(response.status_code, response.text, url)
+    if response.status_code >= 400:
+        raise ClickUpHTTPError(response.status_code, response.text, url)
+    if not response.content:
+        return {}
+    try:
+        return response.json()
+    except ValueError as e:
+        raise ClickUpError(f"Invalid JSON from {url}: {e}") from e
+
+
+def connection_stats():
+    """
+    Per-host connection reuse counters.
+    Returns {host: {"requests": n, "new": n, "reused": n}}
+    """
+    stats = {}
+    if _adapter is None:
+        return stats
+
+    pools = _adapter.poolmanager.pools
+    for key in list(pools.keys()):
+        pool = pools.get(key)
+        if pool is None:
+            continue
+        host = f"{key.key_scheme}://{key.key_host}"
+        entry = stats.setdefault(host, {"requests": 0, "new": 0, "reused": 0})
+        entry["requests"] += pool.num_requests
+        entry["new"] += pool.num_connections
+    for entry in stats.values():
+        entry["reused"] = max(entry["requests"] - entry["new"], 0)
+    return stats
+
+
+def format_connection_stats():
+    """One line per host, suitable for logging"""
+    lines = []
+    for host, entry in connection_stats().items():
+        lines.append(
+            f"{host}: {entry['requests']} requests, "
+            f"{entry['new']} new connections, {entry['reused']} reused"
+        )
+    return "\n".join(lines) if lines else "No connections opened"
+
+
+def close_session():
+    """Close pooled connections (the next request opens a fresh session)"""
+    global _session, _adapter
+    with _lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+        _adapter = None
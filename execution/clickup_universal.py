@@ -1,18 +1,62 @@
 import os
-import requests
 import json
+import re
 import sys
 from dotenv import load_dotenv
+import clickup_session
+from clickup_session import ClickUpError
 
 load_dotenv()
 
 API_KEY = os.getenv("CLICKUP_API_KEY")
 BASE_URL = "https://api.clickup.com/api/v2"
 
+PLACEHOLDER = re.compile(r"\{(team|space|folder|list):([^}]+)\}")
+
+
+def resolve_id(kind, name):
+    """
+    Resolve a team/space/folder/list name to its ID, or None.
+    Uses the persisted index from clickup_index, kept in memory and
+    refreshed incrementally when the map is missing or stale.
+    """
+    import clickup_index
+    return clickup_index.resolve(kind, name)
+
+
+def resolve_endpoint(endpoint):
+    """
+    Replace {kind:Name} placeholders with IDs, e.g.
+    "list/{list:Leads}/task" -> "list/901234/task"
+    A name shared by several nodes must be qualified with its parent,
+    e.g. "list/{list:Sales / Leads}/task".
+    """
+    import clickup_index
+
+    def substitute(match):
+        kind, name = match.group(1), match.group(2)
+        try:
+            resolved = resolve_id(kind, name)
+        except clickup_index.AmbiguousName as e:
+            raise ClickUpError(str(e)) from None
+        if resolved is None:
+            raise ClickUpError(
+                f"No {kind} named '{name}' in the ClickUp map "
+                f"(try: python execution/clickup_index.py \"{name}\" --kind {kind} --fuzzy)"
+            )
+        return str(resolved)
+
+    return PLACEHOLDER.sub(substitute, endpoint)
+
+
 def clickup_request(endpoint, method="GET", data=None, params=None):
+    """
+    Call the ClickUp API and return the decoded JSON body.
+    Transient failures are retried by clickup_session; anything left is
+    raised as a ClickUpError (callers decide whether to abort).
+    """
     if not API_KEY:
-        print("Error: CLICKUP_API_KEY not found in .env")
-        sys.exit(1)
+        raise ClickUpError("CLICKUP_API_KEY not found in .env")
     
     headers = {
         "Authorization": API_KEY,
@@ -21,34 +65,30 @@ def clickup_request(endpoint, method="GET", data=None, params=None):
     
     url = f"{BASE_URL}/{endpoint.lstrip('/')}"
     
-    try:
-        if method.upper() == "GET":
-            response = requests.get(url, headers=headers, params=params)
-        elif method.upper() == "POST":
-            response = requests.post(url, headers=headers, json=data)
-        elif method.upper() == "PUT":
-            response = requests.put(url, headers=headers, json=data)
-        elif method.upper() == "DELETE":
-            response = requests.delete(url, headers=headers)
-        else:
-            raise ValueError(f"Unsupported method: {method}")
-        
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        print(f"API Request Failed: {e}")
-        if response is not None:
-            print(f"Response: {response.text}")
-        sys.exit(1)
+    if method.upper() not in ("GET", "POST", "PUT", "DELETE"):
+        raise ValueError(f"Unsupported method: {method}")
+    
+    return clickup_session.request_json(
+        method.upper(),
+        url,
+        headers=headers,
+        params=params,
+        json=data if method.upper() in ("POST", "PUT") else None
+    )
 
 if __name__ == "__main__":
     if len(sys.argv) < 3:
         print("Usage: python clickup_universal.py <endpoint> <method> [json_data]")
+        print("Endpoints may use name placeholders, e.g. 'list/{list:Leads}/task'")
         sys.exit(1)
     
-    endpoint = sys.argv[1]
-    method = sys.argv[2]
-    data = json.loads(sys.argv[3]) if len(sys.argv) > 3 else None
-    
-    result = clickup_request(endpoint, method, data)
+    try:
+        endpoint = resolve_endpoint(sys.argv[1])
+        method = sys.argv[2]
+        data = json.loads(sys.argv[3]) if len(sys.argv) > 3 else None
+        
+        result = clickup_request(endpoint, method, data)
+    except ClickUpError as e:
+        print(f"API Request Failed: {e}")
+        sys.exit(1)
     print(json.dumps(result, indent=2))
@@ -1,11 +1,13 @@
 import argparse
+import sys
 from clickup_client import ClickUpClient
+from clickup_session import ClickUpError
 
-def update_task(task_id, name=None, description=None):
+def update_task(task_id, name=None, description=None, client=None):
     """
     Updates a task in ClickUp.
     """
-    client = ClickUpClient()
+    client = client or ClickUpClient()
     endpoint = f"task/{task_id}"
     data = {}
     if name:
@@ -21,13 +23,26 @@ def update_task(task_id, name=None, description=None):
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Update a task in ClickUp.")
-    parser.add_argument("task_id", help="The ID of the task to update.")
+    parser.add_argument("task_id", nargs="?", help="The ID of the task to update.")
     parser.add_argument("-n", "--name", help="The new name of the task.")
     parser.add_argument("-d", "--description", help="The new description of the task.")
+    parser.add_argument("--bulk", metavar="FILE", help="CSV or JSONL of updates (columns: task_id, name, description).")
+    parser.add_argument("--report", help="JSONL report path for bulk mode (default: .tmp/clickup_bulk_update_*.jsonl).")
+    parser.add_argument("--workers", type=int, help="Concurrent workers in bulk mode.")
     args = parser.parse_args()
 
-    task = update_task(args.task_id, args.name, args.description)
+    if args.bulk:
+        from clickup_bulk import read_items, run_bulk, WORKERS
+        _, failed, _ = run_bulk("update", update_task, list(read_items(args.bulk)), args.report, args.workers or WORKERS)
+        sys.exit(1 if failed else 0)
+
+    if not args.task_id:
+        parser.error("task_id is required unless --bulk is given")
+
+    try:
+        task = update_task(args.task_id, args.name, args.description)
+    except ClickUpError as e:
+        print(f"Failed to update task: {e}")
+        sys.exit(1)
     if task:
         print(f"Task updated successfully! ID: {task['id']}")
-    else:
-        print("Failed to update task.")
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Local ClickUp webhook receiver.
+
+Instead of polling get_task/get_tasks, register a webhook for task events
+and let ClickUp push changes here. Each verified event is appended to
+.tmp/clickup_tasks/events.jsonl and the task's current state is written to
+.tmp/clickup_tasks/<task_id>.json (re-fetched once per event; deleted
+tasks are removed), so consumers read fresh task state from disk.
+
+Usage:
+    # Register (the endpoint must be publicly reachable, e.g. via a tunnel)
+    python execution/clickup_webhook.py register --team-id 123 --url https://example.ngrok.app/clickup/webhook
+    # Run the receiver
+    python execution/clickup_webhook.py serve --port 8787
+    # Send a signed stub event to a running receiver
+    python execution/clickup_webhook.py send-test --task-id abc123 --event taskUpdated
+"""
+
+import os
+import sys
+import json
+import hmac
+import asyncio
+import hashlib
+import logging
+import argparse
+import urllib.error
+import urllib.request
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+load_dotenv(os.path.join(BASE_DIR, ".env"))
+TMP_DIR = os.path.join(BASE_DIR, ".tmp")
+STORE_DIR = os.path.join(TMP_DIR, "clickup_tasks")
+CONFIG_FILE = os.path.join(TMP_DIR, "clickup_webhook.json")
+
+WEBHOOK_PATH = "/clickup/webhook"
+MAX_BODY = 1024 * 1024
+TASK_EVENTS = [
+    "taskCreated", "taskUpdated", "taskDeleted", "taskStatusUpdated",
+    "taskAssigneeUpdated", "taskDueDateUpdated", "taskMoved",
+    "taskCommentPosted", "taskTagUpdated", "taskPriorityUpdated",
+]
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger("clickup_webhook")
+
+
+def sign(secret, body):
+    """ClickUp signs the raw body with HMAC-SHA256 (hex) in X-Signature"""
+    return hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def verify_signature(secret, body, signature):
+    if not secret or not signature:
+        return False
+    return hmac.compare_digest(sign(secret, body), signature.strip())
+
+
+def load_config():
+    if os.path.exists(CONFIG_FILE):
+        with open(CONFIG_FILE, "r") as f:
+            return json.load(f)
+    return {}
+
+
+class TaskStore:
+    """One JSON file per task plus an append-only event log"""
+
+    def __init__(self, directory=STORE_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.events_file = os.path.join(directory, "events.jsonl")
+
+    def path(self, task_id):
+        return os.path.join(self.directory, f"{os.path.basename(str(task_id))}.json")
+
+    def append_event(self, event):
+        received_at = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+        record = dict(event, received_at=received_at)
+        with open(self.events_file, "a") as f:
+            f.write(json.dumps(record) + "\n")
+
+    def write_task(self, task):
+        tmp_file = self.path(task["id"]) + ".part"
+        with open(tmp_file, "w") as f:
+            json.dump(task, f)
+        os.replace(tmp_file, self.path(task["id"]))
+
+    def delete_task(self, task_id):
+        try:
+            os.remove(self.path(task_id))
+        except FileNotFoundError:
+            pass
+
+    def read_task(self, task_id):
+        """Latest stored state of a task, or None"""
+        try:
+            with open(self.path(task_id), "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+
+class WebhookReceiver:
+    """Minimal asyncio HTTP/1.1 server accepting signed ClickUp webhook POSTs"""
+
+    def __init__(self, secret, store, fetch=True):
+        self.secret = secret
+        self.store = store
+        self.fetch = fetch
+        self.client = None
+        self.pending = set()
+        self.locks = {}  # task_id -> [lock, users]; events for one task are applied in order
+
+    async def handle(self, reader, writer):
+        try:
+            status, message = await self.process(reader)
+        except (asyncio.IncompleteReadError, ValueError) as e:
+            status, message = 400, f"Bad request: {e}"
+        body = json.dumps({"message": message}).encode()
+        writer.write(
+            f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+            f"Connection: close\r\n\r\n".encode() + body
+        )
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def process(self, reader):
+        request_line = (await reader.readline()).decode("latin-1").split()
+        if len(request_line) < 2:
+            raise ValueError("malformed request line")
+        method, path = request_line[0], request_line[1]
+
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode("latin-1")
+            if line in ("\r\n", "\n", ""):
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if method != "POST" or path.split("?")[0] != WEBHOOK_PATH:
+            return 404, "Not found"
+        length = int(headers.get("content-length", "0"))
+        if length > MAX_BODY:
+            return 413, "Payload too large"
+        body = await reader.readexactly(length)
+
+        if not verify_signature(self.secret, body, headers.get("x-signature")):
+            logger.warning("Rejected webhook with invalid signature")
+            return 401, "Invalid signature"
+
+        event = json.loads(body)
+        if not isinstance(event, dict):
+            return 400, "Bad request: event must be a JSON object"
+        self.store.append_event(event)
+        # Acknowledge immediately; task state is refreshed in the background
+        task = asyncio.ensure_future(self.apply(event))
+        self.pending.add(task)
+        task.add_done_callback(self.pending.discard)
+        return 200, "ok"
+
+    async def apply(self, event):
+        """Apply one event; a later event for the same task waits for the earlier one"""
+        task_id = event.get("task_id")
+        if not task_id:
+            return
+        entry = self.locks.setdefault(task_id, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                await self._apply(task_id, event.get("event", ""))
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self.locks[task_id]
+
+    async def _apply(self, task_id, name):
+        if name == "taskDeleted":
+            self.store.delete_task(task_id)
+            logger.info(f"{name}: removed {task_id}")
+            return
+        if not self.fetch:
+            logger.info(f"{name}: {task_id} (fetch disabled)")
+            return
+
+        from clickup_client import ClickUpClient
+        from clickup_get_task import get_task
+        from clickup_session import ClickUpError
+        if self.client is None:
+            self.client = ClickUpClient()
+        loop = asyncio.get_running_loop()
+        try:
+            task = await loop.run_in_executor(None, get_task, task_id, self.client)
+        except ClickUpError as e:
+            logger.error(f"{name}: could not fetch {task_id}: {e}")
+            return
+        self.store.write_task(task)
+        logger.info(f"{name}: stored {task_id}")
+
+
+async def serve(host, port, secret, store, fetch=True):
+    receiver = WebhookReceiver(secret, store, fetch)
+    server = await asyncio.start_server(receiver.handle, host, port)
+    logger.info(f"Listening on http://{host}:{port}{WEBHOOK_PATH} (store: {store.directory})")
+    async with server:
+        await server.serve_forever()
+
+
+def register(team_id, url, events):
+    """Create the webhook in ClickUp and remember its id and secret"""
+    from clickup_universal import clickup_request
+    result = clickup_request(f"team/{team_id}/webhook", "POST", {"endpoint": url, "events": events})
+    webhook = result.get("webhook", result)
+    config = {"id": webhook.get("id"), "secret": webhook.get("secret"), "endpoint": url, "team_id": team_id}
+    os.makedirs(TMP_DIR, exist_ok=True)
+    with open(CONFIG_FILE, "w") as f:
+        json.dump(config, f, indent=2)
+    return config
+
+
+def unregister(webhook_id):
+    from clickup_universal import clickup_request
+    return clickup_request(f"webhook/{webhook_id}", "DELETE")
+
+
+def send_test(url, secret, event, task_id, bad_signature=False):
+    """Stub sender: POST a signed ClickUp-style event and return the HTTP status"""
+    body = json.dumps({"event": event, "task_id": task_id, "webhook_id": "stub", "history_items": []}).encode()
+    signature = sign(secret, body) if not bad_signature else "0" * 64
+    req = urllib.request.Request(url, data=body, method="POST", headers={
+        "Content-Type": "application/json", "X-Signature": signature,
+    })
+    try:
+        with urllib.request.urlopen(req, timeout=10) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def resolve_secret(cli_secret):
+    return cli_secret or os.getenv("CLICKUP_WEBHOOK_SECRET") or load_config().get("secret")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Receive ClickUp task webhooks into a local task store.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_reg = sub.add_parser("register", help="Register a webhook with ClickUp.")
+    p_reg.add_argument("--team-id", required=True)
+    p_reg.add_argument("--url", required=True, help="Public URL that forwards to this receiver.")
+    p_reg.add_argument("--events", nargs="+", default=TASK_EVENTS)
+
+    p_unreg = sub.add_parser("unregister", help="Delete a webhook.")
+    p_unreg.add_argument("--webhook-id", help="Defaults to the registered one in .tmp/clickup_webhook.json.")
+
+    p_serve = sub.add_parser("serve", help="Run the receiver.")
+    p_serve.add_argument("--host", default="127.0.0.1")
+    p_serve.add_argument("--port", type=int, default=8787)
+    p_serve.add_argument("--secret", help="Webhook secret (default: CLICKUP_WEBHOOK_SECRET or the registered one).")
+    p_serve.add_argument("--store", default=STORE_DIR)
+    p_serve.add_argument("--no-fetch", action="store_true", help="Only log events; do not re-fetch task state.")
+
+    p_test = sub.add_parser("send-test", help="Send a signed stub event to a running receiver.")
+    p_test.add_argument("--url", default=f"http://127.0.0.1:8787{WEBHOOK_PATH}")
+    p_test.add_argument("--secret")
+    p_test.add_argument("--event", default="taskUpdated")
+    p_test.add_argument("--task-id", required=True)
+    p_test.add_argument("--bad-signature", action="store_true", help="Expect a 401.")
+
+    args = parser.parse_args()
+
+    if args.command == "register":
+        config = register(args.team_id, args.url, args.events)
+        print(f"Registered webhook {config['id']}; secret saved to {CONFIG_FILE}")
+    elif args.command == "unregister":
+        webhook_id = args.webhook_id or load_config().get("id")
+        if not webhook_id:
+            parser.error("no --webhook-id and no registered webhook found")
+        unregister(webhook_id)
+        print(f"Deleted webhook {webhook_id}")
+    elif args.command == "serve":
+        secret = resolve_secret(args.secret)
+        if not secret:
+            parser.error("no webhook secret: pass --secret, set CLICKUP_WEBHOOK_SECRET, or run register first")
+        try:
+            asyncio.run(serve(args.host, args.port, secret, TaskStore(args.store), fetch=not args.no_fetch))
+        except KeyboardInterrupt:
+            pass
+    elif args.command == "send-test":
+        secret = resolve_secret(args.secret)
+        if not secret:
+            parser.error("no webhook secret: pass --secret or set CLICKUP_WEBHOOK_SECRET")
+        status = send_test(args.url, secret, args.event, args.task_id, args.bad_signature)
+        print(f"Receiver answered HTTP {status}")
+        sys.exit(0 if status == 200 else 1)
@@ -1,5 +1,6 @@
 import json
 from clickup_client import ClickUpClient
+from clickup_session import ClickUpError
 
 def discover():
     """
@@ -44,4 +45,7 @@ def discover():
 
 
 if __name__ == "__main__":
-    discover()
+    try:
+        discover()
+    except ClickUpError as e:
+        print(f"ClickUp API Error: {e}")
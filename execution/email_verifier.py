@@ -0,0 +1,488 @@
+#!/usr/bin/env python3
+"""
+Email verification engine: MX lookup, SMTP RCPT probing and catch-all detection.
+
+DNS MX queries go straight over UDP (stdlib only) and are cached in memory
+and in .tmp/mx_cache.json until their record TTL expires. An in-flight
+lookup is shared, so a thousand companies on the same domain cost one
+query. SMTP probes open one session per domain, ask the mail server about
+a random mailbox first (a catch-all server accepts it), then RCPT each
+candidate address and QUIT without sending anything. Concurrent probes
+against the same mail host are capped.
+
+Statuses: valid, invalid, catch_all, unknown (server unreachable, greylisted
+or SMTP disabled), no_mx (the domain cannot receive mail), bad_syntax.
+
+Tuning via .env:
+    DNS_NAMESERVER          resolver to query (default: first one in /etc/resolv.conf)
+    DNS_PORT                resolver port (default 53)
+    EMAIL_VERIFY_SMTP       0 to stop after the MX lookup
+    SMTP_VERIFY_PORT        port mail servers are probed on (default 25)
+    SMTP_VERIFY_HELO        hostname announced in EHLO
+    SMTP_VERIFY_FROM        envelope sender for probes
+    SMTP_VERIFY_TIMEOUT     seconds per SMTP/DNS operation (default 10)
+    SMTP_VERIFY_PER_HOST    concurrent sessions per mail host (default 2)
+
+Usage:
+    python execution/email_verifier.py check info@example.com contact@example.com
+    # Local stubs for testing: MX for example.test -> localhost, SMTP on 2525
+    python execution/email_verifier.py stub --domain example.test --mailbox info --catch-all any.test
+    python execution/email_verifier.py check info@example.test --nameserver 127.0.0.1 --dns-port 5353 --smtp-port 2525
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import uuid
+import random
+import socket
+import struct
+import smtplib
+import argparse
+import threading
+import socketserver
+from concurrent.futures import Future
+from dotenv import load_dotenv
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+load_dotenv(os.path.join(BASE_DIR, ".env"))
+MX_CACHE_FILE = os.path.join(BASE_DIR, ".tmp", "mx_cache.json")
+
+SMTP_ENABLED = os.getenv("EMAIL_VERIFY_SMTP", "1") != "0"
+SMTP_PORT = int(os.getenv("SMTP_VERIFY_PORT", "25"))
+HELO_HOST = os.getenv("SMTP_VERIFY_HELO")
+MAIL_FROM = os.getenv("SMTP_VERIFY_FROM")
+TIMEOUT = float(os.getenv("SMTP_VERIFY_TIMEOUT", "10"))
+PER_HOST_LIMIT = int(os.getenv("SMTP_VERIFY_PER_HOST", "2"))
+
+# Cache lifetime for NXDOMAIN / SERVFAIL answers, and bounds on record TTLs
+NEGATIVE_TTL = 300
+MIN_TTL = 60
+MAX_TTL = 86400
+
+TYPE_MX = 15
+RCODE_NXDOMAIN = 3
+
+EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+
+
+class DNSError(Exception):
+    """The resolver could not be reached or answered with an error"""
+
+
+def is_valid_email(email):
+    """Basic email format validation"""
+    return EMAIL_PATTERN.match(email) is not None
+
+
+def default_nameserver():
+    if os.getenv("DNS_NAMESERVER"):
+        return os.getenv("DNS_NAMESERVER")
+    try:
+        with open("/etc/resolv.conf", "r") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0] == "nameserver":
+                    return parts[1]
+    except OSError:
+        pass
+    return "8.8.8.8"
+
+
+# --- DNS wire format ---
+
+def encode_name(name):
+    out = b""
+    for label in name.rstrip(".").split("."):
+        raw = label.encode("idna")
+        out += bytes([len(raw)]) + raw
+    return out + b"\x00"
+
+
+def read_name(message, offset):
+    """Decode a (possibly compressed) name; returns (name, offset after it)"""
+    labels = []
+    end = None
+    for _ in range(128):  # guards against pointer loops
+        length = message[offset]
+        if length & 0xC0 == 0xC0:
+            if end is None:
+                end = offset + 2
+            offset = struct.unpack("!H", message[offset:offset + 2])[0] & 0x3FFF
+            continue
+        if length == 0:
+            return ".".join(labels), (end if end is not None else offset + 1)
+        labels.append(message[offset + 1:offset + 1 + length].decode("ascii", "replace"))
+        offset += 1 + length
+    raise DNSError("malformed name in DNS response")
+
+
+def build_query(name, qtype=TYPE_MX, query_id=None):
+    query_id = random.getrandbits(16) if query_id is None else query_id
+    header = struct.pack("!HHHHHH", query_id, 0x0100, 1, 0, 0, 0)  # recursion desired
+    return header + encode_name(name) + struct.pack("!HH", qtype, 1)
+
+
+def parse_mx_response(message):
+    """
+    Returns (rcode, [(preference, exchange)], min ttl).
+    Raises DNSError for a truncated (TC) or malformed reply, so one bad
+    answer fails that lookup instead of the whole run.
+    """
+    try:
+        _, flags, qdcount, ancount, _, _ = struct.unpack("!HHHHHH", message[:12])
+        if flags & 0x0200:
+            # The full answer needs TCP; a partial MX set would be misleading
+            raise DNSError("truncated DNS response")
+        offset = 12
+        for _ in range(qdcount):
+            _, offset = read_name(message, offset)
+            offset += 4
+        records = []
+        ttl = MAX_TTL
+        for _ in range(ancount):
+            _, offset = read_name(message, offset)
+            rtype, _, rttl, rdlength = struct.unpack("!HHIH", message[offset:offset + 10])
+            offset += 10
+            if rtype == TYPE_MX:
+                preference = struct.unpack("!H", message[offset:offset + 2])[0]
+                exchange, _ = read_name(message, offset + 2)
+                records.append((preference, exchange.lower()))
+                ttl = min(ttl, rttl)
+            offset += rdlength
+    except (struct.error, IndexError) as e:
+        raise DNSError(f"malformed DNS response: {e}")
+    return flags & 0x000F, sorted(records), ttl
+
+
+def query_mx(domain, nameserver, port=53, timeout=TIMEOUT, attempts=2):
+    """One MX query over UDP. Returns (rcode, records, ttl)"""
+    query_id = random.getrandbits(16)
+    packet = build_query(domain, TYPE_MX, query_id)
+    last_error = None
+    for _ in range(attempts):
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.settimeout(timeout)
+            try:
+                sock.sendto(packet, (nameserver, port))
+                while True:
+                    data, _ = sock.recvfrom(4096)
+                    if len(data) >= 12 and struct.unpack("!H", data[:2])[0] == query_id:
+                        return parse_mx_response(data)
+            except OSError as e:
+                last_error = e
+    raise DNSError(f"MX lookup for {domain} failed: {last_error}")
+
+
+class MXResolver:
+    """
+    Thread-safe MX lookups with a TTL-respecting cache shared by all workers.
+    Concurrent lookups of the same domain wait on the first one.
+    """
+
+    def __init__(self, nameserver=None, port=None, timeout=TIMEOUT, cache_file=MX_CACHE_FILE):
+        self.nameserver = nameserver or default_nameserver()
+        self.port = port or int(os.getenv("DNS_PORT", "53"))
+        self.timeout = timeout
+        self.cache_file = cache_file
+        self.lock = threading.Lock()
+        self.inflight = {}
+        self.stats = {"hits": 0, "queries": 0, "errors": 0}
+        self.entries = self._load()
+
+    def _load(self):
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return {}
+        try:
+            with open(self.cache_file, "r") as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        now = time.time()
+        return {domain: entry for domain, entry in entries.items() if entry["expires"] > now}
+
+    def save(self):
+        if not self.cache_file:
+            return
+        os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+        now = time.time()
+        with self.lock:
+            entries = {domain: entry for domain, entry in self.entries.items() if entry["expires"] > now}
+        tmp_file = f"{self.cache_file}.part"
+        with open(tmp_file, "w") as f:
+            json.dump(entries, f)
+        os.replace(tmp_file, self.cache_file)
+
+    def mx_hosts(self, domain):
+        """
+        Mail hosts for `domain`, best preference first. A domain without MX
+        records but which exists receives mail on its own name (RFC 5321);
+        a domain that does not exist returns [].
+        """
+        domain = domain.lower().rstrip(".")
+        with self.lock:
+            entry = self.entries.get(domain)
+            if entry and entry["expires"] > time.time():
+                self.stats["hits"] += 1
+                return entry["hosts"]
+            pending = self.inflight.get(domain)
+            owner = pending is None
+            if owner:
+                pending = self.inflight[domain] = Future()
+        if not owner:
+            return pending.result()
+
+        try:
+            try:
+                rcode, records, ttl = query_mx(domain, self.nameserver, self.port, self.timeout)
+            except DNSError:
+                with self.lock:
+                    self.stats["errors"] += 1
+                raise
+            with self.lock:
+                self.stats["queries"] += 1
+            if rcode == RCODE_NXDOMAIN:
+                hosts, ttl = [], NEGATIVE_TTL
+            elif rcode != 0:
+                raise DNSError(f"MX lookup for {domain} failed with rcode {rcode}")
+            else:
+                # A null MX ("." per RFC 7505) means the domain accepts no mail
+                hosts = [exchange for _, exchange in records if exchange] if records else [domain]
+                ttl = max(MIN_TTL, min(ttl, MAX_TTL)) if records else NEGATIVE_TTL
+            with self.lock:
+                self.entries[domain] = {"hosts": hosts, "expires": time.time() + ttl}
+            pending.set_result(hosts)
+            return hosts
+        except Exception as e:
+            pending.set_exception(e)
+            raise
+        finally:
+            with self.lock:
+                self.inflight.pop(domain, None)
+
+
+def result(email, status, mx=None, code=None, message=""):
+    return {"email": email, "status": status, "mx": mx, "code": code, "message": message}
+
+
+class EmailVerifier:
+    """
+    Verifies addresses with MX + SMTP RCPT probes.
+    Safe to share across threads; catch-all status is remembered per domain.
+    """
+
+    def __init__(self, resolver=None, smtp=SMTP_ENABLED, smtp_port=SMTP_PORT, helo=HELO_HOST,
+                 mail_from=MAIL_FROM, timeout=TIMEOUT, per_host=PER_HOST_LIMIT):
+        self.resolver = resolver or MXResolver(timeout=timeout)
+        self.smtp = smtp
+        self.smtp_port = smtp_port
+        # getfqdn() can block on a reverse lookup, so only pay for it here
+        self.helo = helo or socket.getfqdn()
+        self.mail_from = mail_from or f"verify@{self.helo}"
+        self.timeout = timeout
+        self.per_host = per_host
+        self.lock = threading.Lock()
+        self.host_slots = {}
+        self.catch_all = {}
+        self.stats = {"sessions": 0, "probes": 0, "smtp_errors": 0}
+
+    def _slot(self, host):
+        with self.lock:
+            if host not in self.host_slots:
+                self.host_slots[host] = threading.BoundedSemaphore(self.per_host)
+            return self.host_slots[host]
+
+    def verify(self, email):
+        return self.verify_candidates([email])[0]
+
+    def verify_candidates(self, emails):
+        """
+        Verify addresses that share one domain in a single SMTP session.
+        Returns one result per address, in order.
+        """
+        checked = [e for e in emails if e and is_valid_email(e)]
+        results = {e: result(e, "bad_syntax") for e in emails if e not in checked}
+        if not checked:
+            return [results[e] for e in emails]
+        domain = checked[0].rsplit("@", 1)[1].lower()
+
+        try:
+            hosts = self.resolver.mx_hosts(domain)
+        except DNSError as e:
+            results.update({addr: result(addr, "unknown", message=str(e)) for addr in checked})
+            return [results[addr] for addr in emails]
+        if not hosts:
+            results.update({addr: result(addr, "no_mx") for addr in checked})
+            return [results[addr] for addr in emails]
+        if not self.smtp:
+            results.update({addr: result(addr, "unknown", hosts[0], message="SMTP probing disabled")
+                            for addr in checked})
+            return [results[addr] for addr in emails]
+
+        results.update(self._probe(domain, hosts, checked))
+        return [results[addr] for addr in emails]
+
+    def _probe(self, domain, hosts, addresses):
+        last_error = "no mail host answered"
+        for host in hosts[:2]:
+            with self._slot(host):
+                try:
+                    return self._session(domain, host, addresses)
+                except (OSError, smtplib.SMTPException) as e:
+                    with self.lock:
+                        self.stats["smtp_errors"] += 1
+                    last_error = f"{host}: {e}"
+        return {addr: result(addr, "unknown", hosts[0], message=last_error) for addr in addresses}
+
+    def _session(self, domain, host, addresses):
+        with self.lock:
+            self.stats["sessions"] += 1
+        smtp = smtplib.SMTP(timeout=self.timeout, local_hostname=self.helo)
+        try:
+            smtp.connect(host, self.smtp_port)
+            smtp.ehlo_or_helo_if_needed()
+            code, message = smtp.mail(self.mail_from)
+            if code >= 400:
+                return {addr: result(addr, "unknown", host, code, message.decode("utf-8", "replace"))
+                        for addr in addresses}
+
+            if domain not in self.catch_all:
+                code, _ = smtp.rcpt(f"{uuid.uuid4().hex[:16]}@{domain}")
+                # Only a definite answer is remembered; 4xx may be greylisting
+                if code in (250, 251) or 500 <= code < 600:
+                    with self.lock:
+                        self.catch_all[domain] = code in (250, 251)
+
+            results = {}
+            for addr in addresses:
+                code, message = smtp.rcpt(addr)
+                with self.lock:
+                    self.stats["probes"] += 1
+                message = message.decode("utf-8", "replace")
+                if code in (250, 251):
+                    status = "catch_all" if self.catch_all.get(domain) else "valid"
+                elif 500 <= code < 600:
+                    status = "invalid"
+                else:
+                    status = "unknown"
+                results[addr] = result(addr, status, host, code, message)
+            return results
+        finally:
+            try:
+                smtp.quit()
+            except (OSError, smtplib.SMTPException):
+                smtp.close()
+
+    def summary(self):
+        dns = self.resolver.stats
+        return (
+            f"Email verifier: {dns['queries']} MX queries, {dns['hits']} cache hits, {dns['errors']} DNS errors; "
+            f"{self.stats['sessions']} SMTP sessions, {self.stats['probes']} RCPT probes, "
+            f"{self.stats['smtp_errors']} SMTP errors, "
+            f"{sum(self.catch_all.values())}/{len(self.catch_all)} domains catch-all"
+        )
+
+
+# --- Local stubs for testing ---
+
+class StubDNSHandler(socketserver.BaseRequestHandler):
+    """Answers MX queries for the configured domains with `localhost`; NXDOMAIN otherwise"""
+
+    def handle(self):
+        data, sock = self.request
+        query_id, _, _, _, _, _ = struct.unpack("!HHHHHH", data[:12])
+        name, offset = read_name(data, 12)
+        question = data[12:offset + 4]
+        known = name.lower() in self.server.domains
+        flags = 0x8180 if known else 0x8180 | RCODE_NXDOMAIN
+        answer = b""
+        if known:
+            rdata = struct.pack("!H", 10) + encode_name("localhost")
+            answer = b"\xc0\x0c" + struct.pack("!HHIH", TYPE_MX, 1, self.server.ttl, len(rdata)) + rdata
+        header = struct.pack("!HHHHHH", query_id, flags, 1, 1 if known else 0, 0, 0)
+        sock.sendto(header + question + answer, self.client_address)
+
+
+class StubSMTPHandler(socketserver.StreamRequestHandler):
+    """Accepts RCPT for configured mailboxes, or anything on catch-all domains"""
+
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        self.reply("220 stub.local ESMTP")
+        for raw in self.rfile:
+            line = raw.decode("utf-8", "replace").strip()
+            verb = line.split(" ", 1)[0].upper()
+            if verb in ("EHLO", "HELO"):
+                self.reply("250 stub.local")
+            elif verb in ("MAIL", "RSET", "NOOP"):
+                self.reply("250 OK")
+            elif verb == "RCPT":
+                address = line.split(":", 1)[-1].strip().strip("<>").lower()
+                local, _, domain = address.partition("@")
+                accepted = domain in self.server.catch_all or address in self.server.mailboxes
+                self.reply("250 OK" if accepted else "550 No such user")
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Not implemented")
+
+
+def run_stubs(domains, mailboxes, catch_all, dns_port=5353, smtp_port=2525, ttl=300):
+    dns = socketserver.ThreadingUDPServer(("127.0.0.1", dns_port), StubDNSHandler)
+    dns.domains = {d.lower() for d in domains} | {d.lower() for d in catch_all}
+    dns.ttl = ttl
+    smtp = socketserver.ThreadingTCPServer(("127.0.0.1", smtp_port), StubSMTPHandler)
+    smtp.daemon_threads = True
+    smtp.mailboxes = {m.lower() for m in mailboxes}
+    smtp.catch_all = {d.lower() for d in catch_all}
+    for server in (dns, smtp):
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    return dns, smtp
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Verify email addresses via MX lookup and SMTP probing.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_check = sub.add_parser("check", help="Verify addresses and print one JSON result per line.")
+    p_check.add_argument("emails", nargs="+")
+    p_check.add_argument("--nameserver")
+    p_check.add_argument("--dns-port", type=int)
+    p_check.add_argument("--smtp-port", type=int, default=SMTP_PORT)
+    p_check.add_argument("--no-smtp", action="store_true", help="Only check that the domain has MX records.")
+
+    p_stub = sub.add_parser("stub", help="Run local stub DNS and SMTP servers.")
+    p_stub.add_argument("--domain", action="append", default=[], help="Domain with real mailboxes (repeatable).")
+    p_stub.add_argument("--mailbox", action="append", default=[],
+                        help="Local part accepted on every --domain (repeatable).")
+    p_stub.add_argument("--catch-all", action="append", default=[], help="Domain accepting any address.")
+    p_stub.add_argument("--dns-port", type=int, default=5353)
+    p_stub.add_argument("--smtp-port", type=int, default=2525)
+
+    args = parser.parse_args()
+
+    if args.command == "check":
+        resolver = MXResolver(args.nameserver, args.dns_port, cache_file=None if args.nameserver else MX_CACHE_FILE)
+        verifier = EmailVerifier(resolver, smtp=not args.no_smtp, smtp_port=args.smtp_port)
+        by_domain = {}
+        for email in args.emails:
+            by_domain.setdefault(email.rsplit("@", 1)[-1].lower(), []).append(email)
+        for emails in by_domain.values():
+            for item in verifier.verify_candidates(emails):
+                print(json.dumps(item))
+        resolver.save()
+        print(verifier.summary(), file=sys.stderr)
+    elif args.command == "stub":
+        mailboxes = [f"{m}@{d}" for d in args.domain for m in args.mailbox]
+        run_stubs(args.domain, mailboxes, args.catch_all, args.dns_port, args.smtp_port)
+        print(f"Stub DNS on 127.0.0.1:{args.dns_port}/udp, SMTP on 127.0.0.1:{args.smtp_port}", flush=True)
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Fuzzy entity resolution for scraped HVAC companies.
+
+Exact (name, city) keys let "ABC Heating & Air" and "ABC Heating and Air
+Conditioning LLC", or one company returned for both Plano and Frisco,
+through as separate leads. The EntityResolver sees records one at a time
+(so the scrape can keep streaming) and compares each new record only
+against earlier records that share a blocking key:
+
+  - the normalized phone number
+  - the registrable website domain (directory/social sites and bare
+    website-builder domains excluded)
+  - a MinHash-LSH band of the normalized name's character trigrams
+
+Work per record is bounded by the bucket cap, so the whole run scales
+near-linearly instead of comparing every pair. A candidate is a duplicate
+when the phone or domain matches, or when the names are near-identical
+in the same city and no phone/domain contradicts it. On a website
+builder subdomain (joeshvac.wixsite.com) the domain only counts together
+with a matching name, since one account can host several businesses. The first record
+wins; every dropped duplicate is written to a JSONL merge report.
+
+Usage:
+    python execution/hvac_dedup.py .tmp/hvac_raw.jsonl --output .tmp/hvac_dedup.jsonl
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import struct
+import hashlib
+import argparse
+from collections import defaultdict
+from hvac_domains import registrable_domain, is_aggregator, is_hosted, is_platform
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPORT_FILE = os.path.join(BASE_DIR, ".tmp", "hvac_dedup_report.jsonl")
+
+NUM_PERM = 24
+BANDS = 6  # 6 bands x 4 rows: ~96% of pairs at 0.8 trigram Jaccard share a band
+BUCKET_CAP = 50  # compare against at most this many records per bucket
+
+
+def name_threshold():
+    """HVAC_DEDUP_NAME_THRESHOLD, read per resolver: callers import this module before loading .env"""
+    return float(os.getenv("HVAC_DEDUP_NAME_THRESHOLD", "0.8"))
+
+
+# Title separators: organic results look like "ABC Heating & Air | AC Repair Dallas TX"
+TITLE_SPLIT = re.compile(r"\s+[|–—-]\s+|\s*\|\s*")
+LEGAL_SUFFIXES = {"llc", "inc", "co", "corp", "corporation", "company", "ltd", "pllc", "lp", "llp"}
+STOPWORDS = {"and", "the", "of"}
+PHRASES = [
+    (re.compile(r"\ba\s*/\s*c\b"), "ac"),
+    (re.compile(r"\bair\s+conditioning\b"), "ac"),
+    (re.compile(r"\bheating\s+(?:and\s+)?cooling\b"), "heating cooling"),
+    (re.compile(r"\bheating\s+(?:and\s+)?ac\b"), "heating ac"),
+    (re.compile(r"\bheating\s+(?:and\s+)?air\b"), "heating ac"),
+    (re.compile(r"\bservices\b"), "service"),
+    (re.compile(r"\bmechanical\b"), "mech"),
+]
+
+_SIGNATURE = struct.Struct(f">{NUM_PERM}I")
+
+
+def normalize_name(name):
+    """'ABC Heating & Air Conditioning, LLC | Dallas AC Repair' -> 'abc heating ac'"""
+    if not name:
+        return ""
+    name = TITLE_SPLIT.split(name.strip())[0].lower()
+    name = name.replace("&", " and ").replace("+", " and ")
+    name = re.sub(r"[^a-z0-9/ ]+", " ", name)
+    for pattern, replacement in PHRASES:
+        name = pattern.sub(replacement, name)
+    tokens = [t for t in name.replace("/", " ").split() if t not in STOPWORDS]
+    while tokens and tokens[-1] in LEGAL_SUFFIXES:
+        tokens.pop()
+    return " ".join(tokens)
+
+
+def normalize_phone(phone):
+    digits = re.sub(r"\D", "", phone or "")
+    if len(digits) == 11 and digits.startswith("1"):
+        digits = digits[1:]
+    return digits if len(digits) == 10 else None
+
+
+def own_domain(website):
+    """The company's own registrable domain; None for directories, social and bare website-builder sites"""
+    domain = registrable_domain(website)
+    if not domain or is_aggregator(domain) or is_platform(domain):
+        return None
+    return domain
+
+
+def company_id(company):
+    """
+    Stable 12-hex-digit ID for a company, from the same identity the
+    resolver uses: own website domain, else phone, else name + city.
+    Re-scrapes of the same company get the same ID.
+    """
+    domain = own_domain(company.get("website"))
+    if domain and is_hosted(domain):
+        # One website-builder account can host several businesses
+        identity = f"domain:{domain}|{normalize_name(company.get('name', ''))}"
+    elif domain:
+        identity = f"domain:{domain}"
+    elif normalize_phone(company.get("phone")):
+        identity = f"phone:{normalize_phone(company.get('phone'))}"
+    else:
+        city = (company.get("city") or "").strip().lower()
+        identity = f"name:{normalize_name(company.get('name', ''))}|{city}"
+    return hashlib.sha1(identity.encode()).hexdigest()[:12]
+
+
+def shingles(text, k=3):
+    text = f" {text} "
+    return {text[i:i + k] for i in range(max(1, len(text) - k + 1))}
+
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+
+def minhash(grams):
+    """
+    NUM_PERM-value MinHash signature. One SHAKE digest per shingle supplies
+    an independent 32-bit hash for every slot, which is much cheaper in
+    Python than NUM_PERM modular permutations.
+    """
+    rows = [_SIGNATURE.unpack(hashlib.shake_128(g.encode()).digest(_SIGNATURE.size)) for g in grams]
+    return list(map(min, zip(*rows)))
+
+
+def band_keys(signature):
+    rows = NUM_PERM // BANDS
+    return [("lsh", i, tuple(signature[i * rows:(i + 1) * rows])) for i in range(BANDS)]
+
+
+class EntityResolver:
+    """Streaming deduplicator; `add(record)` returns True for a new entity, False for a duplicate"""
+
+    def __init__(self, report_path=REPORT_FILE, threshold=None):
+        self.threshold = name_threshold() if threshold is None else threshold
+        self.entities = []
+        self.buckets = defaultdict(list)
+        self.stats = {"seen": 0, "kept": 0, "phone": 0, "domain": 0, "name": 0, "comparisons": 0}
+        self.report = None
+        if report_path:
+            os.makedirs(os.path.dirname(report_path), exist_ok=True)
+            self.report = open(report_path, "w")
+
+    def _features(self, record):
+        name = normalize_name(record.get("name", ""))
+        domain = own_domain(record.get("website"))
+        return {
+            "name": name,
+            "grams": shingles(name),
+            "city": (record.get("city") or "").strip().lower(),
+            "phone": normalize_phone(record.get("phone")),
+            "domain": domain,
+            "hosted": is_hosted(domain),
+        }
+
+    def _keys(self, features):
+        keys = []
+        if features["phone"]:
+            keys.append(("phone", features["phone"]))
+        if features["domain"]:
+            keys.append(("domain", features["domain"]))
+        if features["name"]:
+            keys += band_keys(minhash(features["grams"]))
+        return keys
+
+    def _match(self, new, old):
+        """(reason, score) if `new` duplicates `old`, else None"""
+        if new["phone"] and new["phone"] == old["phone"]:
+            return "phone", 1.0
+        if new["domain"] and new["domain"] == old["domain"]:
+            if not new["hosted"]:
+                return "domain", 1.0
+            score = jaccard(new["grams"], old["grams"])
+            return ("domain", round(score, 3)) if score >= self.threshold else None
+        if new["city"] != old["city"]:
+            return None
+        # Different phones or sites mean different businesses with similar names
+        if (new["phone"] and old["phone"]) or (new["domain"] and old["domain"]):
+            return None
+        score = jaccard(new["grams"], old["grams"])
+        return ("name", round(score, 3)) if score >= self.threshold else None
+
+    def add(self, record):
+        self.stats["seen"] += 1
+        features = self._features(record)
+        keys = self._keys(features)
+
+        checked = set()
+        for key in keys:
+            for index in self.buckets.get(key, ())[-BUCKET_CAP:]:
+                if index in checked:
+                    continue
+                checked.add(index)
+                self.stats["comparisons"] += 1
+                kept_record, kept_features = self.entities[index]
+                match = self._match(features, kept_features)
+                if match:
+                    reason, score = match
+                    self.stats[reason] += 1
+                    self._log(kept_record, record, reason, score)
+                    return False
+
+        index = len(self.entities)
+        # Only the fields the report needs are kept, so memory stays small
+        summary = {k: record.get(k) for k in ("name", "city", "phone", "website")}
+        self.entities.append((summary, features))
+        for key in keys:
+            self.buckets[key].append(index)
+        self.stats["kept"] += 1
+        return True
+
+    def _log(self, kept, dropped, reason, score):
+        if self.report is None:
+            return
+        self.report.write(json.dumps({
+            "reason": reason,
+            "score": score,
+            "kept": kept,
+            "dropped": {k: dropped.get(k) for k in ("name", "city", "phone", "website")},
+        }) + "\n")
+
+    def close(self):
+        if self.report is not None:
+            self.report.close()
+            self.report = None
+
+    def summary(self):
+        dropped = self.stats["seen"] - self.stats["kept"]
+        return (
+            f"Dedup: kept {self.stats['kept']}/{self.stats['seen']}, merged {dropped} "
+            f"(phone {self.stats['phone']}, domain {self.stats['domain']}, name {self.stats['name']}) "
+            f"with {self.stats['comparisons']} comparisons"
+        )
+
+
+if __name__ == "__main__":
+    from hvac_records import RecordWriter, read_records
+
+    parser = argparse.ArgumentParser(description="Fuzzy-deduplicate a JSONL file of companies.")
+    parser.add_argument("input")
+    parser.add_argument("--output", required=True)
+    parser.add_argument("--report", default=REPORT_FILE)
+    parser.add_argument("--threshold", type=float, help="Name trigram Jaccard for a match (default HVAC_DEDUP_NAME_THRESHOLD or 0.8).")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    resolver = EntityResolver(args.report, args.threshold)
+    try:
+        with RecordWriter(args.output) as out:
+            for record in read_records(args.input):
+                if resolver.add(record):
+                    out.write(record)
+    finally:
+        resolver.close()
+    print(f"{resolver.summary()} in {time.perf_counter() - start:.1f}s")
+    print(f"Merge report: {args.report}")
+    sys.exit(0)
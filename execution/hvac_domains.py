@@ -0,0 +1,109 @@
+"""
+Domain normalization shared by the HVAC pipeline phases.
+
+`registrable_domain` reduces a website URL or host to the domain a company
+actually owns ("https://www.acme-hvac.com/contact" -> "acme-hvac.com"), so
+work keyed by domain is done once per company site. On website-builder
+platforms each company gets its own subdomain, so there the subdomain is
+the unit ("joeshvac.wixsite.com", not "wixsite.com"). `is_aggregator` flags
+directory, review and social sites (yelp, angi, facebook, ...). SerpAPI
+results link to them constantly; they are not the company's own site, and
+guessing info@yelp.com produces false leads.
+
+Extra aggregator domains can be added via .env:
+    HVAC_AGGREGATOR_DOMAINS=example-directory.com,another.com
+"""
+
+import os
+from urllib.parse import urlsplit
+
+# Second-level public suffixes under which registrations happen one label
+# deeper. Not the full public suffix list, just the ones plausible for
+# North American / English-language business sites.
+MULTI_LABEL_SUFFIXES = {
+    "co.uk", "org.uk", "me.uk", "ltd.uk", "plc.uk", "com.au", "net.au", "org.au",
+    "co.nz", "com.mx", "com.br", "co.za", "co.in", "com.sg", "co.jp",
+    "on.ca", "qc.ca", "bc.ca", "ab.ca",
+}
+
+# Website builders and free hosts that give every customer a subdomain
+# (the "private" part of the public suffix list). Unrelated companies share
+# these, so they are treated as suffixes too.
+HOSTING_SUFFIXES = {
+    "wixsite.com", "business.site", "squarespace.com", "weebly.com", "godaddysites.com",
+    "square.site", "wordpress.com", "blogspot.com", "webflow.io", "webs.com",
+    "site123.me", "jimdosite.com", "myshopify.com", "carrd.co", "netlify.app",
+}
+
+AGGREGATOR_DOMAINS = {
+    # Directories and lead marketplaces
+    "yelp.com", "angi.com", "angieslist.com", "homeadvisor.com", "thumbtack.com",
+    "bbb.org", "yellowpages.com", "superpages.com", "manta.com", "mapquest.com",
+    "chamberofcommerce.com", "expertise.com", "threebestrated.com", "bizapedia.com",
+    "buildzoom.com", "networx.com", "porch.com", "houzz.com", "nextdoor.com",
+    "birdeye.com", "nicelocal.com", "hvac.com", "servicedirect.com", "local.com",
+    "citysearch.com", "merchantcircle.com", "brownbook.net",
+    "dexknows.com", "bestprosintown.com", "todayshomeowner.com", "fixr.com",
+    "modernize.com", "forbes.com", "consumeraffairs.com",
+    # Manufacturer dealer locators
+    "carrier.com", "trane.com", "lennox.com", "rheem.com", "goodmanmfg.com", "amana-hac.com",
+    # Search, maps and social
+    "google.com", "goo.gl", "bing.com", "facebook.com", "instagram.com",
+    "linkedin.com", "twitter.com", "x.com", "youtube.com", "tiktok.com",
+    "pinterest.com", "reddit.com", "wikipedia.org", "apple.com",
+}
+AGGREGATOR_DOMAINS |= {
+    d.strip().lower() for d in os.getenv("HVAC_AGGREGATOR_DOMAINS", "").split(",") if d.strip()
+}
+
+
+def host_of(website):
+    """Lower-cased host of a URL or bare host, without port or trailing dot"""
+    if not website:
+        return None
+    website = website.strip()
+    if "://" not in website:
+        website = f"http://{website}"
+    try:
+        host = urlsplit(website).hostname
+    except ValueError:
+        return None
+    if not host:
+        return None
+    host = host.rstrip(".").lower()
+    try:
+        host = host.encode("idna").decode("ascii")
+    except UnicodeError:
+        pass
+    return host
+
+
+def registrable_domain(website):
+    """The domain a business registers, e.g. www.shop.acme.co.uk -> acme.co.uk"""
+    host = host_of(website)
+    if not host or "." not in host:
+        return None
+    labels = host.split(".")
+    if all(label.isdigit() for label in labels):
+        return None  # bare IP address
+    suffix = ".".join(labels[-2:])
+    if suffix in HOSTING_SUFFIXES and len(labels) >= 3 and labels[-3] != "www":
+        return ".".join(labels[-3:])
+    if len(labels) >= 3 and suffix in MULTI_LABEL_SUFFIXES:
+        return ".".join(labels[-3:])
+    return ".".join(labels[-2:])
+
+
+def is_platform(domain):
+    """True for a website builder's own domain (wixsite.com), which many companies share"""
+    return domain in HOSTING_SUFFIXES
+
+
+def is_hosted(domain):
+    """True for a company subdomain on a website builder (joeshvac.wixsite.com); it receives no mail"""
+    return bool(domain) and domain.count(".") >= 2 and domain.split(".", 1)[1] in HOSTING_SUFFIXES
+
+
+def is_aggregator(domain):
+    """True for directory/review/social sites that are not a company's own"""
+    return bool(domain) and registrable_domain(domain) in AGGREGATOR_DOMAINS
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Export sinks for the final HVAC records
+Inputs: .tmp/hvac_final.jsonl
+Outputs: any of
+    sheet     the Google Sheet (hvac_to_google_sheet.py)
+    csv       .tmp/hvac_companies.csv
+    jsonl.gz  .tmp/hvac_companies.jsonl.gz
+    parquet   .tmp/hvac_companies.parquet (needs pyarrow)
+
+File sinks stream records as they arrive and share one typed column set
+(EXPORT_COLUMNS): `confidence_score` is an integer, `services` a list and
+so on, so analysis can read just the columns it needs. Each file is
+written next to its final path and renamed into place only when the
+export succeeds, so a failed run never leaves a partial file behind.
+
+Usage:
+    python execution/hvac_export.py --sink csv --sink parquet
+    HVAC_EXPORT_SINKS=sheet,parquet python execution/run_hvac_pipeline.py
+"""
+
+import os
+import re
+import csv
+import sys
+import gzip
+import json
+import logging
+import argparse
+from dotenv import load_dotenv
+from hvac_records import read_companies, exists, StreamError
+from hvac_dedup import company_id
+
+# Setup
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+load_dotenv(os.path.join(BASE_DIR, ".env"))
+TMP_DIR = os.path.join(BASE_DIR, ".tmp")
+os.makedirs(TMP_DIR, exist_ok=True)
+
+# Logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s",
+    handlers=[
+        logging.FileHandler(os.path.join(TMP_DIR, "hvac_export.log")),
+        logging.StreamHandler(sys.stdout)
+    ]
+)
+logger = logging.getLogger(__name__)
+
+INPUT_FILE = os.path.join(TMP_DIR, "hvac_final.jsonl")
+DEFAULT_SINKS = [s.strip() for s in os.getenv("HVAC_EXPORT_SINKS", "sheet").split(",") if s.strip()]
+PARQUET_ROW_GROUP = 50000
+
+# (field, type) for the file sinks; types are str, int, float and list (of str)
+EXPORT_COLUMNS = [
+    ("company_id", "str"),
+    ("name", "str"),
+    ("contact_name", "str"),
+    ("verified_email", "str"),
+    ("email_status", "str"),
+    ("confidence_score", "int"),
+    ("verification_method", "str"),
+    ("phone", "str"),
+    ("address", "str"),
+    ("city", "str"),
+    ("state", "str"),
+    ("website", "str"),
+    ("email_domain", "str"),
+    ("aggregator", "str"),
+    ("services", "list"),
+    ("company_size", "str"),
+    ("years_in_business", "int"),
+    ("rating", "float"),
+    ("review_count", "int"),
+    ("source", "str"),
+    ("crawl_status", "str"),
+]
+
+
+def coerce(value, kind):
+    """Value as the column type, or None when missing/unparseable ("Unknown" years etc.)"""
+    if value is None or value == "":
+        return [] if kind == "list" else None
+    if kind == "list":
+        return [str(v) for v in value] if isinstance(value, (list, tuple)) else [str(value)]
+    if kind == "int":
+        if isinstance(value, (int, float)):
+            return int(value)
+        match = re.search(r"\d[\d,]*", str(value))
+        return int(match.group().replace(",", "")) if match else None
+    if kind == "float":
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return None
+    return str(value)
+
+
+def export_row(company):
+    """The company's EXPORT_COLUMNS values, typed"""
+    row = {field: coerce(company.get(field), kind) for field, kind in EXPORT_COLUMNS}
+    row["company_id"] = row["company_id"] or company_id(company)
+    return row
+
+
+class FileSink:
+    """Streams rows to `<path>.part`, renamed to `path` when closed successfully"""
+
+    def __init__(self, path):
+        self.path = path
+        self.tmp_path = f"{path}.part"
+        self.count = 0
+
+    def write(self, company):
+        self._write(export_row(company))
+        self.count += 1
+
+    def close(self, ok=True):
+        self._close()
+        if ok:
+            os.replace(self.tmp_path, self.path)
+            logger.info(f"✓ Wrote {self.count} companies to {self.path} "
+                        f"({os.path.getsize(self.path) / 1024:.0f} KB)")
+        elif os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+        return ok
+
+
+class CsvSink(FileSink):
+    extension = "csv"
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.file = open(self.tmp_path, "w", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow([field for field, _ in EXPORT_COLUMNS])
+
+    def _write(self, row):
+        self.writer.writerow([
+            ", ".join(value) if kind == "list" else ("" if value is None else value)
+            for (_, kind), value in zip(EXPORT_COLUMNS, row.values())
+        ])
+
+    def _close(self):
+        self.file.close()
+
+
+class JsonlGzSink(FileSink):
+    extension = "jsonl.gz"
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.file = gzip.open(self.tmp_path, "wt", encoding="utf-8", compresslevel=6)
+
+    def _write(self, row):
+        self.file.write(json.dumps(row, separators=(",", ":")) + "\n")
+
+    def _close(self):
+        self.file.close()
+
+
+class ParquetSink(FileSink):
+    """Typed columns, zstd-compressed, written one row group at a time"""
+    extension = "parquet"
+
+    def __init__(self, path):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet export needs pyarrow: pip install pyarrow")
+        super().__init__(path)
+        self.pa = pa
+        types = {"str": pa.string(), "int": pa.int64(), "float": pa.float64(), "list": pa.list_(pa.string())}
+        self.schema = pa.schema([(field, types[kind]) for field, kind in EXPORT_COLUMNS])
+        self.writer = pq.ParquetWriter(self.tmp_path, self.schema, compression="zstd")
+        self.columns = {field: [] for field, _ in EXPORT_COLUMNS}
+
+    def _write(self, row):
+        for field, value in row.items():
+            self.columns[field].append(value)
+        if len(self.columns["company_id"]) >= PARQUET_ROW_GROUP:
+            self._flush()
+
+    def _flush(self):
+        if self.columns["company_id"]:
+            self.writer.write_table(self.pa.Table.from_pydict(self.columns, schema=self.schema))
+            self.columns = {field: [] for field in self.columns}
+
+    def _close(self):
+        self._flush()
+        self.writer.close()
+
+
+class SheetSink:
+    """Collects every record, then syncs the Google Sheet in one go"""
+
+    def __init__(self):
+        # The Google client import overlaps with upstream work instead of delaying the export
+        import hvac_to_google_sheet
+        self.sheet = hvac_to_google_sheet
+        self.companies = []
+
+    @property
+    def count(self):
+        return len(self.companies)
+
+    def write(self, company):
+        self.companies.append(company)
+
+    def close(self, ok=True):
+        if not ok:
+            return False
+        return self.sheet.publish(self.sheet.prepare_sheet_data(self.companies))
+
+
+FILE_SINKS = {sink.extension: sink for sink in (CsvSink, JsonlGzSink, ParquetSink)}
+SINK_NAMES = ["sheet"] + list(FILE_SINKS)
+
+
+def sink_path(name, out_dir=TMP_DIR):
+    return os.path.join(out_dir, f"hvac_companies.{name}")
+
+
+def file_outputs(names=None):
+    """Paths the named (default) sinks write; the sheet has none"""
+    return [sink_path(name) for name in names or DEFAULT_SINKS if name in FILE_SINKS]
+
+
+def open_sinks(names, out_dir=TMP_DIR):
+    """Open the named sinks; an unknown name or missing dependency raises before any output"""
+    sinks = []
+    try:
+        for name in names:
+            if name == "sheet":
+                sinks.append(SheetSink())
+            elif name in FILE_SINKS:
+                sinks.append(FILE_SINKS[name](sink_path(name, out_dir)))
+            else:
+                raise ValueError(f"Unknown export sink {name!r} (choose from {', '.join(SINK_NAMES)})")
+    except Exception:
+        close_sinks(sinks, ok=False)
+        raise
+    return sinks
+
+
+def close_sinks(sinks, ok=True):
+    """Close every sink; True only if all of them succeeded"""
+    success = ok
+    for sink in sinks:
+        try:
+            success = sink.close(ok) and success
+        except Exception as e:
+            logger.error(f"✗ {type(sink).__name__} failed: {e}")
+            success = False
+    return success
+
+
+def hvac_export(sink_names=None, follow=False):
+    """Export the final records to every requested sink"""
+    sink_names = sink_names or DEFAULT_SINKS
+
+    if not follow and not exists(INPUT_FILE):
+        logger.error(f"Input file not found: {INPUT_FILE}")
+        return False
+
+    try:
+        sinks = open_sinks(sink_names)
+    except (RuntimeError, ValueError) as e:
+        logger.error(f"✗ {e}")
+        return False
+
+    logger.info(f"Exporting to: {', '.join(sink_names)}")
+    ok = False
+    try:
+        for company in read_companies(INPUT_FILE, follow=follow):
+            for sink in sinks:
+                sink.write(company)
+        ok = True
+    except (OSError, ValueError, StreamError) as e:
+        logger.error(f"Error loading input file: {e}")
+
+    success = close_sinks(sinks, ok)
+    if success:
+        logger.info(f"✓ Export complete: {sinks[0].count if sinks else 0} companies")
+    else:
+        logger.error("✗ Export failed")
+    return success
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export personalized HVAC companies.")
+    parser.add_argument("--sink", action="append", choices=SINK_NAMES,
+                        help="Destination; repeat for several (default: HVAC_EXPORT_SINKS or sheet).")
+    parser.add_argument("--follow", action="store_true", help="Stream from a personalize phase that is still running.")
+    args = parser.parse_args()
+
+    success = hvac_export(args.sink, follow=args.follow)
+    sys.exit(0 if success else 1)
@@ -0,0 +1,105 @@
+"""
+Build-system style bookkeeping for the HVAC pipeline phases.
+
+After a phase succeeds, its key is recorded in .tmp/hvac_pipeline_state.json.
+The key is a hash of the phase's code, the env settings it reads and the
+contents of its input file. The digest of the output it produced is
+recorded too. On the next run a phase whose key is unchanged, and whose
+output is still on disk untouched, can be skipped.
+"""
+
+import os
+import json
+import hashlib
+from hvac_records import marker_status
+
+EXECUTION_DIR = os.path.dirname(os.path.abspath(__file__))
+BASE_DIR = os.path.dirname(EXECUTION_DIR)
+STATE_FILE = os.path.join(BASE_DIR, ".tmp", "hvac_pipeline_state.json")
+
+# Shared modules whose changes invalidate every phase
+COMMON_CODE = ["hvac_records.py"]
+
+
+def file_digest(path, chunk_size=1024 * 1024):
+    """SHA-256 of a file's contents, or None if it does not exist"""
+    if not path or not os.path.exists(path):
+        return None
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def phase_key(phase):
+    """
+    Hash of everything a phase's result depends on: its script, the shared
+    modules, the env settings it reads and its input file.
+    """
+    parts = {
+        "code": {name: file_digest(os.path.join(EXECUTION_DIR, name))
+                 for name in [phase["script"]] + COMMON_CODE + phase.get("code", [])},
+        "env": {name: os.getenv(name) for name in phase.get("env", [])},
+        "input": file_digest(phase.get("input")),
+    }
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode()).hexdigest()
+
+
+def _output_ok(path):
+    """The output exists and its writer finished cleanly"""
+    return marker_status(path) == "ok"
+
+
+def _files(phase):
+    """Further outputs without a done marker (the export's file sinks)"""
+    return phase["files"]() if "files" in phase else []
+
+
+class PhaseCache:
+    def __init__(self, path=STATE_FILE):
+        self.path = path
+        try:
+            with open(path, "r") as f:
+                self.state = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self.state = {}
+
+    def is_fresh(self, phase):
+        """True if the phase's key and outputs all match the last successful run"""
+        entry = self.state.get(phase["name"])
+        if not entry or entry.get("key") != phase_key(phase):
+            return False
+        output = phase.get("output")
+        if output is not None and not (_output_ok(output) and file_digest(output) == entry.get("output")):
+            return False
+        recorded = entry.get("files", {})
+        return all(path in recorded and file_digest(path) == recorded[path] for path in _files(phase))
+
+    def record(self, phase):
+        """
+        Remember a successful run. A phase whose `complete` check fails
+        (e.g. a scrape where some cities errored) is left stale instead, so
+        the next run picks it up again. Returns whether it was recorded.
+        """
+        if "complete" in phase and not phase["complete"]():
+            self.forget(phase)
+            return False
+        self.state[phase["name"]] = {
+            "key": phase_key(phase),
+            "output": file_digest(phase.get("output")),
+            "files": {path: file_digest(path) for path in _files(phase)},
+        }
+        self.save()
+        return True
+
+    def forget(self, phase):
+        if self.state.pop(phase["name"], None) is not None:
+            self.save()
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_file = f"{self.path}.part"
+        with open(tmp_file, "w") as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp_file, self.path)
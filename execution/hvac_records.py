@@ -0,0 +1,369 @@
+"""
+Line-delimited (JSONL) record streams shared by the HVAC pipeline phases.
+
+Each phase reads the previous phase's file as a generator and writes its
+own output one record per line, so memory stays flat regardless of how
+many companies flow through. The `<file>.done` marker holds the
+writer's state ("running", "ok" or "failed") and a run token identifying
+the file it belongs to; readers started with follow=True tail a file that
+is still being written and stop at its marker, which lets the next phase
+start on the first records instead of waiting for the whole file.
+
+A writer swaps a fresh empty file into place before touching the marker,
+so a follower never sees a half-truncated file, and the token keeps it
+from taking the previous run's "ok" as the end of the new one.
+
+Records are Company objects in memory (see below) and plain JSON objects
+on disk.
+"""
+
+import os
+import sys
+import json
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+def follow_idle_timeout():
+    """
+    Seconds a follower waits without new data before giving up on the writer.
+    Read per call: the phase scripts import this module before loading .env.
+    """
+    return float(os.getenv("HVAC_FOLLOW_IDLE_TIMEOUT", "600"))
+
+
+class StreamError(Exception):
+    """The upstream writer failed or stalled"""
+
+
+class _Restarted(Exception):
+    """The file being followed was replaced by a new writer"""
+
+
+class Company:
+    """
+    One HVAC company as it moves through scrape, verify, personalize and export.
+
+    Known fields are __slots__, so a record carries no per-instance dict and
+    unset fields cost nothing. Enum-like values (state, source, statuses, ...)
+    and service names are interned, so a large batch shares one copy of each.
+    Fields that only restate others (the email_field_* merge fields,
+    company_id) are derived when read instead of stored.
+
+    Phase code treats records as dicts: get(), [] and `in` work as before,
+    and keys outside FIELDS are kept in `extra`.
+    """
+
+    FIELDS = (
+        # scrape
+        "name", "address", "city", "state", "phone", "website", "email",
+        "rating", "review_count", "source",
+        # verify
+        "verified_email", "confidence_score", "email_status", "verification_method",
+        "email_domain", "aggregator",
+        # personalize
+        "contact_name", "services", "company_size", "years_in_business",
+        "website_title", "site_emails", "site_phones", "crawl_status",
+    )
+    INTERNED = frozenset({
+        "city", "state", "source", "email_status", "verification_method",
+        "aggregator", "company_size", "years_in_business", "crawl_status",
+    })
+    __slots__ = FIELDS + ("extra",)
+
+    def __init__(self, **fields):
+        for key, value in fields.items():
+            self[key] = value
+
+    @classmethod
+    def from_dict(cls, record):
+        """
+        Company from a stored record. Records written before these fields
+        were derived still carry them (email_field_company, ...); they are
+        dropped and recomputed from the stored fields when read.
+        """
+        if isinstance(record, cls):
+            return record
+        return cls(**{key: value for key, value in record.items() if key not in cls.DERIVED})
+
+    # Derived fields
+
+    @property
+    def company_id(self):
+        from hvac_dedup import company_id
+        return company_id(self)
+
+    @property
+    def email_field_company(self):
+        return self.get("name", "Company")
+
+    @property
+    def email_field_contact(self):
+        return self.get("contact_name", "Contact")
+
+    @property
+    def email_field_services(self):
+        return ", ".join(self.get("services", ["HVAC Services"]))
+
+    DERIVED = ("company_id", "email_field_company", "email_field_contact", "email_field_services")
+
+    # Dict-style access
+
+    def __setitem__(self, key, value):
+        if key in self.DERIVED:
+            raise KeyError(f"{key} is derived from other fields")
+        if isinstance(value, str) and key in self.INTERNED:
+            value = sys.intern(value)
+        elif key == "services" and isinstance(value, (list, tuple)):
+            value = tuple(sys.intern(v) if isinstance(v, str) else v for v in value)
+        if key in self.FIELDS:
+            setattr(self, key, value)
+        else:
+            if not hasattr(self, "extra"):
+                self.extra = {}
+            self.extra[key] = value
+
+    def __getitem__(self, key):
+        if key in self.FIELDS or key in self.DERIVED:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        try:
+            return self.extra[key]
+        except (AttributeError, KeyError):
+            raise KeyError(key) from None
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        try:
+            self[key]
+            return True
+        except KeyError:
+            return False
+
+    def to_dict(self):
+        """The stored fields as a JSON-ready dict (derived fields are left out)"""
+        record = {}
+        for key in self.FIELDS:
+            try:
+                value = getattr(self, key)
+            except AttributeError:
+                continue
+            record[key] = list(value) if isinstance(value, tuple) else value
+        record.update(getattr(self, "extra", {}))
+        return record
+
+    def __eq__(self, other):
+        if isinstance(other, (Company, dict)):
+            return self.to_dict() == (other.to_dict() if isinstance(other, Company) else other)
+        return NotImplemented
+
+    def __repr__(self):
+        return f"Company({self.get('name')!r}, {self.get('city')!r})"
+
+
+def marker_path(path):
+    return f"{path}.done"
+
+
+def legacy_path(path):
+    """The pretty-printed .json file older pipeline runs produced"""
+    return path[:-len(".jsonl")] + ".json" if path.endswith(".jsonl") else None
+
+
+def exists(path):
+    legacy = legacy_path(path)
+    return os.path.exists(path) or bool(legacy and os.path.exists(legacy))
+
+
+def read_companies(path, follow=False, **kwargs):
+    """read_records, yielding Company objects"""
+    for record in read_records(path, follow, **kwargs):
+        yield Company.from_dict(record)
+
+
+def read_records(path, follow=False, idle_timeout=None, poll=0.2):
+    """
+    Yield records from a JSONL file.
+    Falls back to a legacy JSON array file when only that exists.
+    With follow=True, keeps reading until the writer's done marker appears;
+    idle_timeout defaults to HVAC_FOLLOW_IDLE_TIMEOUT.
+    """
+    if idle_timeout is None:
+        idle_timeout = follow_idle_timeout()
+    legacy = legacy_path(path)
+    if not os.path.exists(path) and legacy and os.path.exists(legacy) and not follow:
+        with open(legacy, "r") as f:
+            yield from json.load(f)
+        return
+
+    if follow:
+        waited = 0.0
+        while not os.path.exists(path):
+            if waited >= idle_timeout:
+                raise StreamError(f"{path} was never created")
+            time.sleep(poll)
+            waited += poll
+
+    yielded = False
+    while True:
+        try:
+            for record in _read_run(path, follow, idle_timeout, poll):
+                yielded = True
+                yield record
+            return
+        except _Restarted:
+            if yielded:
+                raise StreamError(f"{path} was restarted by a new run while being read")
+
+
+def _read_run(path, follow, idle_timeout, poll):
+    with open(path, "r") as f:
+        token = run_token(f.fileno())
+        pending = ""
+        idle = 0.0
+        while True:
+            line = f.readline()
+            if line:
+                idle = 0.0
+                pending += line
+                if not pending.endswith("\n"):
+                    continue  # partial line from a writer mid-flush
+                if pending.strip():
+                    yield json.loads(pending)
+                pending = ""
+                continue
+
+            if not follow:
+                if pending.strip():
+                    yield json.loads(pending)
+                return
+
+            status, marker_token = _read_marker(path)
+            if marker_token not in (None, token):
+                # The marker belongs to another run: an earlier one (the
+                # writer has not claimed this file yet) or a newer one that
+                # replaced it
+                if _path_token(path) not in (None, token):
+                    raise _Restarted()
+                status = None
+            if status not in (None, "running"):
+                # Drain anything written between the last read and the marker
+                rest = pending + f.read()
+                for rest_line in rest.splitlines():
+                    if rest_line.strip():
+                        yield json.loads(rest_line)
+                if status != "ok":
+                    raise StreamError(f"Upstream writer of {path} failed")
+                return
+
+            if idle >= idle_timeout:
+                raise StreamError(f"No new records in {path} for {idle_timeout:.0f}s")
+            time.sleep(poll)
+            idle += poll
+
+
+def run_token(fd):
+    """Identifies one run's output file (it is a new inode for every run)"""
+    stat = os.fstat(fd)
+    return f"{stat.st_dev}:{stat.st_ino}"
+
+
+def _path_token(path):
+    try:
+        with open(path, "r") as f:
+            return run_token(f.fileno())
+    except FileNotFoundError:
+        return None
+
+
+def _read_marker(path):
+    """(status, run token) from the done marker; markers from older runs carry no token"""
+    try:
+        with open(marker_path(path), "r") as f:
+            status, _, token = f.read().strip().partition(" ")
+    except FileNotFoundError:
+        return None, None
+    return status, token or None
+
+
+def marker_status(path):
+    """'running', 'ok', 'failed', or None if the file has no marker"""
+    return _read_marker(path)[0]
+
+
+def _write_marker(path, status, token):
+    tmp_path = f"{marker_path(path)}.part"
+    with open(tmp_path, "w") as f:
+        f.write(f"{status} {token}")
+    os.replace(tmp_path, marker_path(path))
+
+
+class RecordWriter:
+    """
+    Context manager writing one JSON record per line.
+
+        with RecordWriter(OUTPUT_FILE) as out:
+            for record in records:
+                out.write(record)
+    """
+
+    def __init__(self, path, flush_every=50):
+        self.path = path
+        self.flush_every = flush_every
+        self.count = 0
+        self.file = None
+
+    def __enter__(self):
+        # A new inode replaces the old file in one step; followers of the
+        # old file see the marker token change and restart on this one
+        tmp_path = f"{self.path}.part"
+        self.file = open(tmp_path, "w")
+        self.token = run_token(self.file.fileno())
+        os.replace(tmp_path, self.path)
+        _write_marker(self.path, "running", self.token)
+        return self
+
+    def write(self, record):
+        if isinstance(record, Company):
+            record = record.to_dict()
+        self.file.write(json.dumps(record) + "\n")
+        self.count += 1
+        if self.count % self.flush_every == 0:
+            self.file.flush()
+
+    def flush(self):
+        """Make everything written so far visible to followers"""
+        self.file.flush()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.file.close()
+        _write_marker(self.path, "ok" if exc_type is None else "failed", self.token)
+        return False
+
+
+def parallel_map(func, records, workers=1, window=None):
+    """
+    Ordered map over a record stream on a thread pool, for I/O-bound
+    phases. At most `window` records are in flight, so memory stays flat.
+    """
+    if workers <= 1:
+        for record in records:
+            yield func(record)
+        return
+    window = window or workers * 4
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for record in records:
+            pending.append(pool.submit(func, record))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
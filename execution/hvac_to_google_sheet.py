@@ -1,16 +1,21 @@
 #!/usr/bin/env python3
 """
 Export HVAC company data to Google Sheet
-Inputs: .tmp/hvac_final.json
+Inputs: .tmp/hvac_final.jsonl
 Outputs: Google Sheet URL
 """
 
 import os
-import json
+import time
 import logging
 import sys
+import argparse
 from pathlib import Path
 from dotenv import load_dotenv
+from hvac_records import read_companies, exists, StreamError
+from hvac_dedup import company_id
+from sheets_sync import (FakeSheetsService, UploadProgress, apply_diff, diff_rows,
+                         ensure_grid, row_chunks, upload_key, upload_rows)
 from google.oauth2.service_account import Credentials
 from google.auth.transport.requests import Request
 from googleapiclient.discovery import build
@@ -33,12 +38,17 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-INPUT_FILE = os.path.join(TMP_DIR, "hvac_final.json")
+INPUT_FILE = os.path.join(TMP_DIR, "hvac_final.jsonl")
+UPLOAD_STATE_FILE = os.path.join(TMP_DIR, "sheet_upload_state.json")
 SCOPES = ['https://www.googleapis.com/auth/spreadsheets']
+SHEET_NAME = "Sheet1"
+SHEET_GRID_ID = 0
+# Rows are matched on this column ("Company ID") when syncing an existing sheet
+ID_COLUMN = 11
 
 
 def prepare_sheet_data(companies):
-    """Convert company data to sheet format"""
+    """Convert company data (any iterable of records) to sheet format"""
     rows = []
     
     # Header row
@@ -53,12 +63,19 @@ def prepare_sheet_data(companies):
         "Services",
         "Company Size",
         "Confidence Score",
-        "Notes"
+        "Notes",
+        "Company ID"
     ]
     rows.append(headers)
     
     # Data rows
+    id_counts = {}
     for company in companies:
+        row_id = company.get("company_id") or company_id(company)
+        # IDs must be unique for the sheet sync to match rows
+        id_counts[row_id] = id_counts.get(row_id, 0) + 1
+        if id_counts[row_id] > 1:
+            row_id = f"{row_id}-{id_counts[row_id]}"
         row = [
             company.get("name", ""),
             company.get("contact_name", ""),
@@ -70,92 +87,162 @@ def prepare_sheet_data(companies):
             ", ".join(company.get("services", [])),
             company.get("company_size", ""),
             str(company.get("confidence_score", "")),
-            company.get("verification_method", "")
+            company.get("verification_method", ""),
+            row_id
         ]
         rows.append(row)
     
     return rows
 
 
-def create_google_sheet(sheet_data):
-    """Update existing Google Sheet with data"""
-    try:
-        # Load credentials
-        creds_file = os.getenv("GOOGLE_SHEETS_CREDENTIALS")
-        sheet_id = os.getenv("GOOGLE_SHEETS_ID")
-        
-        if not creds_file or not os.path.exists(creds_file):
-            logger.error(f"Credentials file not found: {creds_file}")
-            return None
-        
-        if not sheet_id:
-            logger.error("GOOGLE_SHEETS_ID not set in .env")
-            return None
-        
-        # Authenticate
-        credentials = Credentials.from_service_account_file(creds_file, scopes=SCOPES)
-        service = build('sheets', 'v4', credentials=credentials)
-        
-        logger.info(f"Updating existing Google Sheet: {sheet_id}")
-        
-        # Prepare data for upload
-        values = sheet_data
-        
+def get_service():
+    """
+    Factory for Sheets clients (one per upload worker) and the spreadsheet
+    ID, or (None, None) if not configured
+    """
+    fake_file = os.getenv("GOOGLE_SHEETS_FAKE")
+    if fake_file:
+        logger.info(f"Using fake Sheets service backed by {fake_file}")
+        fake = FakeSheetsService(fake_file)
+        return (lambda: fake), os.getenv("GOOGLE_SHEETS_ID", "fake")
+    
+    creds_file = os.getenv("GOOGLE_SHEETS_CREDENTIALS")
+    sheet_id = os.getenv("GOOGLE_SHEETS_ID")
+    
+    if not creds_file or not os.path.exists(creds_file):
+        logger.error(f"Credentials file not found: {creds_file}")
+        return None, None
+    
+    if not sheet_id:
+        logger.error("GOOGLE_SHEETS_ID not set in .env")
+        return None, None
+    
+    credentials = Credentials.from_service_account_file(creds_file, scopes=SCOPES)
+    return (lambda: build('sheets', 'v4', credentials=credentials)), sheet_id
+
+
+def progress_logger(total, already=0):
+    """on_chunk callback that logs rows uploaded so far"""
+    start = time.perf_counter()
+    written = [already]
+    
+    def on_chunk(offset, count):
+        written[0] += count
+        elapsed = max(time.perf_counter() - start, 1e-6)
+        logger.info(f"  Uploaded {written[0]}/{total} rows "
+                    f"({100 * written[0] // max(total, 1)}%, {(written[0] - already) / elapsed:.0f} rows/s)")
+    
+    return on_chunk
+
+
+def rewrite_sheet(make_service, sheet_id, sheet_data):
+    """
+    Clear the sheet, write every row in parallel chunks and format the header.
+    An interrupted rewrite of the same data resumes from the chunks already written.
+    """
+    service = make_service()
+    progress = UploadProgress(UPLOAD_STATE_FILE, upload_key(sheet_id, sheet_data))
+    
+    if progress.done:
+        logger.info(f"Resuming upload: {len(progress.done)} chunks already written")
+    else:
         # Clear existing data first
         logger.info("Clearing existing data...")
         service.spreadsheets().values().clear(
             spreadsheetId=sheet_id,
-            range='Sheet1'
+            range=SHEET_NAME
         ).execute()
-        
-        # Update sheet with data
-        logger.info("Populating sheet with data...")
-        body = {
-            'values': values
-        }
-        
-        result = service.spreadsheets().values().update(
-            spreadsheetId=sheet_id,
-            range='Sheet1',
-            valueInputOption='RAW',
-            body=body
-        ).execute()
-        
-        logger.info(f"✓ Updated {result.get('updatedCells')} cells")
-        
-        # Format header row
-        logger.info("Formatting header...")
-        requests = [
-            {
-                'repeatCell': {
-                    'range': {
-                        'sheetId': 0,
-                        'startRowIndex': 0,
-                        'endRowIndex': 1
-                    },
-                    'cell': {
-                        'userEnteredFormat': {
-                            'textFormat': {
-                                'bold': True
-                            },
-                            'backgroundColor': {
-                                'red': 0.8,
-                                'green': 0.8,
-                                'blue': 0.8
-                            }
+    
+    # Update sheet with data
+    logger.info(f"Populating sheet with {len(sheet_data)} rows...")
+    ensure_grid(service, sheet_id, SHEET_NAME, len(sheet_data), len(sheet_data[0]))
+    
+    already = sum(len(piece) for offset, piece in row_chunks(sheet_data) if offset in progress.done)
+    log_progress = progress_logger(len(sheet_data), already)
+    
+    def on_chunk(offset, count):
+        progress.mark(offset)
+        log_progress(offset, count)
+    
+    chunks = upload_rows(make_service, sheet_id, sheet_data, SHEET_NAME,
+                         done=progress.done, on_chunk=on_chunk)
+    
+    logger.info(f"✓ Wrote {len(sheet_data)} rows in {chunks} requests")
+    
+    # Format header row
+    logger.info("Formatting header...")
+    requests = [
+        {
+            'repeatCell': {
+                'range': {
+                    'sheetId': SHEET_GRID_ID,
+                    'startRowIndex': 0,
+                    'endRowIndex': 1
+                },
+                'cell': {
+                    'userEnteredFormat': {
+                        'textFormat': {
+                            'bold': True
+                        },
+                        'backgroundColor': {
+                            'red': 0.8,
+                            'green': 0.8,
+                            'blue': 0.8
                         }
-                    },
-                    'fields': 'userEnteredFormat'
-                }
+                    }
+                },
+                'fields': 'userEnteredFormat'
             }
-        ]
+        }
+    ]
+    
+    service.spreadsheets().batchUpdate(
+        spreadsheetId=sheet_id,
+        body={'requests': requests}
+    ).execute()
+    
+    logger.info("✓ Formatted header row")
+    progress.clear()
+
+
+def sync_sheet(make_service, sheet_id, sheet_data):
+    """
+    Read the sheet once and send only changed, new and removed rows.
+    Falls back to a full rewrite when the sheet is empty or its header differs.
+    """
+    current = make_service().spreadsheets().values().get(
+        spreadsheetId=sheet_id,
+        range=SHEET_NAME
+    ).execute().get('values', [])
+    
+    diff = diff_rows(current, sheet_data, ID_COLUMN)
+    if diff is None:
+        logger.info("Sheet is empty or its columns changed; rewriting it in full")
+        rewrite_sheet(make_service, sheet_id, sheet_data)
+        return
+    
+    logger.info(f"Sheet diff: {diff.summary()}")
+    if diff.is_empty():
+        logger.info("✓ Sheet already up to date")
+        return
+    calls = apply_diff(make_service, sheet_id, diff, SHEET_NAME,
+                       on_chunk=progress_logger(len(diff.appends)))
+    logger.info(f"✓ Synced sheet in {calls} API calls")
+
+
+def create_google_sheet(sheet_data, full=False):
+    """Update existing Google Sheet with data (only the differences unless `full`)"""
+    try:
+        make_service, sheet_id = get_service()
+        if make_service is None:
+            return None
         
-        service.spreadsheets().batchUpdate(
-            spreadsheetId=sheet_id,
-            body={'requests': requests}
-        ).execute()
+        logger.info(f"Updating existing Google Sheet: {sheet_id}")
         
-        logger.info("✓ Formatted header row")
+        if full:
+            rewrite_sheet(make_service, sheet_id, sheet_data)
+        else:
+            sync_sheet(make_service, sheet_id, sheet_data)
         
         # Generate share URL
         sheet_url = f"https://docs.google.com/spreadsheets/d/{sheet_id}/edit"
@@ -171,28 +258,31 @@ def create_google_sheet(sheet_data):
         return None
 
 
-def hvac_to_google_sheet():
+def hvac_to_google_sheet(follow=False, full=False):
     """Export to Google Sheet"""
     
     # Load final data
-    if not os.path.exists(INPUT_FILE):
+    if not follow and not exists(INPUT_FILE):
         logger.error(f"Input file not found: {INPUT_FILE}")
         return False
     
+    # Prepare data
+    logger.info("Formatting data for Google Sheet...")
     try:
-        with open(INPUT_FILE, "r") as f:
-            companies = json.load(f)
-        logger.info(f"Loaded {len(companies)} companies for sheet export")
-    except Exception as e:
+        sheet_data = prepare_sheet_data(read_companies(INPUT_FILE, follow=follow))
+    except (OSError, ValueError, StreamError) as e:
         logger.error(f"Error loading input file: {e}")
         return False
+    logger.info(f"Loaded {len(sheet_data) - 1} companies for sheet export")
     
-    # Prepare data
-    logger.info("Formatting data for Google Sheet...")
-    sheet_data = prepare_sheet_data(companies)
+    return publish(sheet_data, full)
+
+
+def publish(sheet_data, full=False):
+    """Upload prepared rows and record the sheet URL; returns success"""
     
     # Create sheet
-    sheet_url = create_google_sheet(sheet_data)
+    sheet_url = create_google_sheet(sheet_data, full)
     
     if sheet_url:
         # Save URL to file for reference
@@ -212,5 +302,10 @@ def hvac_to_google_sheet():
 
 
 if __name__ == "__main__":
-    success = hvac_to_google_sheet()
+    parser = argparse.ArgumentParser(description="Export personalized HVAC companies to Google Sheets.")
+    parser.add_argument("--follow", action="store_true", help="Stream from a personalize phase that is still running.")
+    parser.add_argument("--full", action="store_true", help="Clear and rewrite the whole sheet instead of syncing changes.")
+    args = parser.parse_args()
+
+    success = hvac_to_google_sheet(follow=args.follow, full=args.full)
     sys.exit(0 if success else 1)
@@ -1,16 +1,21 @@
 #!/usr/bin/env python3
 """
 Personalize HVAC company data
-Inputs: .tmp/hvac_verified.json
-Outputs: .tmp/hvac_final.json with enriched data
+Inputs: .tmp/hvac_verified.jsonl
+Outputs: .tmp/hvac_final.jsonl with enriched data (streamed, one record per line)
 """
 
 import os
-import json
 import logging
 import sys
+import argparse
+import threading
+from datetime import date
+from functools import partial
 from pathlib import Path
 from dotenv import load_dotenv
+from hvac_records import RecordWriter, read_companies, exists, StreamError, parallel_map
+from website_crawler import Crawler, CONCURRENCY
 
 # Setup
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -29,77 +34,121 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-INPUT_FILE = os.path.join(TMP_DIR, "hvac_verified.json")
-OUTPUT_FILE = os.path.join(TMP_DIR, "hvac_final.json")
+INPUT_FILE = os.path.join(TMP_DIR, "hvac_verified.jsonl")
+OUTPUT_FILE = os.path.join(TMP_DIR, "hvac_final.jsonl")
+# Set HVAC_CRAWL=0 to skip website crawling and keep the placeholder fields
+CRAWL_ENABLED = os.getenv("HVAC_CRAWL", "1") != "0"
 
+_crawler = None
+_crawler_lock = threading.Lock()
 
-def personalize_company(company):
+
+def personalize_company(company, crawler=None):
     """
     Add personalization fields to company data
+    With a crawler, fields come from the company's own website where it states them.
     """
     # Extract name for potential contact field
     company_name = company.get("name", "")
+    site = crawler.crawl(company["website"]) if crawler and company.get("website") else {}
+    company["crawl_status"] = site.get("crawl_status", "not_crawled")
     
-    # Infer common personalization data
-    # In production, would scrape website or use LinkedIn API
-    company["contact_name"] = f"Manager at {company_name.split()[0]}"  # Placeholder
-    company["services"] = ["HVAC Installation", "Maintenance", "Repair"]  # Generic default
+    # Infer common personalization data, preferring what the website says
+    company["contact_name"] = site.get("owner") or f"Manager at {company_name.split()[0]}"  # Placeholder
+    company["services"] = site.get("services") or ["HVAC Installation", "Maintenance", "Repair"]  # Generic default
     company["company_size"] = "Small-Medium"  # Placeholder
-    company["years_in_business"] = "Unknown"  # Would research from website
-    company["website_title"] = company_name  # Could scrape from <title> tag
+    if site.get("founded"):
+        company["years_in_business"] = str(date.today().year - site["founded"])
+    elif site.get("years"):
+        company["years_in_business"] = str(site["years"])
+    else:
+        company["years_in_business"] = "Unknown"
+    company["website_title"] = site.get("title") or company_name
+    company["site_emails"] = site.get("emails", [])
+    company["site_phones"] = site.get("phones", [])
+    if not company.get("phone") and company["site_phones"]:
+        company["phone"] = company["site_phones"][0]
     
-    # Email personalization fields (for template use)
-    company["email_field_company"] = company.get("name", "Company")
-    company["email_field_contact"] = company.get("contact_name", "Contact")
-    company["email_field_services"] = ", ".join(company.get("services", ["HVAC Services"]))
+    # Email personalization fields (email_field_company/contact/services) are
+    # derived from the fields above by Company when a template reads them
     
     return company
 
 
-def personalize_hvac_data():
-    """Main personalization process"""
+def personalize_or_keep(company, crawler=None):
+    """personalize_company, but a failure keeps the record as it was"""
+    try:
+        return personalize_company(company, crawler)
+    except Exception as e:
+        # Still include, but with error
+        logger.warning(f"Error personalizing {company.get('name', 'Unknown')}: {e}")
+        return company
+
+
+def get_crawler():
+    """Process-wide crawler, so all workers share its limits, robots cache and per-domain results"""
+    global _crawler
+    with _crawler_lock:
+        if _crawler is None:
+            _crawler = Crawler()
+        return _crawler
+
+
+def close_crawler():
+    global _crawler
+    with _crawler_lock:
+        if _crawler is not None:
+            logger.info(_crawler.summary())
+            _crawler.close()
+            _crawler = None
+
+
+def personalize_hvac_data(follow=False, crawl=CRAWL_ENABLED, concurrency=CONCURRENCY):
+    """
+    Main personalization process.
+    Streams records from the verify output; with follow=True it starts on
+    the first records while verification is still writing. With crawl=True
+    company websites are fetched, `concurrency` companies at a time.
+    """
     
     # Load verified data
-    if not os.path.exists(INPUT_FILE):
+    if not follow and not exists(INPUT_FILE):
         logger.error(f"Input file not found: {INPUT_FILE}")
         return False
     
-    try:
-        with open(INPUT_FILE, "r") as f:
-            companies = json.load(f)
-        logger.info(f"Loaded {len(companies)} verified companies")
-    except Exception as e:
-        logger.error(f"Error loading input file: {e}")
-        return False
-    
     # Personalize each company
-    logger.info("Adding personalization data...")
-    personalized = []
+    logger.info(f"Adding personalization data (website crawl {'on' if crawl else 'off'})...")
+    personalize = partial(personalize_or_keep, crawler=get_crawler() if crawl else None)
     
-    for i, company in enumerate(companies):
-        try:
-            company = personalize_company(company)
-            personalized.append(company)
-        except Exception as e:
-            logger.warning(f"Error personalizing {company.get('name', 'Unknown')}: {e}")
-            personalized.append(company)  # Still include, but with error
-        
-        if (i + 1) % 50 == 0:
-            logger.info(f"Personalized {i + 1}/{len(companies)}")
-    
-    # Save output
     try:
-        with open(OUTPUT_FILE, "w") as f:
-            json.dump(personalized, f, indent=2)
-        logger.info(f"✓ Personalization complete. Saved to {OUTPUT_FILE}")
-        logger.info(f"✓ Ready for Google Sheet export")
-    except Exception as e:
-        logger.error(f"Error saving output: {e}")
+        with RecordWriter(OUTPUT_FILE) as out:
+            companies = read_companies(INPUT_FILE, follow=follow)
+            for company in parallel_map(personalize, companies, concurrency if crawl else 1):
+                out.write(company)
+                
+                if out.count % 50 == 0:
+                    logger.info(f"Personalized {out.count}")
+                    out.flush()
+            total = out.count
+    except (OSError, ValueError, StreamError) as e:
+        logger.error(f"Error processing {INPUT_FILE}: {e}")
         return False
+    finally:
+        close_crawler()
+    
+    logger.info(f"✓ Personalization complete. Saved {total} companies to {OUTPUT_FILE}")
+    logger.info(f"✓ Ready for Google Sheet export")
     
     return True
 
 
 if __name__ == "__main__":
-    success = personalize_hvac_data()
+    parser = argparse.ArgumentParser(description="Personalize verified HVAC company data.")
+    parser.add_argument("--follow", action="store_true", help="Stream from a verify phase that is still running.")
+    parser.add_argument("--no-crawl", action="store_true", help="Do not fetch company websites.")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY, help="Companies crawled in parallel.")
+    args = parser.parse_args()
+
+    success = personalize_hvac_data(follow=args.follow, crawl=CRAWL_ENABLED and not args.no_crawl,
+                                    concurrency=args.concurrency)
     sys.exit(0 if success else 1)
@@ -2,17 +2,91 @@
 """
 Orchestration script for HVAC scraping workflow
 Runs all phases: Scrape → Verify → Personalize → Export
+
+By default the phases run in this process as concurrent stages connected
+by bounded queues: verify starts on the first scraped companies, and
+modules such as the Google API client are imported once. Each stage still
+writes its usual .tmp/*.jsonl file, and per-stage throughput/latency
+metrics are logged and saved to .tmp/hvac_pipeline_metrics.json.
+--subprocess runs the standalone phase scripts one after another instead.
 """
 
 import os
 import sys
+import json
+import time
+import queue
+import random
+import argparse
+import threading
 import subprocess
 import logging
 from pathlib import Path
+from dotenv import load_dotenv
+from hvac_phase_cache import PhaseCache
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+load_dotenv(os.path.join(BASE_DIR, ".env"))
 EXECUTION_DIR = os.path.join(BASE_DIR, "execution")
 TMP_DIR = os.path.join(BASE_DIR, ".tmp")
+METRICS_FILE = os.path.join(TMP_DIR, "hvac_pipeline_metrics.json")
+RAW_FILE = os.path.join(TMP_DIR, "hvac_raw.jsonl")
+VERIFIED_FILE = os.path.join(TMP_DIR, "hvac_verified.jsonl")
+FINAL_FILE = os.path.join(TMP_DIR, "hvac_final.jsonl")
+SCRAPE_CHECKPOINT = os.path.join(TMP_DIR, "hvac_raw_checkpoint.jsonl")
+
+
+def scrape_complete():
+    """
+    False while the scrape checkpoint belongs to an unfinished run (some
+    cities failed), so a partial scrape is never cached as up to date.
+    """
+    try:
+        with open(SCRAPE_CHECKPOINT, "rb") as f:
+            f.seek(max(0, f.seek(0, os.SEEK_END) - 4096))
+            last = f.read().rstrip(b"\n").rsplit(b"\n", 1)[-1]
+    except FileNotFoundError:
+        return True
+    try:
+        return json.loads(last).get("complete") is True
+    except (ValueError, AttributeError):
+        return False
+
+
+def export_files():
+    """The export's file-sink outputs for the configured HVAC_EXPORT_SINKS"""
+    import hvac_export
+    return hvac_export.file_outputs()
+
+
+# Phases in order. A phase is skipped when its script, the sibling modules it
+# imports (`code`), the env settings it reads and its input file are
+# unchanged since its last successful run.
+# `complete`, if set, must also hold for a run to be recorded; `files` lists
+# further outputs that must still be on disk, unchanged, for a skip.
+PHASES = [
+    {"name": "scrape", "script": "scrape_hvac_texas.py", "stage": "Phase 1: Scrape",
+     "label": "Phase 1: Scrape HVAC Companies", "input": None, "output": RAW_FILE,
+     "code": ["hvac_dedup.py", "hvac_domains.py", "serpapi_cache.py", "token_bucket.py", "hvac_records.py"],
+     "complete": scrape_complete,
+     "env": ["SERPAPI_ENGINE", "SERPAPI_MAX_PAGES", "SERPAPI_NUM", "HVAC_DEDUP_NAME_THRESHOLD"]},
+    {"name": "verify", "script": "verify_hvac_emails.py", "stage": "Phase 2: Verify",
+     "label": "Phase 2: Verify Email Addresses", "input": RAW_FILE, "output": VERIFIED_FILE,
+     "code": ["email_verifier.py", "hvac_domains.py", "hvac_dedup.py"],
+     "env": ["EMAIL_VERIFY_SMTP", "SMTP_VERIFY_PORT", "HVAC_AGGREGATOR_DOMAINS"]},
+    {"name": "personalize", "script": "personalize_hvac_data.py", "stage": "Phase 3: Personalize",
+     "label": "Phase 3: Personalize Company Data", "input": VERIFIED_FILE, "output": FINAL_FILE,
+     "code": ["website_crawler.py", "hvac_domains.py", "hvac_dedup.py"], "env": ["HVAC_CRAWL"]},
+    {"name": "export", "script": "hvac_export.py", "stage": "Phase 4: Export",
+     "label": "Phase 4: Export", "input": FINAL_FILE, "output": None, "files": export_files,
+     "code": ["hvac_to_google_sheet.py", "sheets_sync.py", "token_bucket.py", "hvac_dedup.py",
+              "hvac_domains.py", "hvac_records.py"],
+     "env": ["HVAC_EXPORT_SINKS", "GOOGLE_SHEETS_ID", "GOOGLE_SHEETS_FAKE", "GOOGLE_SHEETS_CREDENTIALS",
+             "SHEETS_MAX_PAYLOAD_BYTES", "SHEETS_CHUNK_ROWS", "SHEETS_UPLOAD_WORKERS", "SHEETS_WRITES_PER_MIN"]},
+]
+
+# Records buffered between two stages before the producer blocks
+QUEUE_SIZE = int(os.getenv("HVAC_QUEUE_SIZE", "1000"))
 
 # Setup logging
 os.makedirs(TMP_DIR, exist_ok=True)
@@ -65,42 +139,368 @@ def run_phase(script_name, phase_name):
         return False
 
 
-def main():
+class StageMetrics:
+    """Counters and a latency sample for one pipeline stage"""
+
+    SAMPLE_SIZE = 1000
+
+    def __init__(self, name):
+        self.name = name
+        self.status = "pending"
+        self.records_in = 0
+        self.records_out = 0
+        self.busy = 0.0      # time spent processing records
+        self.waiting = 0.0   # time blocked on an empty input queue (starved)
+        self.blocked = 0.0   # time blocked on a full output queue (backpressure)
+        self.started = None
+        self.first_output = None
+        self.finished = None
+        self.latencies = []  # reservoir sample, so memory stays flat
+
+    def start(self):
+        self.status = "running"
+        self.started = time.perf_counter()
+
+    def finish(self, ok):
+        self.status = "ok" if ok else "failed"
+        self.finished = time.perf_counter()
+
+    def processed(self, seconds):
+        self.records_in += 1
+        self.busy += seconds
+        if len(self.latencies) < self.SAMPLE_SIZE:
+            self.latencies.append(seconds)
+        else:
+            slot = random.randrange(self.records_in)
+            if slot < self.SAMPLE_SIZE:
+                self.latencies[slot] = seconds
+
+    def emitted(self):
+        self.records_out += 1
+        if self.first_output is None:
+            self.first_output = time.perf_counter()
+
+    def percentile(self, p):
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+    def as_dict(self, t0):
+        wall = (self.finished or time.perf_counter()) - self.started if self.started else 0.0
+        p50, p95 = self.percentile(0.5), self.percentile(0.95)
+        return {
+            "stage": self.name,
+            "status": self.status,
+            "records_in": self.records_in,
+            "records_out": self.records_out,
+            "wall_s": round(wall, 3),
+            "busy_s": round(self.busy, 3),
+            "waiting_s": round(self.waiting, 3),
+            "blocked_s": round(self.blocked, 3),
+            "records_per_s": round(self.records_out / wall, 1) if wall > 0 else None,
+            "latency_p50_ms": round(p50 * 1000, 2) if p50 is not None else None,
+            "latency_p95_ms": round(p95 * 1000, 2) if p95 is not None else None,
+            "first_output_s": round(self.first_output - t0, 3) if self.first_output else None,
+        }
+
+
+class _End:
+    """End-of-stream marker passed down a queue; carries whether upstream succeeded"""
+
+    def __init__(self, ok):
+        self.ok = ok
+
+
+def _put(q, item, metrics):
+    start = time.perf_counter()
+    q.put(item)
+    metrics.blocked += time.perf_counter() - start
+
+
+def _get(q, metrics):
+    start = time.perf_counter()
+    item = q.get()
+    metrics.waiting += time.perf_counter() - start
+    return item
+
+
+def _drain(q):
+    """Discard input until upstream ends, so a failed stage never deadlocks its producer"""
+    while not isinstance(q.get(), _End):
+        pass
+
+
+def scrape_stage(metrics, out_q):
+    import scrape_hvac_texas
+
+    def emit(company):
+        metrics.emitted()
+        _put(out_q, company, metrics)
+
+    metrics.start()
+    ok = False
+    try:
+        ok = scrape_hvac_texas.scrape_hvac_companies(emit=emit)
+    except Exception as e:
+        logger.error(f"✗ {metrics.name} error: {e}")
+    finally:
+        metrics.finish(ok)
+        out_q.put(_End(ok))
+
+
+def transform_stage(metrics, func, output_file, in_q, out_q, workers=1):
+    """
+    Apply `func` to each record from `in_q`, on `workers` threads with order
+    preserved. Records it returns (None drops one) go to `output_file` and
+    downstream; an upstream failure marks this stage failed too, so the
+    export never publishes a partial run.
+    """
+    from hvac_records import RecordWriter, StreamError, parallel_map
+
+    upstream = {"ended": False, "ok": False}
+
+    def records():
+        while True:
+            item = _get(in_q, metrics)
+            if isinstance(item, _End):
+                upstream.update(ended=True, ok=item.ok)
+                return
+            yield item
+
+    def timed(item):
+        start = time.perf_counter()
+        return func(item), time.perf_counter() - start
+
+    metrics.start()
+    ok = False
+    try:
+        with RecordWriter(output_file) as out:
+            for result, seconds in parallel_map(timed, records(), workers):
+                metrics.processed(seconds)
+                if result is not None:
+                    out.write(result)
+                    metrics.emitted()
+                    _put(out_q, result, metrics)
+            if not upstream["ok"]:
+                raise StreamError("upstream stage failed")
+        ok = True
+    except Exception as e:
+        logger.error(f"✗ {metrics.name} error: {e}")
+        if not upstream["ended"]:
+            _drain(in_q)
+    finally:
+        metrics.finish(ok)
+        out_q.put(_End(ok))
+
+
+def export_stage(metrics, in_q):
+    """
+    Stream the final records into the export sinks; they only publish
+    (sheet sync, file rename) once upstream has finished cleanly
+    """
+    metrics.start()
+    ok = False
+    ended = False
+    sinks = []
+    try:
+        import hvac_export
+        sinks = hvac_export.open_sinks(hvac_export.DEFAULT_SINKS)
+        while True:
+            item = _get(in_q, metrics)
+            if isinstance(item, _End):
+                ended = True
+                break
+            start = time.perf_counter()
+            for sink in sinks:
+                sink.write(item)
+            metrics.processed(time.perf_counter() - start)
+        if not item.ok:
+            logger.error(f"✗ {metrics.name} skipped: an upstream stage failed")
+        start = time.perf_counter()
+        ok = hvac_export.close_sinks(sinks, item.ok)
+        sinks = []
+        metrics.busy += time.perf_counter() - start
+        metrics.records_out = metrics.records_in if ok else 0
+    except Exception as e:
+        logger.error(f"✗ {metrics.name} error: {e}")
+        if sinks:
+            hvac_export.close_sinks(sinks, ok=False)
+        if not ended:
+            _drain(in_q)
+    finally:
+        metrics.finish(ok)
+
+
+def replay_stage(metrics, path, out_q):
+    """Feed a skipped phase's cached output to the first stage that has to run"""
+    from hvac_records import read_companies
+
+    metrics.start()
+    ok = False
+    try:
+        for record in read_companies(path):
+            metrics.emitted()
+            _put(out_q, record, metrics)
+        ok = True
+    except Exception as e:
+        logger.error(f"✗ {metrics.name} error reading {path}: {e}")
+    finally:
+        metrics.finish(ok)
+        if ok:
+            metrics.status = "cached"
+        out_q.put(_End(ok))
+
+
+def run_in_process(queue_size=QUEUE_SIZE, start=0):
+    """
+    Run phases `start`.. as concurrent stages; earlier phases are skipped and
+    the last skipped one replays its output file. Returns the stage metrics.
+    """
+    import verify_hvac_emails
+    import personalize_hvac_data
+
+    def verify(company):
+        company = verify_hvac_emails.verify_email(company)
+        return company if company.get("confidence_score", 0) >= verify_hvac_emails.MIN_CONFIDENCE else None
+
+    crawler = personalize_hvac_data.get_crawler() if personalize_hvac_data.CRAWL_ENABLED and start <= 2 else None
+
+    def personalize(company):
+        return personalize_hvac_data.personalize_or_keep(company, crawler)
+
+    runners = {
+        "scrape": lambda metrics, in_q, out_q: scrape_stage(metrics, out_q),
+        "verify": lambda metrics, in_q, out_q: transform_stage(metrics, verify, VERIFIED_FILE, in_q, out_q,
+                                                               verify_hvac_emails.CONCURRENCY),
+        "personalize": lambda metrics, in_q, out_q: transform_stage(metrics, personalize, FINAL_FILE, in_q, out_q,
+                                                                    personalize_hvac_data.CONCURRENCY if crawler else 1),
+        "export": lambda metrics, in_q, out_q: export_stage(metrics, in_q),
+    }
+    stages = [StageMetrics(phase["stage"]) for phase in PHASES]
+    for metrics in stages[:start]:
+        metrics.status = "skipped"
+
+    threads = []
+    in_q = None
+    if start > 0:
+        in_q = queue.Queue(maxsize=queue_size)
+        threads.append(threading.Thread(target=replay_stage,
+                                        args=(stages[start - 1], PHASES[start - 1]["output"], in_q)))
+    for phase, metrics in zip(PHASES[start:], stages[start:]):
+        out_q = queue.Queue(maxsize=queue_size)
+        threads.append(threading.Thread(target=runners[phase["name"]], args=(metrics, in_q, out_q)))
+        in_q = out_q
+
+    logger.info(f"Running {len(PHASES) - start} stages in-process (queue size {queue_size})")
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if start <= 1:
+        verifier = verify_hvac_emails.get_verifier()
+        verifier.resolver.save()
+        logger.info(verifier.summary())
+        logger.info(verify_hvac_emails.get_memo().summary())
+    personalize_hvac_data.close_crawler()
+    return stages
+
+
+def first_stale_phase(cache, force=None):
+    """
+    Index of the first phase that has to run; everything after it runs too.
+    `force` is None (trust the cache), [] (rerun everything) or phase names.
+    """
+    for i, phase in enumerate(PHASES):
+        if force is not None and (not force or phase["name"] in force):
+            return i
+        if not cache.is_fresh(phase):
+            return i
+    return len(PHASES)
+
+
+def report_metrics(stages, t0):
+    rows = [stage.as_dict(t0) for stage in stages]
+
+    logger.info(f"\n{'='*60}")
+    logger.info("STAGE METRICS")
+    logger.info(f"{'='*60}")
+    logger.info(f"{'Stage':<22}{'in':>8}{'out':>8}{'wall s':>9}{'busy s':>9}{'wait s':>9}"
+                f"{'block s':>9}{'rec/s':>9}{'p95 ms':>9}{'1st out s':>11}")
+    for row in rows:
+        logger.info(
+            f"{row['stage']:<22}{row['records_in']:>8}{row['records_out']:>8}{row['wall_s']:>9.1f}"
+            f"{row['busy_s']:>9.1f}{row['waiting_s']:>9.1f}{row['blocked_s']:>9.1f}"
+            f"{row['records_per_s'] or 0:>9.1f}{row['latency_p95_ms'] or 0:>9.2f}"
+            f"{'-' if row['first_output_s'] is None else format(row['first_output_s'], '.2f'):>11}"
+        )
+
+    with open(METRICS_FILE, "w") as f:
+        json.dump({"total_s": round(time.perf_counter() - t0, 3), "stages": rows}, f, indent=2)
+    logger.info(f"✓ Metrics saved to {METRICS_FILE}")
+
+
+def main(in_process=True, queue_size=QUEUE_SIZE, force=None):
     logger.info("Starting HVAC Company Outreach Pipeline")
     logger.info(f"Base directory: {BASE_DIR}")
     logger.info(f"Output directory: {TMP_DIR}")
     
-    phases = [
-        ("scrape_hvac_texas.py", "Phase 1: Scrape HVAC Companies"),
-        ("verify_hvac_emails.py", "Phase 2: Verify Email Addresses"),
-        ("personalize_hvac_data.py", "Phase 3: Personalize Company Data"),
-        ("hvac_to_google_sheet.py", "Phase 4: Export to Google Sheet"),
-    ]
+    cache = PhaseCache()
+    start = first_stale_phase(cache, force)
+    for phase in PHASES[:start]:
+        logger.info(f"✓ {phase['label']} is up to date, skipping (use --force to rerun)")
     
-    completed = 0
+    completed = start
     failed = 0
     
-    for script, phase_name in phases:
-        if run_phase(script, phase_name):
-            completed += 1
-        else:
-            failed += 1
-            # For graceful recovery, continue to next phase if possible
-            logger.warning(f"⚠ Continuing to next phase despite error...")
+    if start == len(PHASES):
+        logger.info("✓ Nothing changed since the last successful run")
+    elif in_process:
+        for phase in PHASES[start:]:
+            cache.forget(phase)
+        t0 = time.perf_counter()
+        stages = run_in_process(queue_size, start)
+        report_metrics(stages, t0)
+        # Record in pipeline order, once every input file is final
+        for phase, metrics in zip(PHASES[start:], stages[start:]):
+            if metrics.status == "ok":
+                if not cache.record(phase):
+                    logger.warning(f"⚠ {phase['label']} was incomplete; it will run again next time")
+                completed += 1
+            else:
+                failed += 1
+    else:
+        for i, phase in enumerate(PHASES[start:], start):
+            # Upstream may have rerun yet produced identical output
+            forced = force is not None and (not force or phase["name"] in force)
+            if i > start and not forced and cache.is_fresh(phase):
+                logger.info(f"✓ {phase['label']} input unchanged, skipping")
+                completed += 1
+                continue
+            cache.forget(phase)
+            if run_phase(phase["script"], phase["label"]):
+                if not cache.record(phase):
+                    logger.warning(f"⚠ {phase['label']} was incomplete; it will run again next time")
+                completed += 1
+            else:
+                failed += 1
+                # For graceful recovery, continue to next phase if possible
+                logger.warning(f"⚠ Continuing to next phase despite error...")
     
     # Summary
     logger.info(f"\n{'='*60}")
     logger.info("WORKFLOW SUMMARY")
     logger.info(f"{'='*60}")
-    logger.info(f"✓ Completed: {completed}/{len(phases)}")
-    logger.info(f"✗ Failed: {failed}/{len(phases)}")
+    logger.info(f"✓ Completed: {completed}/{len(PHASES)}")
+    logger.info(f"✗ Failed: {failed}/{len(PHASES)}")
     
-    if completed == len(phases):
+    if completed == len(PHASES):
         logger.info("✓ Pipeline completed successfully!")
         logger.info(f"\nOutputs:")
-        logger.info(f"  - Raw data: {os.path.join(TMP_DIR, 'hvac_raw.json')}")
-        logger.info(f"  - Verified: {os.path.join(TMP_DIR, 'hvac_verified.json')}")
-        logger.info(f"  - Final: {os.path.join(TMP_DIR, 'hvac_final.json')}")
+        logger.info(f"  - Raw data: {RAW_FILE}")
+        logger.info(f"  - Verified: {VERIFIED_FILE}")
+        logger.info(f"  - Final: {FINAL_FILE}")
         logger.info(f"  - Sheet: [Awaiting Google API setup]")
         return 0
     else:
@@ -109,4 +509,13 @@ def main():
 
 
 if __name__ == "__main__":
-    sys.exit(main())
+    parser = argparse.ArgumentParser(description="Run the HVAC outreach pipeline.")
+    parser.add_argument("--subprocess", action="store_true",
+                        help="Run each phase script in its own interpreter, one after another.")
+    parser.add_argument("--queue-size", type=int, default=QUEUE_SIZE,
+                        help="Records buffered between in-process stages.")
+    parser.add_argument("--force", nargs="*", choices=[phase["name"] for phase in PHASES], metavar="PHASE",
+                        help="Rerun even if unchanged: all phases, or the named ones (and everything after).")
+    args = parser.parse_args()
+
+    sys.exit(main(in_process=not args.subprocess, queue_size=args.queue_size, force=args.force))
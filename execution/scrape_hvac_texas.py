@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """
 Scrape HVAC companies in Texas from multiple sources
-Outputs: .tmp/hvac_raw.json with company data
+Outputs: .tmp/hvac_raw.jsonl with company data (one record per line, streamed per city)
 """
 
 import os
@@ -9,10 +9,17 @@ import json
 import time
 import logging
 import sys
+import argparse
 import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from token_bucket import TokenBucket
+from serpapi_cache import ResponseCache, default_ttl
+from hvac_records import RecordWriter, Company
+from hvac_dedup import EntityResolver
 
 # Setup
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -31,51 +38,268 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-OUTPUT_FILE = os.path.join(TMP_DIR, "hvac_raw.json")
-CHECKPOINT_FILE = os.path.join(TMP_DIR, "hvac_raw_checkpoint.json")
+OUTPUT_FILE = os.path.join(TMP_DIR, "hvac_raw.jsonl")
+CHECKPOINT_FILE = os.path.join(TMP_DIR, "hvac_raw_checkpoint.jsonl")
 SERPAPI_KEY = os.getenv("SERPAPI_KEY")
+SERPAPI_URL = "https://serpapi.com/search"
 
+# Concurrent city fetches, and the shared request rate (per second) across all of them
+CONCURRENCY = int(os.getenv("SERPAPI_CONCURRENCY", "8"))
+RATE_PER_SEC = float(os.getenv("SERPAPI_RATE_PER_SEC", "5"))
 
-def load_checkpoint():
-    """Load previous scraping checkpoint if exists"""
-    if os.path.exists(CHECKPOINT_FILE):
-        try:
-            with open(CHECKPOINT_FILE, "r") as f:
-                data = json.load(f)
-            logger.info(f"Loaded checkpoint with {len(data)} records")
-            return data
-        except Exception as e:
-            logger.warning(f"Could not load checkpoint: {e}")
-    return []
+# "google" (organic_results) or "google_maps" (local_results)
+ENGINE = os.getenv("SERPAPI_ENGINE", "google")
+# Result pages to walk per city before giving up on new companies
+MAX_PAGES = int(os.getenv("SERPAPI_MAX_PAGES", "3"))
+# Results per page: google honours `num`, google_maps always returns 20
+PAGE_SIZE = {"google": int(os.getenv("SERPAPI_NUM", "10")), "google_maps": 20}
+HVAC_KEYWORDS = ("hvac", "heating", "air conditioning", "cooling", "a/c", "furnace")
+
+TEXAS_CITIES = [
+    "Houston", "Dallas", "Austin", "San Antonio", "Fort Worth", "Arlington",
+    "Corpus Christi", "Plano", "Lubbock", "Garland", "Irving", "Laredo",
+    "Amarillo", "Frisco", "Grand Prairie", "Brownsville", "Pasadena",
+    "McKinney", "Killeen", "Mesquite", "Beaumont", "Waco", "Carrollton",
+    "Midland", "Denton", "Abilene", "Odessa", "Round Rock", "Wichita Falls",
+    "Richardson"
+]
 
 
-def save_checkpoint(companies):
-    """Save current progress"""
+def load_checkpoint(run_params):
+    """
+    Load progress from an interrupted run.
+    The checkpoint is append-only JSONL: a header line with the run
+    parameters, one {"city", "companies"} line per finished city, and a
+    {"complete": true} line once the run finished. A finished run or one
+    with different parameters is discarded, so only crashed or killed runs
+    are resumed. Returns ({city: companies}, resumed).
+    """
+    if not os.path.exists(CHECKPOINT_FILE):
+        return {}, False
+    done = {}
+    header = None
+    complete = False
     try:
-        with open(CHECKPOINT_FILE, "w") as f:
-            json.dump(companies, f, indent=2)
-        logger.info(f"Checkpoint saved with {len(companies)} records")
+        with open(CHECKPOINT_FILE, "r") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # torn line from a killed run; later lines are still valid
+                if "run" in record:
+                    header = record["run"]
+                elif record.get("complete"):
+                    complete = True
+                elif "city" in record:
+                    done[record["city"]] = [Company.from_dict(c) for c in record["companies"]]
     except Exception as e:
-        logger.error(f"Error saving checkpoint: {e}")
+        logger.warning(f"Could not load checkpoint: {e}")
+        return {}, False
 
+    if complete or header != run_params:
+        return {}, False
+    logger.info(f"Resuming: {len(done)} cities already scraped "
+                f"({sum(len(c) for c in done.values())} records)")
+    return done, True
 
-def deduplicate_companies(companies):
-    """Remove duplicate companies by name + city"""
-    seen = set()
-    unique = []
+
+class Checkpoint:
+    """Appends one line per finished city so a killed run loses at most the cities in flight"""
+
+    def __init__(self, run_params, resume):
+        if resume:
+            self._drop_torn_line()
+        self.file = open(CHECKPOINT_FILE, "a" if resume else "w")
+        if not resume:
+            self.write({"run": run_params})
+
+    @staticmethod
+    def _drop_torn_line():
+        """Cut a partial last line left by a killed run, so the next record starts on its own line"""
+        with open(CHECKPOINT_FILE, "rb+") as f:
+            end = f.seek(0, os.SEEK_END)
+            pos = end
+            while pos > 0:
+                step = min(4096, pos)
+                f.seek(pos - step)
+                newline = f.read(step).rfind(b"\n")
+                if newline != -1:
+                    pos = pos - step + newline + 1
+                    break
+                pos -= step
+            if pos != end:
+                f.truncate(pos)
+
+    def write(self, record):
+        self.file.write(json.dumps(record) + "\n")
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def city_done(self, city, companies):
+        self.write({"city": city, "companies": [c.to_dict() for c in companies]})
+
+    def close(self, complete=False):
+        if complete:
+            self.write({"complete": True})
+        self.file.close()
+
+
+def deduplicate_companies(companies, resolver=None):
+    """
+    Yield companies that are not fuzzy duplicates of one already yielded
+    (same phone, same website domain, or near-identical name in the same city).
+    Pass the same `resolver` across calls to dedupe a stream batch by batch.
+    """
+    resolver = EntityResolver(report_path=None) if resolver is None else resolver
     for company in companies:
-        key = (company.get("name", "").lower(), company.get("city", "").lower())
-        if key and key not in seen:
-            seen.add(key)
-            unique.append(company)
-    return unique
+        if resolver.add(company):
+            yield company
+
+
+def load_cities(cities_file=None):
+    """Cities to sweep: one per line from `cities_file`, or the built-in Texas list"""
+    if not cities_file:
+        return TEXAS_CITIES
+    with open(cities_file, "r") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+def make_session(concurrency):
+    """Shared keep-alive session with one pooled connection per worker"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=concurrency)
+    session.mount("https://", adapter)
+    return session
+
+
+def parse_organic_results(city, data):
+    """Turn a SerpAPI google response into company records"""
+    companies = []
+    for result in data.get("organic_results", []):
+        # Extract company info from organic results
+        title = result.get("title", "")
+        link = result.get("link", "")
+        
+        # Try to extract phone from snippet
+        snippet = result.get("snippet", "")
+        
+        company = Company(
+            name=title,
+            address=snippet[:100] if snippet else "",
+            city=city,
+            state="TX",
+            phone="",
+            website=link,
+            email=None,
+            rating="",
+            review_count="",
+            source="google_serpapi"
+        )
+        
+        # Only add if has a name
+        if title and "hvac" in title.lower():
+            companies.append(company)
+    return companies
 
 
-def scrape_hvac_companies():
+def parse_local_results(city, data):
+    """Turn a SerpAPI google_maps response into company records"""
+    companies = []
+    for result in data.get("local_results", []):
+        title = result.get("title", "")
+        category = " ".join([result.get("type") or ""] + (result.get("types") or []))
+        
+        company = Company(
+            name=title,
+            address=result.get("address", ""),
+            city=city,
+            state="TX",
+            phone=result.get("phone", ""),
+            website=result.get("website", ""),
+            email=None,
+            rating=result.get("rating", ""),
+            review_count=result.get("reviews", ""),
+            source="google_maps_serpapi"
+        )
+        
+        # Maps listings are often named "X Heating & Air"; accept the category too
+        text = f"{title} {category}".lower()
+        if title and any(keyword in text for keyword in HVAC_KEYWORDS):
+            companies.append(company)
+    return companies
+
+
+def page_params(city, engine, page):
+    """SerpAPI query parameters for one result page"""
+    if engine == "google_maps":
+        return {
+            "engine": "google_maps",
+            "type": "search",
+            "q": f"HVAC companies in {city}, TX",
+            "start": page * PAGE_SIZE["google_maps"],
+            "api_key": SERPAPI_KEY,
+        }
+    # SerpAPI Google search - correct format
+    return {
+        "q": f"HVAC companies {city} TX",
+        "api_key": SERPAPI_KEY,
+        "engine": "google",  # Use google engine
+        "start": page * PAGE_SIZE["google"],
+        "num": PAGE_SIZE["google"],
+    }
+
+
+def serpapi_search(session, limiter, params, cache=None):
+    """One SerpAPI call, answered from the on-disk cache when possible"""
+    if cache is not None:
+        data = cache.get(params)
+        if data is not None:
+            return data
+    limiter.acquire()
+    response = session.get(SERPAPI_URL, params=params, timeout=10)
+    response.raise_for_status()
+    data = response.json()
+    if cache is not None and "error" not in data:
+        cache.put(params, data)
+    return data
+
+
+def fetch_city(session, limiter, city, engine=ENGINE, max_pages=MAX_PAGES, cache=None):
+    """
+    Walk up to `max_pages` SerpAPI result pages for one city.
+    Stops early once a page adds no new unique companies or there is no
+    next page, so credits are only spent while they still yield leads.
+    The limiter and cache are shared by all workers.
+    """
+    parse = parse_local_results if engine == "google_maps" else parse_organic_results
+    companies = []
+    seen = set()
+    for page in range(max_pages):
+        data = serpapi_search(session, limiter, page_params(city, engine, page), cache)
+        
+        new = 0
+        for company in parse(city, data):
+            key = (company["name"].lower(), city.lower())
+            if key not in seen:
+                seen.add(key)
+                companies.append(company)
+                new += 1
+        
+        if new == 0 or not data.get("serpapi_pagination", {}).get("next"):
+            break
+    return companies
+
+
+def scrape_hvac_companies(cities=None, concurrency=CONCURRENCY, rate=RATE_PER_SEC,
+                          engine=ENGINE, max_pages=MAX_PAGES, cache_ttl=None, emit=None):
     """
     Scrape HVAC companies from Google Maps using SerpAPI
+    `emit`, if given, is called with each unique company as it is written
+    (the in-process pipeline uses it to feed the verify stage).
     """
-    companies = load_checkpoint()
+    cities = cities or TEXAS_CITIES
+    run_params = {"cities": cities, "engine": engine, "max_pages": max_pages}
+    results, resumed = load_checkpoint(run_params)
     
     logger.info("Starting HVAC company scraping for Texas...")
     logger.info("Target: 200 companies")
@@ -85,96 +309,96 @@ def scrape_hvac_companies():
         return False
     
     # Phase 1: Google Maps via SerpAPI - Multiple cities in Texas
-    logger.info("Phase 1: Scraping Google Maps via SerpAPI...")
+    logger.info(f"Phase 1: Scraping {len(cities)} cities via SerpAPI {engine} "
+                f"(up to {max_pages} pages each, {concurrency} workers, {rate:g} req/s)...")
     
-    texas_cities = [
-        "Houston", "Dallas", "Austin", "San Antonio", "Fort Worth", "Arlington",
-        "Corpus Christi", "Plano", "Lubbock", "Garland", "Irving", "Laredo",
-        "Amarillo", "Frisco", "Grand Prairie", "Brownsville", "Pasadena",
-        "McKinney", "Killeen", "Mesquite", "Beaumont", "Waco", "Carrollton",
-        "Midland", "Denton", "Abilene", "Odessa", "Round Rock", "Wichita Falls",
-        "Richardson"
-    ]
+    start = time.perf_counter()
+    session = make_session(concurrency)
+    limiter = TokenBucket(rate, max(1, concurrency))
+    # cache_ttl=0 disables the response cache
+    cache_ttl = default_ttl() if cache_ttl is None else cache_ttl
+    cache = ResponseCache(ttl=cache_ttl) if cache_ttl > 0 else None
+    checkpoint = Checkpoint(run_params, resumed)
+    pending = [city for city in cities if city not in results]
+    failed = 0
+    resolver = EntityResolver()
     
     try:
-        for city in texas_cities:
-            logger.info(f"Scraping {city}, TX...")
+        # Unique companies are streamed out as soon as every earlier city has
+        # finished, so the verify phase can start while the scrape is still
+        # running and the output (and which duplicate wins) follows `cities`
+        with RecordWriter(OUTPUT_FILE) as out:
+            settled = set(results)  # resumed, fetched or failed
+            next_city = 0
             
-            # SerpAPI Google Maps search - correct format
-            params = {
-                "q": f"HVAC companies {city} TX",
-                "api_key": SERPAPI_KEY,
-                "engine": "google"  # Use google engine
-            }
+            def publish_ready():
+                nonlocal next_city
+                while next_city < len(cities) and cities[next_city] in settled:
+                    for company in deduplicate_companies(results.get(cities[next_city], []), resolver):
+                        out.write(company)
+                        if emit is not None:
+                            emit(company)
+                    next_city += 1
+                out.flush()
             
-            try:
-                response = requests.get("https://serpapi.com/search", params=params, timeout=10)
-                response.raise_for_status()
-                data = response.json()
-                
-                # Extract organic results
-                if "organic_results" in data:
-                    for result in data["organic_results"][:100]:  # Limit 100 per city
-                        # Extract company info from organic results
-                        title = result.get("title", "")
-                        link = result.get("link", "")
-                        
-                        # Try to extract phone from snippet
-                        snippet = result.get("snippet", "")
-                        
-                        company = {
-                            "name": title,
-                            "address": snippet[:100] if snippet else "",
-                            "city": city,
-                            "state": "TX",
-                            "phone": "",
-                            "website": link,
-                            "email": None,
-                            "rating": "",
-                            "review_count": "",
-                            "source": "google_serpapi"
-                        }
-                        
-                        # Only add if has a name
-                        if title and "hvac" in title.lower():
-                            companies.append(company)
-                        
-                    logger.info(f"  ✓ Added results from {city}")
-                
-                # Respect API rate limits
-                time.sleep(0.3)
-                
-            except requests.exceptions.RequestException as e:
-                logger.warning(f"  ⚠ Error scraping {city}: {e}")
-                continue
+            publish_ready()
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                futures = {pool.submit(fetch_city, session, limiter, city, engine, max_pages, cache): city for city in pending}
+                for future in as_completed(futures):
+                    city = futures[future]
+                    settled.add(city)
+                    try:
+                        results[city] = future.result()
+                        checkpoint.city_done(city, results[city])
+                        logger.info(f"  ✓ Added {len(results[city])} results from {city}")
+                    except (requests.exceptions.RequestException, ValueError) as e:
+                        # Not checkpointed, so a resumed run retries it
+                        failed += 1
+                        logger.warning(f"  ⚠ Error scraping {city}: {e}")
+                    publish_ready()
+            total = out.count
         
-        logger.info(f"Phase 1 complete: {len(companies)} companies collected")
+        logger.info(f"Phase 1 complete: {total} unique companies collected "
+                    f"in {time.perf_counter() - start:.1f}s")
+        logger.info(f"✓ Scraping complete. Saved {total} companies to {OUTPUT_FILE}")
         
     except Exception as e:
         logger.error(f"Error in Phase 1: {e}")
-    
-    # Deduplicate and save
-    companies = deduplicate_companies(companies)
-    save_checkpoint(companies)
-    
-    # Save to final output
-    try:
-        with open(OUTPUT_FILE, "w") as f:
-            json.dump(companies, f, indent=2)
-        logger.info(f"✓ Scraping complete. Saved {len(companies)} companies to {OUTPUT_FILE}")
-    except Exception as e:
-        logger.error(f"Error saving output file: {e}")
         return False
+    finally:
+        session.close()
+        # Only a run where every city succeeded is marked complete
+        checkpoint.close(complete=failed == 0 and len(results) == len(cities))
+        resolver.close()
+        logger.info(resolver.summary())
+        if cache is not None:
+            logger.info(cache.summary())
     
     # Status report
-    if len(companies) < 100:
-        logger.warning(f"⚠ Only scraped {len(companies)} companies, target was 200")
+    if total < 100:
+        logger.warning(f"⚠ Only scraped {total} companies, target was 200")
     else:
-        logger.info(f"✓ Successfully scraped {len(companies)} unique companies")
+        logger.info(f"✓ Successfully scraped {total} unique companies")
     
+    if failed:
+        # Partial output: report the phase as failed so the pipeline stops
+        logger.error(f"✗ {failed} of {len(cities)} cities failed; re-run to retry them "
+                     f"(finished cities are resumed from the checkpoint)")
+        return False
     return True
 
 
 if __name__ == "__main__":
-    success = scrape_hvac_companies()
+    parser = argparse.ArgumentParser(description="Scrape HVAC companies via SerpAPI.")
+    parser.add_argument("--cities-file", help="Text file with one city per line (default: built-in Texas list).")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY, help="Parallel city requests.")
+    parser.add_argument("--rate", type=float, default=RATE_PER_SEC, help="Max SerpAPI requests per second.")
+    parser.add_argument("--engine", choices=["google", "google_maps"], default=ENGINE, help="SerpAPI engine.")
+    parser.add_argument("--max-pages", type=int, default=MAX_PAGES, help="Result pages per city (depth budget).")
+    parser.add_argument("--cache-ttl", type=int, help="Reuse cached responses younger than this (seconds; default SERPAPI_CACHE_TTL or 7 days).")
+    parser.add_argument("--no-cache", action="store_true", help="Always call SerpAPI.")
+    args = parser.parse_args()
+
+    success = scrape_hvac_companies(load_cities(args.cities_file), args.concurrency, args.rate,
+                                    args.engine, args.max_pages, 0 if args.no_cache else args.cache_ttl)
     sys.exit(0 if success else 1)
@@ -0,0 +1,127 @@
+"""
+On-disk cache for SerpAPI responses.
+
+Entries are content-addressed by a SHA-256 of the query parameters
+(minus api_key), stored gzip-compressed under .tmp/serpapi_cache/, expire
+after a TTL and are evicted least-recently-used once the directory grows
+past a size cap. Re-running a scrape with the same queries then costs no
+API credits.
+
+Tuning via .env:
+    SERPAPI_CACHE_TTL      seconds an entry stays valid (default 7 days)
+    SERPAPI_CACHE_MAX_MB   size cap for the cache directory (default 200)
+"""
+
+import os
+import json
+import gzip
+import time
+import hashlib
+import threading
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.path.join(BASE_DIR, ".tmp", "serpapi_cache")
+
+
+# The .env settings are read when a cache is created, not at import: callers
+# import this module before they load .env
+def default_ttl():
+    return int(os.getenv("SERPAPI_CACHE_TTL", str(7 * 24 * 3600)))
+
+
+def default_max_bytes():
+    return int(float(os.getenv("SERPAPI_CACHE_MAX_MB", "200")) * 1024 * 1024)
+
+
+def cache_key(params):
+    """Stable hash of the query parameters, ignoring the API key"""
+    relevant = {k: v for k, v in params.items() if k != "api_key"}
+    return hashlib.sha256(json.dumps(relevant, sort_keys=True).encode()).hexdigest()
+
+
+class ResponseCache:
+    """Thread-safe gzip file cache with TTL expiry and LRU eviction by size"""
+
+    def __init__(self, directory=CACHE_DIR, ttl=None, max_bytes=None):
+        self.directory = directory
+        self.ttl = default_ttl() if ttl is None else ttl
+        self.max_bytes = default_max_bytes() if max_bytes is None else max_bytes
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "stored": 0, "evicted": 0}
+        os.makedirs(directory, exist_ok=True)
+        self.size = sum(
+            entry.stat().st_size for entry in os.scandir(directory) if entry.name.endswith(".json.gz")
+        )
+
+    def path(self, key):
+        return os.path.join(self.directory, f"{key}.json.gz")
+
+    def get(self, params):
+        """Cached response for `params`, or None"""
+        path = self.path(cache_key(params))
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            with self.lock:
+                self.stats["misses"] += 1
+            return None
+
+        if time.time() - entry.get("fetched_at", 0) > self.ttl:
+            with self.lock:
+                self.stats["expired"] += 1
+                self.stats["misses"] += 1
+            return None
+
+        # mtime doubles as the last-access time for LRU eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        with self.lock:
+            self.stats["hits"] += 1
+        return entry["response"]
+
+    def put(self, params, response):
+        key = cache_key(params)
+        path = self.path(key)
+        relevant = {k: v for k, v in params.items() if k != "api_key"}
+        tmp_file = f"{path}.{threading.get_ident()}.part"
+        with gzip.open(tmp_file, "wt", encoding="utf-8") as f:
+            json.dump({"fetched_at": time.time(), "params": relevant, "response": response}, f)
+
+        with self.lock:
+            old_size = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmp_file, path)
+            self.size += os.path.getsize(path) - old_size
+            self.stats["stored"] += 1
+            if self.size > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Delete least recently used entries until the cache is 90% of the cap (lock held)"""
+        entries = sorted(
+            (entry for entry in os.scandir(self.directory) if entry.name.endswith(".json.gz")),
+            key=lambda entry: entry.stat().st_mtime,
+        )
+        target = self.max_bytes * 0.9
+        for entry in entries:
+            if self.size <= target:
+                break
+            size = entry.stat().st_size
+            try:
+                os.remove(entry.path)
+            except OSError:
+                continue
+            self.size -= size
+            self.stats["evicted"] += 1
+
+    def summary(self):
+        lookups = self.stats["hits"] + self.stats["misses"]
+        rate = self.stats["hits"] / lookups * 100 if lookups else 0
+        return (
+            f"SerpAPI cache: {self.stats['hits']} hits, {self.stats['misses']} misses "
+            f"({rate:.0f}% hit rate, {self.stats['expired']} expired), "
+            f"{self.stats['stored']} stored, {self.stats['evicted']} evicted, "
+            f"{self.size / 1024 / 1024:.1f} MB on disk"
+        )
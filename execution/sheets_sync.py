@@ -0,0 +1,503 @@
+"""
+Incremental Google Sheets sync for the HVAC export.
+
+Instead of clearing the sheet and rewriting every cell, the exporter reads
+the sheet once, matches rows on a stable company ID column and sends only
+the difference:
+
+  - changed rows are rewritten in place (values.batchUpdate, contiguous
+    rows merged into one range)
+  - new rows are appended at the end (values.append)
+  - rows whose company is gone are deleted (deleteDimension, bottom-up so
+    earlier indices stay valid)
+
+Every call is chunked to stay under the API's request payload limit.
+Matched rows keep their position, so manual sorting or notes in extra
+rows are not churned on each export.
+
+Bulk writes (full rewrites and appended rows) go through `upload_rows`:
+the grid is grown to fit first, then rows are written in fixed chunks by
+several workers at once, under the per-minute write quota. Chunks are
+numbered by their offset, so `UploadProgress` can record which ones have
+landed and a killed upload of the same data resumes where it stopped.
+
+FakeSheetsService is an in-memory stand-in for the googleapiclient Sheets
+client (optionally persisted to a JSON file) that enforces grid and
+payload limits, so exports can be exercised without Google credentials:
+    GOOGLE_SHEETS_FAKE=.tmp/fake_sheet.json python execution/hvac_to_google_sheet.py
+"""
+
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from token_bucket import TokenBucket
+
+MAX_RANGES_PER_CALL = 500
+MAX_CELLS = 10_000_000  # per spreadsheet
+API_RETRIES = 5
+
+_write_bucket = None
+_write_bucket_lock = threading.Lock()
+
+
+# The .env settings are read on use, not at import: the exporter imports this
+# module before it loads .env
+def max_payload_bytes():
+    # Sheets rejects request bodies over ~10 MB and recommends staying near 2 MB
+    return int(os.getenv("SHEETS_MAX_PAYLOAD_BYTES", str(2 * 1024 * 1024)))
+
+
+def upload_chunk_rows():
+    return int(os.getenv("SHEETS_CHUNK_ROWS", "5000"))
+
+
+def upload_workers():
+    return int(os.getenv("SHEETS_UPLOAD_WORKERS", "4"))
+
+
+def write_bucket():
+    """Token bucket for the per-user write quota, built on first use"""
+    global _write_bucket
+    with _write_bucket_lock:
+        if _write_bucket is None:
+            # Default quota is 60/min; 429s beyond it are retried with backoff by the client
+            per_minute = float(os.getenv("SHEETS_WRITES_PER_MIN", "60"))
+            _write_bucket = TokenBucket(per_minute / 60, max(1, upload_workers()))
+        return _write_bucket
+
+
+def column_letter(n):
+    """1 -> A, 27 -> AA"""
+    letters = ""
+    while n:
+        n, rem = divmod(n - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def a1_rows(sheet_name, first_row, rows, width):
+    """A1 range of `rows` rows starting at 0-based `first_row`"""
+    return f"{sheet_name}!A{first_row + 1}:{column_letter(width)}{first_row + rows}"
+
+
+def payload_bytes(obj):
+    return len(json.dumps(obj))
+
+
+def normalize_row(row, width):
+    """Cells as the API returns them: strings, padded/trimmed to `width`"""
+    cells = ["" if cell is None else str(cell) for cell in row[:width]]
+    return cells + [""] * (width - len(cells))
+
+
+def runs(indices):
+    """[3, 4, 5, 9] -> [(3, 3), (9, 1)] as (start, length)"""
+    result = []
+    for index in sorted(indices):
+        if result and result[-1][0] + result[-1][1] == index:
+            result[-1] = (result[-1][0], result[-1][1] + 1)
+        else:
+            result.append((index, 1))
+    return result
+
+
+def chunked(items, size_of, max_bytes=None, max_items=MAX_RANGES_PER_CALL):
+    """Split `items` into lists whose summed size_of stays under max_bytes"""
+    max_bytes = max_payload_bytes() if max_bytes is None else max_bytes
+    batch, size = [], 0
+    for item in items:
+        item_size = size_of(item)
+        if batch and (size + item_size > max_bytes or len(batch) >= max_items):
+            yield batch
+            batch, size = [], 0
+        batch.append(item)
+        size += item_size
+    if batch:
+        yield batch
+
+
+def execute(request):
+    """Run a write request within the write quota, retrying 429/5xx responses"""
+    write_bucket().acquire()
+    return request.execute(num_retries=API_RETRIES)
+
+
+def ensure_grid(service, sheet_id, sheet_name, rows, columns):
+    """Grow the named sheet's grid to at least rows x columns; returns its sheetId"""
+    if rows * columns > MAX_CELLS:
+        raise ValueError(f"{rows} x {columns} cells exceeds the {MAX_CELLS} cell spreadsheet limit")
+    meta = service.spreadsheets().get(spreadsheetId=sheet_id, fields="sheets.properties").execute()
+    for sheet in meta.get("sheets", []):
+        if sheet["properties"]["title"] == sheet_name:
+            props = sheet["properties"]
+            break
+    else:
+        raise ValueError(f"Sheet {sheet_name!r} not found in spreadsheet {sheet_id}")
+
+    grid = props["gridProperties"]
+    if grid["rowCount"] < rows or grid["columnCount"] < columns:
+        execute(service.spreadsheets().batchUpdate(spreadsheetId=sheet_id, body={"requests": [{
+            "updateSheetProperties": {
+                "properties": {"sheetId": props["sheetId"], "gridProperties": {
+                    "rowCount": max(rows, grid["rowCount"]),
+                    "columnCount": max(columns, grid["columnCount"]),
+                }},
+                "fields": "gridProperties(rowCount,columnCount)",
+            }
+        }]}))
+    return props["sheetId"]
+
+
+def row_chunks(rows, chunk_rows=None, max_bytes=None):
+    """(offset, rows) pieces of at most chunk_rows rows and ~max_bytes each"""
+    chunk_rows = upload_chunk_rows() if chunk_rows is None else chunk_rows
+    offset = 0
+    for piece in chunked(rows, payload_bytes, max_bytes, chunk_rows):
+        yield offset, piece
+        offset += len(piece)
+
+
+def upload_key(sheet_id, rows):
+    """Identifies one upload: same sheet, same rows, same chunking"""
+    digest = hashlib.sha256(json.dumps([sheet_id, upload_chunk_rows(), max_payload_bytes()]).encode())
+    for row in rows:
+        digest.update(json.dumps(row).encode())
+    return digest.hexdigest()
+
+
+class UploadProgress:
+    """Offsets of the chunks written so far, persisted so a killed upload can resume"""
+
+    def __init__(self, path, key):
+        self.path, self.key = path, key
+        self.done = set()
+        try:
+            with open(path, "r") as f:
+                state = json.load(f)
+            if state.get("key") == key:
+                self.done = set(state["done"])
+        except (FileNotFoundError, ValueError, KeyError):
+            pass
+
+    def mark(self, offset):
+        self.done.add(offset)
+        tmp_file = f"{self.path}.part"
+        with open(tmp_file, "w") as f:
+            json.dump({"key": self.key, "done": sorted(self.done)}, f)
+        os.replace(tmp_file, self.path)
+
+    def clear(self):
+        self.done = set()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def upload_rows(make_service, sheet_id, rows, sheet_name, start_row=0,
+                workers=None, done=(), on_chunk=None):
+    """
+    Write `rows` from 0-based `start_row` in chunks, `workers` requests at a
+    time. The grid must already be large enough (see ensure_grid). Chunks
+    whose offset is in `done` are skipped; on_chunk(offset, row_count) is
+    called as each one lands. `make_service` builds one client per worker,
+    since the googleapiclient transport is not thread-safe. Returns the
+    number of chunks written.
+    """
+    if not rows:
+        return 0
+    width = len(rows[0])
+    chunks = [chunk for chunk in row_chunks(rows) if chunk[0] not in done]
+    local = threading.local()
+
+    def write(chunk):
+        offset, piece = chunk
+        if not hasattr(local, "service"):
+            local.service = make_service()
+        execute(local.service.spreadsheets().values().update(
+            spreadsheetId=sheet_id, range=a1_rows(sheet_name, start_row + offset, len(piece), width),
+            valueInputOption="RAW", body={"values": piece}))
+        return offset, len(piece)
+
+    workers = upload_workers() if workers is None else workers
+    pool = ThreadPoolExecutor(max_workers=max(1, workers))
+    try:
+        for future in as_completed([pool.submit(write, chunk) for chunk in chunks]):
+            offset, count = future.result()
+            if on_chunk is not None:
+                on_chunk(offset, count)
+    except BaseException:
+        pool.shutdown(wait=True, cancel_futures=True)
+        raise
+    pool.shutdown()
+    return len(chunks)
+
+
+class SheetDiff:
+    def __init__(self, width, row_count=0):
+        self.width = width
+        self.row_count = row_count  # rows currently on the sheet, header included
+        self.updates = {}  # row index -> new values
+        self.appends = []
+        self.deletes = []
+        self.unchanged = 0
+
+    def is_empty(self):
+        return not (self.updates or self.appends or self.deletes)
+
+    def summary(self):
+        return (f"{len(self.updates)} changed, {len(self.appends)} appended, "
+                f"{len(self.deletes)} deleted, {self.unchanged} unchanged")
+
+
+def diff_rows(current, desired, key_column):
+    """
+    Plan the edits that turn sheet rows `current` into `desired` (both with
+    the header first), matching rows on `key_column`. Returns None when the
+    headers differ, in which case the sheet must be rewritten in full.
+    """
+    header = [str(cell) for cell in desired[0]]
+    if not current or [str(cell) for cell in current[0]] != header:
+        return None
+
+    diff = SheetDiff(len(header), len(current))
+    positions = {}
+    for index, row in enumerate(current[1:], start=1):
+        row = normalize_row(row, diff.width)
+        key = row[key_column]
+        if not key or key in positions:
+            diff.deletes.append(index)
+        else:
+            positions[key] = (index, row)
+
+    for row in desired[1:]:
+        row = normalize_row(row, diff.width)
+        match = positions.pop(row[key_column], None)
+        if match is None:
+            diff.appends.append(row)
+        elif match[1] != row:
+            diff.updates[match[0]] = row
+        else:
+            diff.unchanged += 1
+
+    diff.deletes.extend(index for index, _ in positions.values())
+    diff.deletes.sort()
+    return diff
+
+
+def value_ranges(sheet_name, rows_by_index, width, max_bytes=None):
+    """ValueRanges for the given rows: contiguous rows share a range, split by size"""
+    max_bytes = max_payload_bytes() if max_bytes is None else max_bytes
+    ranges = []
+    for start, length in runs(rows_by_index):
+        piece_start, piece, size = start, [], 0
+        for index in range(start, start + length):
+            row = rows_by_index[index]
+            if piece and size + payload_bytes(row) > max_bytes:
+                ranges.append({"range": a1_rows(sheet_name, piece_start, len(piece), width), "values": piece})
+                piece_start, piece, size = index, [], 0
+            piece.append(row)
+            size += payload_bytes(row)
+        ranges.append({"range": a1_rows(sheet_name, piece_start, len(piece), width), "values": piece})
+    return ranges
+
+
+def apply_diff(make_service, sheet_id, diff, sheet_name, on_chunk=None):
+    """Send `diff` to the sheet; returns the number of API calls made"""
+    service = make_service()
+    values = service.spreadsheets().values()
+    calls = 0
+
+    data = value_ranges(sheet_name, diff.updates, diff.width)
+    for batch in chunked(data, payload_bytes):
+        execute(values.batchUpdate(spreadsheetId=sheet_id,
+                                   body={"valueInputOption": "RAW", "data": batch}))
+        calls += 1
+
+    grid_id = ensure_grid(service, sheet_id, sheet_name, diff.row_count + len(diff.appends), diff.width)
+    calls += 1 + upload_rows(make_service, sheet_id, diff.appends, sheet_name,
+                             start_row=diff.row_count, on_chunk=on_chunk)
+
+    # Bottom-up, so each deletion leaves the indices of the remaining ones intact
+    deletes = [{"deleteDimension": {"range": {"sheetId": grid_id, "dimension": "ROWS",
+                                              "startIndex": start, "endIndex": start + length}}}
+               for start, length in reversed(runs(diff.deletes))]
+    for batch in chunked(deletes, lambda r: 150):
+        execute(service.spreadsheets().batchUpdate(spreadsheetId=sheet_id, body={"requests": batch}))
+        calls += 1
+    return calls
+
+
+class FakeSheetsError(Exception):
+    """Raised where the real API would answer 400"""
+
+
+class _Call:
+    def __init__(self, fake, func, *args):
+        self.fake, self.func, self.args = fake, func, args
+
+    def execute(self, num_retries=0):
+        # Requests run concurrently like the real service; state changes are serialized
+        if self.fake.latency:
+            time.sleep(self.fake.latency)
+        with self.fake.lock:
+            return self.func(*self.args)
+
+
+class _Values:
+    def __init__(self, fake):
+        self.fake = fake
+
+    def get(self, spreadsheetId, range, **kwargs):
+        return _Call(self.fake, self.fake.get_values, range)
+
+    def clear(self, spreadsheetId, range, body=None):
+        return _Call(self.fake, self.fake.clear, range)
+
+    def update(self, spreadsheetId, range, valueInputOption, body):
+        return _Call(self.fake, self.fake.write, "update", body, [{"range": range, "values": body["values"]}])
+
+    def batchUpdate(self, spreadsheetId, body):
+        return _Call(self.fake, self.fake.write, "batchUpdate", body, body["data"])
+
+    def append(self, spreadsheetId, range, valueInputOption, body, insertDataOption="OVERWRITE"):
+        return _Call(self.fake, self.fake.append, body)
+
+
+class _Spreadsheets:
+    def __init__(self, fake):
+        self.fake = fake
+
+    def values(self):
+        return _Values(self.fake)
+
+    def get(self, spreadsheetId, **kwargs):
+        return _Call(self.fake, self.fake.properties)
+
+    def batchUpdate(self, spreadsheetId, body):
+        return _Call(self.fake, self.fake.batch_update, body)
+
+
+class FakeSheetsService:
+    """
+    Stand-in for `build('sheets', 'v4', ...)` with a single sheet. Writes
+    past the grid and oversized request bodies fail like the real API;
+    `calls` counts requests by method and `latency` delays each one.
+    """
+
+    def __init__(self, path=None, sheet_name="Sheet1", grid_id=0, row_count=1000,
+                 column_count=26, payload_limit=10 * 1024 * 1024, latency=0.0):
+        self.path = path
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.sheet_name = sheet_name
+        self.grid_id = grid_id
+        self.payload_limit = payload_limit
+        self.calls = Counter()
+        self.rows = []
+        self.row_count, self.column_count = row_count, column_count
+        if path and os.path.exists(path):
+            with open(path, "r") as f:
+                state = json.load(f)
+            self.rows, self.row_count = state["rows"], state["row_count"]
+            self.column_count = state.get("column_count", column_count)
+
+    def spreadsheets(self):
+        return _Spreadsheets(self)
+
+    def _save(self):
+        if self.path:
+            tmp_file = f"{self.path}.part"
+            with open(tmp_file, "w") as f:
+                json.dump({"rows": self.rows, "row_count": self.row_count,
+                           "column_count": self.column_count}, f)
+            os.replace(tmp_file, self.path)
+
+    def _check_payload(self, body):
+        size = len(json.dumps(body))
+        if size > self.payload_limit:
+            raise FakeSheetsError(f"Request payload size exceeds the limit: {self.payload_limit} bytes ({size})")
+
+    def _start_row(self, a1):
+        match = re.search(r"!\$?[A-Z]+\$?(\d+)", a1)
+        return int(match.group(1)) - 1 if match else 0
+
+    def _trim(self):
+        while self.rows and not any(self.rows[-1]):
+            self.rows.pop()
+
+    def get_values(self, a1):
+        self.calls["values.get"] += 1
+        result = {"range": a1, "majorDimension": "ROWS"}
+        rows = [list(row) for row in self.rows]
+        for row in rows:
+            while row and row[-1] == "":
+                row.pop()
+        if rows:
+            result["values"] = rows
+        return result
+
+    def clear(self, a1):
+        self.calls["values.clear"] += 1
+        self.rows = []
+        self._save()
+        return {"clearedRange": a1}
+
+    def write(self, method, body, data):
+        self.calls[f"values.{method}"] += 1
+        self._check_payload(body)
+        cells = 0
+        for value_range in data:
+            start = self._start_row(value_range["range"])
+            values = value_range["values"]
+            if start + len(values) > self.row_count:
+                raise FakeSheetsError(f"Range ({value_range['range']}) exceeds grid limits. "
+                                      f"Max rows: {self.row_count}")
+            while len(self.rows) < start + len(values):
+                self.rows.append([])
+            for offset, row in enumerate(values):
+                self.rows[start + offset] = ["" if c is None else str(c) for c in row]
+                cells += len(row)
+        self._trim()
+        self._save()
+        return {"updatedCells": cells, "totalUpdatedCells": cells}
+
+    def append(self, body):
+        self.calls["values.append"] += 1
+        self._check_payload(body)
+        self._trim()
+        self.rows.extend([["" if c is None else str(c) for c in row] for row in body["values"]])
+        # INSERT_ROWS grows the grid as needed
+        self.row_count = max(self.row_count, len(self.rows))
+        self._save()
+        return {"updates": {"updatedRows": len(body["values"])}}
+
+    def properties(self):
+        self.calls["get"] += 1
+        return {"sheets": [{"properties": {
+            "sheetId": self.grid_id, "title": self.sheet_name,
+            "gridProperties": {"rowCount": self.row_count, "columnCount": self.column_count},
+        }}]}
+
+    def batch_update(self, body):
+        self.calls["batchUpdate"] += 1
+        self._check_payload(body)
+        for request in body["requests"]:
+            if "deleteDimension" in request:
+                span = request["deleteDimension"]["range"]
+                del self.rows[span["startIndex"]:span["endIndex"]]
+                self.row_count -= span["endIndex"] - span["startIndex"]
+            elif "appendDimension" in request:
+                self.row_count += request["appendDimension"]["length"]
+            elif "updateSheetProperties" in request:
+                grid = request["updateSheetProperties"]["properties"].get("gridProperties", {})
+                self.row_count = grid.get("rowCount", self.row_count)
+                self.column_count = grid.get("columnCount", self.column_count)
+                del self.rows[self.row_count:]
+        self._save()
+        return {"replies": [{} for _ in body["requests"]]}
@@ -0,0 +1,6 @@
+"""The execution scripts import each other as siblings, so tests run with execution/ on sys.path."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
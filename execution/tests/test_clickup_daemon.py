@@ -0,0 +1,26 @@
+"""Tests for the ClickUp daemon's message handling."""
+
+import pytest
+
+from clickup_daemon import Handler
+
+
+@pytest.fixture
+def handler(monkeypatch):
+    monkeypatch.setenv("CLICKUP_API_KEY", "test-key")
+    return Handler()
+
+
+def test_ping_and_unknown_op(handler):
+    """Test a known op succeeds and an unknown one is reported, not raised."""
+    assert handler.handle({"op": "ping"}) == {"ok": True, "result": "pong"}
+    assert handler.handle({"op": "nope"}) == {"ok": False, "error": "ValueError: Unknown op: nope"}
+
+
+@pytest.mark.parametrize("message", [[], "ping", 1, None])
+def test_non_object_message_is_an_error_response(handler, message):
+    """Test valid JSON that is not an object gets an error response instead of killing the daemon."""
+    response = handler.handle(message)
+    assert response["ok"] is False
+    assert "JSON object" in response["error"]
+    assert handler.handle({"op": "ping"})["ok"] is True
@@ -0,0 +1,83 @@
+"""Tests for the ClickUp name index."""
+
+import json
+import os
+import time
+
+import pytest
+
+import clickup_index
+from clickup_index import AmbiguousName, build_index, load_index, lookup, resolve
+
+
+def make_index():
+    hierarchy = [{
+        "id": "t1", "name": "Agency", "spaces": [
+            {"id": "s1", "name": "Sales", "folders": [], "lists": [
+                {"id": "l1", "name": "Leads"},
+                {"id": "l2", "name": "Lead Magnets"},
+            ]},
+            {"id": "s2", "name": "Marketing", "folders": [
+                {"id": "f1", "name": "Inbound", "lists": [{"id": "l3", "name": "Leads"}]},
+            ], "lists": [{"id": "l4", "name": "Campaigns"}]},
+        ],
+    }]
+    return build_index(hierarchy)
+
+
+def test_resolve_unique_names():
+    """Test exact, case-folded and unique prefix resolution."""
+    index = make_index()
+    assert resolve("list", "Campaigns", index=index) == "l4"
+    assert resolve("list", "  campaigns ", index=index) == "l4"
+    assert resolve("list", "Camp", index=index) == "l4"
+    assert resolve("space", "Sales", index=index) == "s1"
+    assert resolve("list", "Nope", index=index) is None
+
+
+def test_resolve_duplicate_exact_name_is_ambiguous():
+    """Test that a name shared by two lists raises with both paths instead of picking one."""
+    index = make_index()
+    assert len(lookup("Leads", "list", index=index)) == 2
+    with pytest.raises(AmbiguousName) as excinfo:
+        resolve("list", "Leads", index=index)
+    assert excinfo.value.candidates == [
+        "Agency / Sales / Leads",
+        "Agency / Marketing / Inbound / Leads",
+    ]
+
+
+def test_resolve_ambiguous_prefix():
+    """Test that a prefix matching several names lists the candidates."""
+    with pytest.raises(AmbiguousName) as excinfo:
+        resolve("list", "Lead", index=make_index())
+    assert len(excinfo.value.candidates) == 3
+
+
+def test_resolve_path_suffix_disambiguates():
+    """Test qualifying a duplicate name with its parent."""
+    index = make_index()
+    assert resolve("list", "Sales / Leads", index=index) == "l1"
+    assert resolve("list", "inbound/leads", index=index) == "l3"
+    assert resolve("list", "Marketing / Inbound / Leads", index=index) == "l3"
+    assert resolve("list", "Other / Leads", index=index) is None
+
+
+def test_loaded_index_follows_map_updates(tmp_path, monkeypatch):
+    """Test a process holding the index in memory sees lists added to the map later."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(clickup_index, "_index", None)
+    (tmp_path / ".tmp").mkdir()
+    map_file = tmp_path / ".tmp" / "crm_map.json"
+    hierarchy = [{"id": "t1", "name": "Agency", "spaces": [
+        {"id": "s1", "name": "Sales", "folders": [], "lists": [{"id": "l1", "name": "Leads"}]},
+    ]}]
+    map_file.write_text(json.dumps(hierarchy))
+    assert resolve("list", "Leads", index=load_index()) == "l1"
+    assert load_index() is load_index()
+
+    hierarchy[0]["spaces"][0]["lists"].append({"id": "l2", "name": "Clients"})
+    map_file.write_text(json.dumps(hierarchy))
+    later = time.time() + 5
+    os.utime(map_file, (later, later))
+    assert resolve("list", "Clients", index=load_index()) == "l2"
@@ -0,0 +1,113 @@
+"""Tests for MX lookup and SMTP verification, against the module's local stub servers."""
+
+import socketserver
+import struct
+import threading
+
+import pytest
+
+from email_verifier import (TYPE_MX, DNSError, EmailVerifier, MXResolver, build_query, encode_name,
+                            is_valid_email, parse_mx_response, run_stubs)
+
+
+@pytest.fixture(scope="module")
+def stubs():
+    dns, smtp = run_stubs(["example.test"], ["info@example.test"], ["any.test"], dns_port=0, smtp_port=0)
+    yield dns.server_address[1], smtp.server_address[1]
+    for server in (dns, smtp):
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def verifier(stubs, tmp_path):
+    dns_port, smtp_port = stubs
+    resolver = MXResolver(nameserver="127.0.0.1", port=dns_port, timeout=2,
+                          cache_file=str(tmp_path / "mx_cache.json"))
+    return EmailVerifier(resolver=resolver, smtp_port=smtp_port, helo="verifier.test", timeout=2)
+
+
+def test_is_valid_email():
+    """Test address syntax checks."""
+    assert is_valid_email("info@example.test")
+    assert not is_valid_email("info@")
+    assert not is_valid_email("no at sign")
+
+
+def test_mx_lookup_and_cache(verifier, tmp_path):
+    """Test MX hosts come from DNS once, then from the cache, and persist to disk."""
+    resolver = verifier.resolver
+    assert resolver.mx_hosts("example.test") == ["localhost"]
+    assert resolver.mx_hosts("EXAMPLE.test.") == ["localhost"]
+    assert resolver.stats["queries"] == 1 and resolver.stats["hits"] == 1
+    assert resolver.mx_hosts("missing.test") == []
+
+    resolver.save()
+    reloaded = MXResolver(nameserver="127.0.0.1", port=resolver.port, cache_file=resolver.cache_file)
+    assert reloaded.mx_hosts("example.test") == ["localhost"]
+    assert reloaded.stats["queries"] == 0
+
+
+def test_smtp_statuses(verifier):
+    """Test valid, invalid, catch-all, no-MX and bad-syntax results."""
+    assert verifier.verify("info@example.test")["status"] == "valid"
+    assert verifier.verify("nobody@example.test")["status"] == "invalid"
+    assert verifier.verify("anyone@any.test")["status"] == "catch_all"
+    assert verifier.verify("info@missing.test")["status"] == "no_mx"
+    assert verifier.verify("not-an-email")["status"] == "bad_syntax"
+    assert verifier.catch_all == {"example.test": False, "any.test": True}
+
+
+def test_candidates_share_one_session(verifier):
+    """Test several guesses for one domain are probed in a single SMTP session, in order."""
+    results = verifier.verify_candidates(["sales@example.test", "info@example.test", "bad"])
+    assert [r["status"] for r in results] == ["invalid", "valid", "bad_syntax"]
+    assert verifier.stats["sessions"] == 1
+    assert verifier.stats["probes"] == 2
+
+
+def test_smtp_disabled(stubs, tmp_path):
+    """Test that with SMTP off an address with MX is reported unknown, not valid."""
+    dns_port, _ = stubs
+    resolver = MXResolver(nameserver="127.0.0.1", port=dns_port, timeout=2, cache_file=None)
+    result = EmailVerifier(resolver=resolver, smtp=False, helo="verifier.test").verify("info@example.test")
+    assert result["status"] == "unknown" and result["mx"] == "localhost"
+
+
+def mx_reply(query, flags=0x8180):
+    rdata = struct.pack("!H", 10) + encode_name("mail.example.test")
+    answer = b"\xc0\x0c" + struct.pack("!HHIH", TYPE_MX, 1, 300, len(rdata)) + rdata
+    return query[:2] + struct.pack("!HHHHH", flags, 1, 1, 0, 0) + query[12:] + answer
+
+
+def test_truncated_or_malformed_reply_is_a_dns_error():
+    """Test cut-off replies and replies with the TC bit set fail the lookup with DNSError."""
+    reply = mx_reply(build_query("example.test", query_id=7))
+    assert parse_mx_response(reply) == (0, [(10, "mail.example.test")], 300)
+    for cut in (14, 30, len(reply) - 12, len(reply) - 3):
+        with pytest.raises(DNSError):
+            parse_mx_response(reply[:cut])
+    with pytest.raises(DNSError):
+        parse_mx_response(mx_reply(build_query("example.test", query_id=7), flags=0x8380))
+
+
+def test_truncated_reply_fails_only_that_domain(tmp_path):
+    """Test a resolver sending a cut-off reply gives an unknown result instead of raising."""
+    class TruncatingHandler(socketserver.BaseRequestHandler):
+        def handle(self):
+            data, sock = self.request
+            sock.sendto(mx_reply(data)[:-6], self.client_address)
+
+    server = socketserver.UDPServer(("127.0.0.1", 0), TruncatingHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        resolver = MXResolver(nameserver="127.0.0.1", port=server.server_address[1], timeout=2,
+                              cache_file=str(tmp_path / "mx_cache.json"))
+        verifier = EmailVerifier(resolver=resolver, smtp=False, helo="verifier.test", timeout=2)
+        status = verifier.verify("info@example.test")
+        assert status["status"] == "unknown"
+        assert "malformed" in status["message"]
+        assert resolver.stats["errors"] == 1
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,92 @@
+"""Tests for fuzzy deduplication of scraped HVAC companies."""
+
+import json
+
+from hvac_dedup import EntityResolver, company_id, normalize_name, normalize_phone
+
+
+def company(name, city="Dallas", phone="", website=""):
+    return {"name": name, "city": city, "phone": phone, "website": website}
+
+
+def kept(records, **kwargs):
+    resolver = EntityResolver(report_path=None, **kwargs)
+    return [r["name"] for r in records if resolver.add(r)]
+
+
+def test_normalize_name():
+    """Test title noise, legal suffixes and heating/air spellings are normalized away."""
+    assert normalize_name("ABC Heating & Air Conditioning, LLC | Dallas AC Repair") == "abc heating ac"
+    assert normalize_name("ABC Heating and Air") == "abc heating ac"
+    assert normalize_name("") == ""
+
+
+def test_normalize_phone():
+    """Test phones reduce to ten digits, or None."""
+    assert normalize_phone("+1 (214) 555-0123") == "2145550123"
+    assert normalize_phone("555-0123") is None
+
+
+def test_phone_domain_and_name_matches():
+    """Test the three ways two records are the same company."""
+    records = [
+        company("ABC Heating & Air", phone="214-555-0123", website="https://abchvac.com"),
+        company("ABC Heating and Air Conditioning LLC", city="Dallas"),
+        company("ABC HVAC Frisco", city="Frisco", phone="(214) 555-0123"),
+        company("ABC Heating", city="Plano", website="http://www.abchvac.com/plano"),
+        company("ABC Heating & Air", city="Austin"),
+        company("XYZ Cooling"),
+    ]
+    assert kept(records) == ["ABC Heating & Air", "ABC Heating & Air", "XYZ Cooling"]
+
+
+def test_conflicting_phones_keep_similar_names_apart():
+    """Test near-identical names are kept apart when their phone numbers differ."""
+    records = [company("Comfort Air", phone="2145550100"), company("Comfort Air", phone="2145550199")]
+    assert kept(records) == ["Comfort Air", "Comfort Air"]
+
+
+def test_website_builder_domain_alone_is_not_a_duplicate():
+    """Test unrelated companies on one website builder are both kept, with different IDs."""
+    joes = company("Joe's Heating & Air", website="https://joeshvac.wixsite.com/home")
+    cool = company("Cool Air Experts", website="https://joeshvac.wixsite.com/coolair")
+    platform_a = company("Reliable AC", website="https://www.wixsite.com/reliable")
+    platform_b = company("Lone Star Mechanical", website="https://www.wixsite.com/lonestar")
+    assert kept([joes, cool, platform_a, platform_b]) == [
+        "Joe's Heating & Air", "Cool Air Experts", "Reliable AC", "Lone Star Mechanical",
+    ]
+    assert company_id(joes) != company_id(cool)
+    assert company_id(platform_a) != company_id(platform_b)
+
+    # The same business listed twice on its builder site is still merged
+    again = company("Joe's Heating and Air", city="Plano", website="joeshvac.wixsite.com")
+    assert kept([joes, again]) == ["Joe's Heating & Air"]
+
+
+def test_company_id_is_stable():
+    """Test IDs depend on identity, not on which listing was scraped."""
+    assert company_id(company("ABC", website="https://www.abchvac.com")) == \
+        company_id(company("ABC Heating", city="Plano", website="abchvac.com/contact"))
+    assert company_id(company("A", phone="214-555-0123")) == company_id(company("B", phone="2145550123"))
+    assert len(company_id(company("ABC"))) == 12
+
+
+def test_merge_report(tmp_path):
+    """Test each dropped record is reported with the record it matched and why."""
+    report = tmp_path / "report.jsonl"
+    resolver = EntityResolver(report_path=str(report))
+    resolver.add(company("ABC Heating & Air", phone="2145550123"))
+    resolver.add(company("ABC Heating", city="Plano", phone="2145550123"))
+    resolver.close()
+    lines = [json.loads(line) for line in report.read_text().splitlines()]
+    assert [(line["reason"], line["dropped"]["city"]) for line in lines] == [("phone", "Plano")]
+    assert "kept 1/2" in resolver.summary()
+
+
+def test_threshold_is_read_when_the_resolver_is_created(monkeypatch):
+    """Test HVAC_DEDUP_NAME_THRESHOLD set after import (from .env) still applies."""
+    records = [company("ABC Heating & Air"), company("ABC Heating & Air Pros")]
+    assert kept(records) == ["ABC Heating & Air", "ABC Heating & Air Pros"]
+    monkeypatch.setenv("HVAC_DEDUP_NAME_THRESHOLD", "0.5")
+    assert EntityResolver(report_path=None).threshold == 0.5
+    assert kept(records) == ["ABC Heating & Air"]
@@ -0,0 +1,41 @@
+"""Tests for website domain normalization."""
+
+from hvac_domains import is_aggregator, is_hosted, registrable_domain
+
+
+def test_registrable_domain():
+    """Test reduction of URLs and hosts to the registered domain."""
+    assert registrable_domain("https://www.acme-hvac.com/contact") == "acme-hvac.com"
+    assert registrable_domain("shop.acme.co.uk") == "acme.co.uk"
+    assert registrable_domain("ACME-HVAC.COM.") == "acme-hvac.com"
+    assert registrable_domain("http://127.0.0.1/") is None
+    assert registrable_domain("localhost") is None
+    assert registrable_domain("") is None
+
+
+def test_website_builder_tenants_are_separate_domains():
+    """Test that two companies on one website builder do not share a domain."""
+    joes = registrable_domain("https://joeshvac.wixsite.com/home")
+    cool = registrable_domain("coolair.wixsite.com")
+    assert joes == "joeshvac.wixsite.com"
+    assert cool == "coolair.wixsite.com"
+    assert registrable_domain("abc-heating.business.site") != registrable_domain("xyz-air.business.site")
+    for host in ("a.squarespace.com", "a.weebly.com", "a.godaddysites.com"):
+        assert registrable_domain(f"https://{host}/") == host
+    assert registrable_domain("www.wixsite.com") == "wixsite.com"
+
+
+def test_is_hosted():
+    """Test detection of website-builder subdomains."""
+    assert is_hosted(registrable_domain("joeshvac.wixsite.com"))
+    assert not is_hosted(registrable_domain("www.joeshvac.com"))
+    assert not is_hosted("wixsite.com")
+    assert not is_hosted(None)
+
+
+def test_is_aggregator():
+    """Test directory and social sites are flagged, company sites are not."""
+    assert is_aggregator("www.yelp.com")
+    assert is_aggregator(registrable_domain("https://m.facebook.com/abchvac"))
+    assert not is_aggregator("acme-hvac.com")
+    assert not is_aggregator(None)
@@ -0,0 +1,98 @@
+"""Tests for the HVAC export file sinks."""
+
+import csv
+import gzip
+import json
+
+import pytest
+
+from hvac_export import CsvSink, JsonlGzSink, coerce, export_row, open_sinks
+from hvac_records import Company
+
+
+def companies():
+    return [
+        Company(name="ABC Heating & Air", city="Dallas", state="TX", website="https://abchvac.com",
+                services=["AC Repair", "Heating"], confidence_score="85", years_in_business="25 years",
+                rating="4.7", review_count="1,204"),
+        Company(name="XYZ Cooling", city="Waco", state="TX", phone="2545550100",
+                services=[], years_in_business="Unknown", rating="n/a"),
+    ]
+
+
+def test_coerce():
+    """Test values are typed per column, with placeholders becoming None."""
+    assert coerce("Unknown", "int") is None
+    assert coerce("12", "int") == 12
+    assert coerce("since 1998", "int") == 1998
+    assert coerce("1,204", "int") == 1204
+    assert coerce(4.9, "int") == 4
+    assert coerce("4.7", "float") == 4.7
+    assert coerce("n/a", "float") is None
+    assert coerce("", "str") is None
+    assert coerce(None, "list") == []
+    assert coerce("AC Repair", "list") == ["AC Repair"]
+    assert coerce(("a", 1), "list") == ["a", "1"]
+
+
+def test_csv_round_trip(tmp_path):
+    """Test the CSV has one typed row per company with services joined."""
+    path = tmp_path / "hvac_companies.csv"
+    sink = CsvSink(str(path))
+    for company in companies():
+        sink.write(company)
+    assert sink.close()
+
+    rows = list(csv.DictReader(path.open(newline="", encoding="utf-8")))
+    assert [row["name"] for row in rows] == ["ABC Heating & Air", "XYZ Cooling"]
+    assert rows[0]["services"] == "AC Repair, Heating"
+    assert rows[0]["years_in_business"] == "25" and rows[0]["review_count"] == "1204"
+    assert rows[1]["years_in_business"] == "" and rows[1]["services"] == ""
+    assert rows[0]["company_id"] == export_row(companies()[0])["company_id"] != ""
+    assert not (tmp_path / "hvac_companies.csv.part").exists()
+
+
+def test_jsonl_gz_round_trip(tmp_path):
+    """Test the gzipped JSON Lines file holds exactly the typed export rows."""
+    path = tmp_path / "hvac_companies.jsonl.gz"
+    sink = JsonlGzSink(str(path))
+    for company in companies():
+        sink.write(company)
+    assert sink.close()
+
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f]
+    assert rows == [export_row(company) for company in companies()]
+    assert rows[0]["services"] == ["AC Repair", "Heating"]
+    assert rows[0]["confidence_score"] == 85 and rows[1]["years_in_business"] is None
+
+
+@pytest.mark.parametrize("sink_class", [CsvSink, JsonlGzSink])
+def test_failed_export_leaves_no_file(tmp_path, sink_class):
+    """Test close(ok=False) removes the partial file and never publishes it."""
+    path = tmp_path / f"hvac_companies.{sink_class.extension}"
+    sink = sink_class(str(path))
+    sink.write(companies()[0])
+    assert sink.close(ok=False) is False
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_parquet_round_trip(tmp_path):
+    """Test the Parquet file keeps the column types."""
+    pq = pytest.importorskip("pyarrow.parquet")
+    sinks = open_sinks(["parquet"], out_dir=str(tmp_path))
+    for company in companies():
+        sinks[0].write(company)
+    assert sinks[0].close()
+
+    table = pq.read_table(tmp_path / "hvac_companies.parquet")
+    assert table.column("services").to_pylist() == [["AC Repair", "Heating"], []]
+    assert table.column("years_in_business").to_pylist() == [25, None]
+    assert str(table.schema.field("rating").type) == "double"
+
+
+def test_unknown_sink_is_rejected(tmp_path):
+    """Test an unknown sink name fails before any file is written."""
+    with pytest.raises(ValueError):
+        open_sinks(["csv", "xlsx"], out_dir=str(tmp_path))
+    assert list(tmp_path.iterdir()) == []
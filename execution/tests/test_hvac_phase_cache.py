@@ -0,0 +1,99 @@
+"""Tests for the pipeline's phase freshness bookkeeping."""
+
+import ast
+import json
+from pathlib import Path
+
+import pytest
+
+import hvac_export
+import run_hvac_pipeline
+from hvac_phase_cache import COMMON_CODE, PhaseCache
+from hvac_records import RecordWriter
+
+EXECUTION_DIR = Path(run_hvac_pipeline.__file__).parent
+
+
+def make_phase(tmp_path, complete=None):
+    phase = {"name": "scrape", "script": "scrape_hvac_texas.py", "input": None,
+             "output": str(tmp_path / "raw.jsonl"), "code": [], "env": []}
+    if complete is not None:
+        phase["complete"] = complete
+    with RecordWriter(phase["output"]) as out:
+        out.write({"name": "A"})
+    return phase
+
+
+def test_recorded_phase_is_fresh_until_output_changes(tmp_path):
+    """Test a recorded phase is fresh, and stale once its output is touched."""
+    cache = PhaseCache(str(tmp_path / "state.json"))
+    phase = make_phase(tmp_path)
+    assert not cache.is_fresh(phase)
+    assert cache.record(phase)
+    assert PhaseCache(str(tmp_path / "state.json")).is_fresh(phase)
+    with open(phase["output"], "a") as f:
+        f.write('{"name": "B"}\n')
+    assert not cache.is_fresh(phase)
+
+
+def test_incomplete_phase_is_not_recorded(tmp_path):
+    """Test a phase whose completeness check fails stays stale."""
+    cache = PhaseCache(str(tmp_path / "state.json"))
+    assert cache.record(make_phase(tmp_path))
+    phase = make_phase(tmp_path, complete=lambda: False)
+    assert not cache.record(phase)
+    assert not cache.is_fresh(phase)
+
+
+def test_scrape_complete_follows_the_checkpoint(tmp_path, monkeypatch):
+    """Test a scrape counts as complete only when its checkpoint says so."""
+    checkpoint = tmp_path / "checkpoint.jsonl"
+    monkeypatch.setattr(run_hvac_pipeline, "SCRAPE_CHECKPOINT", str(checkpoint))
+    assert run_hvac_pipeline.scrape_complete()
+
+    lines = [{"run": {"cities": ["Austin", "Waco"]}}, {"city": "Austin", "companies": [{"name": "x" * 5000}]}]
+    checkpoint.write_text("".join(json.dumps(line) + "\n" for line in lines))
+    assert not run_hvac_pipeline.scrape_complete()
+
+    with open(checkpoint, "a") as f:
+        f.write(json.dumps({"complete": True}) + "\n")
+    assert run_hvac_pipeline.scrape_complete()
+
+
+def sibling_imports(script, seen=None):
+    """Modules in execution/ that `script` imports, directly or through each other"""
+    seen = set() if seen is None else seen
+    tree = ast.parse((EXECUTION_DIR / script).read_text())
+    for node in ast.walk(tree):
+        names = [a.name for a in node.names] if isinstance(node, ast.Import) else \
+            [node.module] if isinstance(node, ast.ImportFrom) and node.module else []
+        for name in names:
+            module = f"{name}.py"
+            if (EXECUTION_DIR / module).exists() and module not in seen:
+                seen.add(module)
+                sibling_imports(module, seen)
+    return seen
+
+
+@pytest.mark.parametrize("phase", run_hvac_pipeline.PHASES, ids=lambda phase: phase["name"])
+def test_phase_key_covers_the_modules_it_imports(phase):
+    """Test a change to any module a phase imports invalidates that phase's cached run."""
+    assert sibling_imports(phase["script"]) <= {phase["script"], *COMMON_CODE, *phase["code"]}
+
+
+def test_export_is_stale_once_a_file_sink_output_is_gone(tmp_path, monkeypatch):
+    """Test a recorded export reruns when one of its file outputs was deleted or edited."""
+    monkeypatch.setattr(hvac_export, "DEFAULT_SINKS", ["sheet", "csv"])
+    csv_file = tmp_path / "hvac_companies.csv"
+    monkeypatch.setattr(hvac_export, "sink_path", lambda name, out_dir=None: str(tmp_path / f"hvac_companies.{name}"))
+    phase = next(p for p in run_hvac_pipeline.PHASES if p["name"] == "export")
+    phase = dict(phase, input=None)
+    csv_file.write_text("company_id,name\n")
+
+    cache = PhaseCache(str(tmp_path / "state.json"))
+    assert cache.record(phase)
+    assert cache.is_fresh(phase)
+    csv_file.write_text("company_id,name\nx,ABC\n")
+    assert not cache.is_fresh(phase)
+    csv_file.unlink()
+    assert not cache.is_fresh(phase)
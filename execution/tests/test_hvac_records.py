@@ -0,0 +1,117 @@
+"""Tests for the JSONL record streams shared by the HVAC phases."""
+
+import json
+import threading
+import time
+
+import pytest
+
+from hvac_records import (Company, RecordWriter, StreamError, marker_path, marker_status,
+                          read_companies, read_records)
+
+
+def write_run(path, records, fail=False):
+    try:
+        with RecordWriter(str(path)) as out:
+            for record in records:
+                out.write(record)
+            if fail:
+                raise RuntimeError("writer crashed")
+    except RuntimeError:
+        pass
+
+
+def test_marker_states(tmp_path):
+    """Test the marker says running while writing, then ok or failed."""
+    path = tmp_path / "out.jsonl"
+    with RecordWriter(str(path)) as out:
+        out.write({"name": "A"})
+        assert marker_status(str(path)) == "running"
+    assert marker_status(str(path)) == "ok"
+    assert list(read_records(str(path))) == [{"name": "A"}]
+
+    write_run(path, [{"name": "B"}], fail=True)
+    assert marker_status(str(path)) == "failed"
+    with pytest.raises(StreamError):
+        list(read_records(str(path), follow=True, idle_timeout=1, poll=0.01))
+
+
+def test_follower_waits_for_the_new_run(tmp_path):
+    """Test a follower that opens the new file before its marker is written ignores the old run's ok."""
+    path = tmp_path / "out.jsonl"
+    write_run(path, [{"name": "old"}])
+    # A new run has swapped in its file but not yet replaced the old marker
+    old_marker = open(marker_path(str(path))).read()
+    writer = RecordWriter(str(path)).__enter__()
+    with open(marker_path(str(path)), "w") as f:
+        f.write(old_marker)
+
+    def finish():
+        time.sleep(0.1)
+        writer.write({"name": "new"})
+        writer.__exit__(None, None, None)
+
+    thread = threading.Thread(target=finish)
+    thread.start()
+    records = list(read_records(str(path), follow=True, idle_timeout=5, poll=0.01))
+    thread.join()
+    assert records == [{"name": "new"}]
+
+
+def test_follower_of_replaced_file_restarts(tmp_path):
+    """Test a follower still holding an old, empty run moves on to the run that replaced it."""
+    path = tmp_path / "out.jsonl"
+    first = RecordWriter(str(path)).__enter__()
+    reader = read_records(str(path), follow=True, idle_timeout=5, poll=0.01)
+
+    def restart():
+        time.sleep(0.1)
+        first.file.close()
+        write_run(path, [{"name": "second"}])
+
+    thread = threading.Thread(target=restart)
+    thread.start()
+    records = list(reader)
+    thread.join()
+    assert records == [{"name": "second"}]
+
+
+def test_legacy_marker_without_token(tmp_path):
+    """Test markers written before run tokens existed still end a follow."""
+    path = tmp_path / "out.jsonl"
+    path.write_text('{"name": "A"}\n')
+    with open(marker_path(str(path)), "w") as f:
+        f.write("ok")
+    assert list(read_records(str(path), follow=True, idle_timeout=1, poll=0.01)) == [{"name": "A"}]
+
+
+def test_company_from_legacy_record(tmp_path):
+    """Test records that still store derived fields load, with those fields recomputed."""
+    legacy = {"name": "ABC Heating", "city": "Dallas", "services": ["AC Repair"],
+              "email_field_company": "Old Name", "email_field_contact": "Contact",
+              "email_field_services": "AC Repair", "company_id": "stale", "notes": "kept"}
+    company = Company.from_dict(legacy)
+    assert company["email_field_company"] == "ABC Heating"
+    assert company["email_field_services"] == "AC Repair"
+    assert company["company_id"] != "stale"
+    assert company["notes"] == "kept"
+    assert "email_field_company" not in company.to_dict()
+
+    with pytest.raises(KeyError):
+        company["email_field_company"] = "X"
+
+    # An existing pre-JSONL output file
+    (tmp_path / "hvac_final.json").write_text(json.dumps([legacy]))
+    assert [c["name"] for c in read_companies(str(tmp_path / "hvac_final.jsonl"))] == ["ABC Heating"]
+
+
+def test_follow_idle_timeout_is_read_per_call(tmp_path, monkeypatch):
+    """Test HVAC_FOLLOW_IDLE_TIMEOUT set after import (from .env) still applies."""
+    path = tmp_path / "out.jsonl"
+    writer = RecordWriter(str(path)).__enter__()
+    monkeypatch.setenv("HVAC_FOLLOW_IDLE_TIMEOUT", "0.05")
+    start = time.monotonic()
+    with pytest.raises(StreamError):
+        list(read_records(str(path), follow=True, poll=0.01))
+    assert time.monotonic() - start < 5
+    writer.__exit__(None, None, None)
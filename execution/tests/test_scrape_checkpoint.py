@@ -0,0 +1,93 @@
+"""Tests for resuming an interrupted HVAC scrape from its checkpoint."""
+
+import json
+
+import pytest
+
+import scrape_hvac_texas
+from hvac_dedup import EntityResolver
+from hvac_records import Company
+
+RUN = {"cities": ["Austin", "Dallas", "Waco"], "engine": "google", "max_pages": 3}
+
+
+@pytest.fixture
+def checkpoint_file(tmp_path, monkeypatch):
+    path = tmp_path / "hvac_raw_checkpoint.jsonl"
+    monkeypatch.setattr(scrape_hvac_texas, "CHECKPOINT_FILE", str(path))
+    return path
+
+
+def company(city):
+    return Company(name=f"{city} Heating & Air", city=city, state="TX", phone="", website="", source="test")
+
+
+def test_resume_after_torn_line_keeps_later_cities(checkpoint_file):
+    """Test that a city appended after a torn last line is not lost on the next resume."""
+    checkpoint = scrape_hvac_texas.Checkpoint(RUN, resume=False)
+    checkpoint.city_done("Austin", [company("Austin")])
+    checkpoint.close()
+    with open(checkpoint_file, "a") as f:
+        f.write('{"city": "Dallas", "compan')  # killed mid-write
+
+    done, resumed = scrape_hvac_texas.load_checkpoint(RUN)
+    assert resumed and list(done) == ["Austin"]
+
+    checkpoint = scrape_hvac_texas.Checkpoint(RUN, resume=True)
+    checkpoint.city_done("Dallas", [company("Dallas")])
+    checkpoint.close()
+
+    done, resumed = scrape_hvac_texas.load_checkpoint(RUN)
+    assert resumed and list(done) == ["Austin", "Dallas"]
+    assert done["Dallas"][0]["name"] == "Dallas Heating & Air"
+    for line in checkpoint_file.read_text().splitlines():
+        json.loads(line)
+
+
+def test_load_skips_a_corrupt_line(checkpoint_file):
+    """Test that one bad line in the middle does not drop the cities after it."""
+    lines = [
+        {"run": RUN},
+        {"city": "Austin", "companies": [company("Austin").to_dict()]},
+        None,
+        {"city": "Waco", "companies": [company("Waco").to_dict()]},
+    ]
+    checkpoint_file.write_text("".join(
+        ('{"city": "Dallas", "comp' if line is None else json.dumps(line)) + "\n" for line in lines
+    ))
+
+    done, resumed = scrape_hvac_texas.load_checkpoint(RUN)
+    assert resumed and sorted(done) == ["Austin", "Waco"]
+
+
+def test_complete_or_different_run_is_discarded(checkpoint_file):
+    """Test that only an unfinished run with the same parameters is resumed."""
+    checkpoint = scrape_hvac_texas.Checkpoint(RUN, resume=False)
+    checkpoint.city_done("Austin", [company("Austin")])
+    checkpoint.close()
+    assert scrape_hvac_texas.load_checkpoint(dict(RUN, max_pages=1)) == ({}, False)
+
+    checkpoint = scrape_hvac_texas.Checkpoint(RUN, resume=True)
+    checkpoint.close(complete=True)
+    assert scrape_hvac_texas.load_checkpoint(RUN) == ({}, False)
+
+
+def test_failed_city_fails_the_scrape(checkpoint_file, tmp_path, monkeypatch):
+    """Test a scrape with a failed city reports failure, and a resumed run fetches only that city."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(scrape_hvac_texas, "SERPAPI_KEY", "test-key")
+    monkeypatch.setattr(scrape_hvac_texas, "OUTPUT_FILE", str(tmp_path / "hvac_raw.jsonl"))
+    monkeypatch.setattr(scrape_hvac_texas, "EntityResolver", lambda: EntityResolver(report_path=None))
+    fetched = []
+
+    def fetch_city(session, limiter, city, *args):
+        fetched.append(city)
+        if city == "Dallas" and len(fetched) <= 3:
+            raise ValueError("SerpAPI error")
+        return [company(city)]
+
+    monkeypatch.setattr(scrape_hvac_texas, "fetch_city", fetch_city)
+    scrape = lambda: scrape_hvac_texas.scrape_hvac_companies(RUN["cities"], concurrency=1, cache_ttl=0)
+    assert scrape() is False
+    assert scrape() is True
+    assert fetched[3:] == ["Dallas"]
@@ -0,0 +1,66 @@
+"""Tests for the SerpAPI response cache."""
+
+import os
+import time
+
+from serpapi_cache import ResponseCache, cache_key
+
+
+def test_cache_key_ignores_api_key_and_order():
+    """Test that the key depends only on the query, not the key or parameter order."""
+    a = cache_key({"q": "HVAC companies Dallas TX", "start": 0, "api_key": "one"})
+    b = cache_key({"start": 0, "api_key": "two", "q": "HVAC companies Dallas TX"})
+    assert a == b
+    assert a != cache_key({"q": "HVAC companies Dallas TX", "start": 10})
+
+
+def test_put_then_get(tmp_path):
+    """Test a stored response is returned and counted as a hit."""
+    cache = ResponseCache(directory=str(tmp_path), ttl=60)
+    params = {"q": "HVAC companies Austin TX", "api_key": "secret"}
+    assert cache.get(params) is None
+    cache.put(params, {"organic_results": [{"title": "ABC HVAC"}]})
+    assert cache.get(params) == {"organic_results": [{"title": "ABC HVAC"}]}
+    assert cache.stats["hits"] == 1 and cache.stats["misses"] == 1
+    assert not any(name.endswith(".part") for name in os.listdir(tmp_path))
+
+
+def test_expired_entry_is_a_miss(tmp_path, monkeypatch):
+    """Test entries older than the TTL are ignored."""
+    cache = ResponseCache(directory=str(tmp_path), ttl=60)
+    params = {"q": "HVAC companies Waco TX"}
+    cache.put(params, {"ok": True})
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 61)
+    assert cache.get(params) is None
+    assert cache.stats["expired"] == 1
+
+
+def test_size_cap_evicts_least_recently_used(tmp_path):
+    """Test that going over the cap deletes the entries read least recently."""
+    cache = ResponseCache(directory=str(tmp_path), ttl=3600, max_bytes=10 ** 9)
+    payload = {"blob": os.urandom(2000).hex()}
+    queries = [{"q": f"city {i}"} for i in range(4)]
+    for i, params in enumerate(queries):
+        cache.put(params, payload)
+        os.utime(cache.path(cache_key(params)), (1000 + i, 1000 + i))
+    cache.get(queries[0])  # touch the oldest entry so it becomes the newest
+
+    cache.max_bytes = cache.size * 0.7
+    cache.put({"q": "city 4"}, payload)
+
+    assert cache.stats["evicted"] >= 1
+    assert cache.size <= cache.max_bytes
+    assert cache.get(queries[0]) == payload
+    assert cache.get(queries[1]) is None
+    assert cache.size == sum(entry.stat().st_size for entry in os.scandir(tmp_path))
+
+
+def test_env_settings_are_read_when_the_cache_is_created(tmp_path, monkeypatch):
+    """Test .env values loaded after this module was imported still apply."""
+    monkeypatch.setenv("SERPAPI_CACHE_TTL", "5")
+    monkeypatch.setenv("SERPAPI_CACHE_MAX_MB", "1")
+    cache = ResponseCache(directory=str(tmp_path))
+    assert cache.ttl == 5
+    assert cache.max_bytes == 1024 * 1024
+    assert ResponseCache(directory=str(tmp_path), ttl=0).ttl == 0
@@ -0,0 +1,113 @@
+"""Tests for diff-based Google Sheet sync, against the in-memory fake service."""
+
+import pytest
+
+import sheets_sync
+from sheets_sync import (FakeSheetsService, a1_rows, apply_diff, column_letter, diff_rows,
+                         normalize_row, runs, upload_rows, value_ranges)
+from token_bucket import TokenBucket
+
+HEADER = ["Company", "City", "Score", "Company ID"]
+KEY = 3
+
+
+@pytest.fixture(autouse=True)
+def no_write_quota(monkeypatch):
+    monkeypatch.setattr(sheets_sync, "_write_bucket", TokenBucket(10_000, 10_000))
+
+
+def rows(count, score=80, prefix="Co"):
+    return [[f"{prefix} {i}", "Dallas", score, f"id{prefix}{i}"] for i in range(count)]
+
+
+def sync(fake, desired):
+    current = fake.spreadsheets().values().get(spreadsheetId="s", range="Sheet1").execute().get("values", [])
+    diff = diff_rows(current, desired, KEY)
+    apply_diff(lambda: fake, "s", diff, "Sheet1")
+    return diff
+
+
+def test_helpers():
+    """Test A1 ranges, row normalization and index runs."""
+    assert column_letter(1) == "A" and column_letter(27) == "AA"
+    assert a1_rows("Sheet1", 0, 2, 12) == "Sheet1!A1:L2"
+    assert normalize_row(["a", None, 3], 4) == ["a", "", "3", ""]
+    assert runs([9, 3, 4, 5]) == [(3, 3), (9, 1)]
+
+
+def test_diff_rows():
+    """Test rows are matched on the key column into updates, appends and deletes."""
+    current = [HEADER, ["A", "Dallas", "80", "a"], ["B", "Dallas", "80", "b"],
+               ["B dup", "Dallas", "80", "b"], ["No key", "Dallas", "80", ""], ["C", "Waco", "70", "c"]]
+    desired = [HEADER, ["A", "Dallas", 80, "a"], ["C", "Waco", 95, "c"], ["D", "Austin", 60, "d"]]
+    diff = diff_rows(current, desired, KEY)
+    assert diff.unchanged == 1
+    assert diff.updates == {5: ["C", "Waco", "95", "c"]}
+    assert diff.appends == [["D", "Austin", "60", "d"]]
+    assert diff.deletes == [2, 3, 4]
+    assert diff_rows([["Old header"]], desired, KEY) is None
+    assert diff_rows([], desired, KEY) is None
+
+
+def test_sync_touches_only_changed_rows():
+    """Test a re-sync rewrites changed rows in place, appends new ones and deletes stale ones."""
+    fake = FakeSheetsService(row_count=200)
+    first = [HEADER] + rows(100)
+    upload_rows(lambda: fake, "s", first, "Sheet1")
+    assert len(fake.rows) == 101
+
+    desired = [HEADER] + [r for r in rows(100) if not r[0].endswith("7")]
+    for row in desired[1::20]:
+        row[2] = 95
+    desired += rows(30, prefix="New")
+    fake.calls.clear()
+    diff = sync(fake, desired)
+
+    assert diff.summary() == "5 changed, 30 appended, 10 deleted, 85 unchanged"
+    assert fake.rows[0] == HEADER
+    assert sorted(fake.rows[1:]) == sorted(normalize_row(r, 4) for r in desired[1:])
+    assert fake.calls["values.batchUpdate"] == 1 and fake.calls["batchUpdate"] == 1
+
+    fake.calls.clear()
+    assert sync(fake, desired).is_empty()
+    assert fake.calls["values.update"] == 0 and fake.calls["values.batchUpdate"] == 0
+
+
+def test_appends_grow_the_grid():
+    """Test appending past the sheet's row count resizes the grid instead of failing."""
+    fake = FakeSheetsService(row_count=50)
+    upload_rows(lambda: fake, "s", [HEADER] + rows(40), "Sheet1")
+    sync(fake, [HEADER] + rows(40) + rows(60, prefix="New"))
+    assert len(fake.rows) == 101 and fake.row_count >= 101
+
+
+def test_value_ranges_split_by_payload_size():
+    """Test contiguous changed rows share a range, split so no request exceeds the size cap."""
+    changed = {i: ["x" * 100, "Dallas", "80", f"id{i}"] for i in list(range(1, 21)) + [40]}
+    assert [r["range"] for r in value_ranges("Sheet1", changed, 4)] == ["Sheet1!A2:D21", "Sheet1!A41:D41"]
+
+    small = value_ranges("Sheet1", changed, 4, max_bytes=600)
+    assert len(small) > 2
+    assert sum(len(r["values"]) for r in small) == len(changed)
+    assert all(sheets_sync.payload_bytes(r["values"]) <= 600 for r in small)
+
+
+def test_oversized_request_is_rejected_by_the_fake():
+    """Test the fake enforces the request size limit like the real API."""
+    fake = FakeSheetsService(payload_limit=1000)
+    with pytest.raises(sheets_sync.FakeSheetsError):
+        fake.spreadsheets().values().update(spreadsheetId="s", range="Sheet1!A1:D40", valueInputOption="RAW",
+                                            body={"values": rows(40)}).execute()
+
+
+def test_env_settings_are_read_on_use(monkeypatch):
+    """Test settings from .env, loaded after this module was imported, still apply."""
+    monkeypatch.setenv("SHEETS_CHUNK_ROWS", "10")
+    monkeypatch.setenv("SHEETS_UPLOAD_WORKERS", "2")
+    monkeypatch.setenv("SHEETS_WRITES_PER_MIN", "120")
+    assert [len(piece) for _, piece in sheets_sync.row_chunks(rows(25))] == [10, 10, 5]
+
+    monkeypatch.setattr(sheets_sync, "_write_bucket", None)
+    bucket = sheets_sync.write_bucket()
+    assert (bucket.rate, bucket.capacity) == (2, 2)
+    assert sheets_sync.write_bucket() is bucket
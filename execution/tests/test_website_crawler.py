@@ -0,0 +1,129 @@
+"""Tests for the website crawler, against its local fixture site."""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import website_crawler
+from hvac_records import Company
+from personalize_hvac_data import personalize_company
+from website_crawler import Crawler, pick_extra_pages, run_fixture, site_key
+
+
+@pytest.fixture
+def crawler():
+    crawler = Crawler(host_delay=0, timeout=5)
+    yield crawler
+    crawler.close()
+
+
+@pytest.fixture(scope="module")
+def fixture_url():
+    server = run_fixture(port=0)
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_crawl_fixture_site(crawler, fixture_url):
+    """Test the homepage plus contact/about pages are crawled and their facts merged."""
+    site = crawler.crawl(fixture_url)
+    assert site["crawl_status"] == "ok"
+    assert site["pages_crawled"] == 3
+    assert site["title"] == "Acme Heating & Air | Dallas HVAC"
+    assert site["owner"] == "John Smith"
+    assert site["founded"] == 1998
+    assert site["phones"] == ["(214) 555-0123"]
+    assert "AC Repair" in site["services"] and "Thermostats" in site["services"]
+    # Script contents and robots.txt-disallowed pages are never read
+    assert site["emails"] == ["service@acme.test"]
+    assert crawler.stats["sites"] == 1
+
+
+def test_same_site_is_crawled_once(crawler, fixture_url):
+    """Test companies sharing a site share one crawl."""
+    first = crawler.crawl(fixture_url)
+    second = crawler.crawl(f"{fixture_url}/contact-us")
+    assert first == second
+    assert crawler.stats["sites"] == 1
+
+
+def test_aggregator_and_missing_sites(crawler):
+    """Test directory sites and empty websites are not fetched."""
+    assert crawler.crawl("https://www.yelp.com/biz/acme")["crawl_status"] == "skipped_aggregator"
+    assert crawler.crawl("")["crawl_status"] == "no_website"
+    assert crawler.stats["sites"] == 0
+
+
+def test_website_builder_tenants_are_crawled_separately(crawler, monkeypatch):
+    """Test two companies on one website builder never receive each other's contact details."""
+    owners = {"joeshvac.wixsite.com": "Joe Garcia", "coolair.wixsite.com": "Ann Lee"}
+
+    async def fake_crawl(self, website, domain):
+        self.stats["sites"] += 1
+        return {"crawl_status": "ok", "owner": owners[domain], "emails": [f"owner@{domain}"], "phones": []}
+
+    monkeypatch.setattr(website_crawler.Crawler, "_crawl", fake_crawl)
+    joes = personalize_company(Company(name="Joe's HVAC", website="https://joeshvac.wixsite.com/home"), crawler)
+    cool = personalize_company(Company(name="Cool Air", website="coolair.wixsite.com"), crawler)
+    assert joes["contact_name"] == "Joe Garcia"
+    assert cool["contact_name"] == "Ann Lee"
+    assert cool["site_emails"] == ["owner@coolair.wixsite.com"]
+    assert crawler.stats["sites"] == 2
+
+
+def test_extra_pages_stay_on_the_tenant_site():
+    """Test contact links to another tenant of the same platform are not followed."""
+    links = [("/contact", "Contact"), ("https://coolair.wixsite.com/about", "About us")]
+    base = "https://joeshvac.wixsite.com/home"
+    assert pick_extra_pages(links, base, site_key(base)) == ["https://joeshvac.wixsite.com/contact"]
+
+
+@pytest.fixture
+def redirecting_site():
+    """Serves a site on 127.0.0.1 whose /moved and /contact redirect to another host (localhost)"""
+    pages = {
+        "/": "<html><body><a href='/contact'>Contact</a><a href='/about'>About</a></body></html>",
+        "/about": "<html><body>Owner: John Smith</body></html>",
+        "/elsewhere": "<html><body>sales@parked.test Owner: Someone Else</body></html>",
+    }
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            port = self.server.server_address[1]
+            if self.path in ("/moved", "/contact"):
+                self.send_response(302)
+                self.send_header("Location", f"http://localhost:{port}/elsewhere")
+                self.end_headers()
+                return
+            body = pages.get(self.path, "").encode()
+            self.send_response(200 if self.path in pages else 404)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_redirects_off_the_site_are_not_followed(crawler, redirecting_site):
+    """Test a page that redirects to another site contributes nothing to the company."""
+    site = crawler.crawl(f"{redirecting_site}/")
+    assert site["crawl_status"] == "ok"
+    assert site["pages_crawled"] == 2
+    assert site["owner"] == "John Smith"
+    assert site["emails"] == []
+
+    moved = Crawler(host_delay=0, timeout=5)
+    try:
+        assert moved.crawl(f"{redirecting_site}/moved")["crawl_status"] == "redirected_off_site"
+    finally:
+        moved.close()
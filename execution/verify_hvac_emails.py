@@ -1,17 +1,21 @@
 #!/usr/bin/env python3
 """
 Verify email addresses for HVAC companies
-Inputs: .tmp/hvac_raw.json
-Outputs: .tmp/hvac_verified.json with confidence scores
+Inputs: .tmp/hvac_raw.jsonl
+Outputs: .tmp/hvac_verified.jsonl with confidence scores (streamed, one record per line)
 """
 
 import os
-import json
 import logging
 import sys
-import re
+import argparse
+import threading
 from pathlib import Path
 from dotenv import load_dotenv
+from hvac_records import RecordWriter, read_companies, exists, StreamError, parallel_map
+from concurrent.futures import Future
+from email_verifier import EmailVerifier, is_valid_email
+from hvac_domains import registrable_domain, is_aggregator, is_hosted
 
 # Setup
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -30,14 +34,91 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-INPUT_FILE = os.path.join(TMP_DIR, "hvac_raw.json")
-OUTPUT_FILE = os.path.join(TMP_DIR, "hvac_verified.json")
+INPUT_FILE = os.path.join(TMP_DIR, "hvac_raw.jsonl")
+OUTPUT_FILE = os.path.join(TMP_DIR, "hvac_verified.jsonl")
+# Companies below this confidence score are dropped from the output
+MIN_CONFIDENCE = 60
+# Companies verified in parallel (each may hold one SMTP session)
+CONCURRENCY = int(os.getenv("EMAIL_VERIFY_CONCURRENCY", "20"))
 
+# Confidence by (where the address came from, SMTP verdict). "unknown" means
+# the mail server could not be asked (port 25 blocked, timeout, greylisting),
+# so it scores as before verification existed.
+CONFIDENCE = {
+    ("provided", "valid"): 95,
+    ("provided", "unknown"): 85,
+    ("provided", "catch_all"): 75,
+    ("website_pattern", "valid"): 80,
+    ("website_pattern", "unknown"): 60,
+    ("website_pattern", "catch_all"): 60,
+}
 
-def is_valid_email(email):
-    """Basic email format validation"""
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return re.match(pattern, email) is not None
+_verifier = None
+_memo = None
+_verifier_lock = threading.Lock()
+
+
+class DomainMemo:
+    """
+    Verification results keyed by registrable domain (or provided address),
+    computed once and shared by every company on that domain: franchises,
+    multi-location listings and repeated SerpAPI hits. A concurrent
+    request for a key being computed waits for that result.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.results = {}
+        self.stats = {"computed": 0, "reused": 0, "aggregators": 0}
+
+    def get(self, key, compute):
+        with self.lock:
+            pending = self.results.get(key)
+            owner = pending is None
+            if owner:
+                pending = self.results[key] = Future()
+                self.stats["computed"] += 1
+            else:
+                self.stats["reused"] += 1
+        if not owner:
+            return pending.result()
+        try:
+            value = compute()
+        except Exception as e:
+            with self.lock:
+                self.results.pop(key, None)  # let a later company retry
+            pending.set_exception(e)
+            raise
+        pending.set_result(value)
+        return value
+
+    def aggregator_skipped(self):
+        with self.lock:
+            self.stats["aggregators"] += 1
+
+    def summary(self):
+        return (
+            f"Domain memo: {self.stats['computed']} domains/addresses verified, "
+            f"{self.stats['reused']} companies served from memo, "
+            f"{self.stats['aggregators']} directory/social listings excluded"
+        )
+
+
+def get_verifier():
+    """Process-wide verifier, so every worker shares one MX cache and host limits"""
+    global _verifier
+    with _verifier_lock:
+        if _verifier is None:
+            _verifier = EmailVerifier()
+        return _verifier
+
+
+def get_memo():
+    global _memo
+    with _verifier_lock:
+        if _memo is None:
+            _memo = DomainMemo()
+        return _memo
 
 
 def extract_email_from_website(website):
@@ -45,40 +126,61 @@ def extract_email_from_website(website):
     Attempt to extract email domain from website
     Returns common HVAC business email patterns
     """
-    if not website:
-        return None
-    
-    # Extract domain
-    domain = website.replace("https://", "").replace("http://", "").split("/")[0]
+    # Extract domain (www.acme.com and shop.acme.com both mail as @acme.com)
+    domain = registrable_domain(website)
+    if not domain or is_aggregator(domain) or is_hosted(domain):
+        return None  # info@joeshvac.wixsite.com does not exist
     
     # Common patterns: info@, contact@, support@, hvac@
     patterns = ["info", "contact", "support", "hello", "sales"]
     return [f"{pattern}@{domain}" for pattern in patterns]
 
 
-def verify_email(company):
+def verify_email(company, verifier=None, memo=None):
     """
     Verify email for a company
     Returns company with email and confidence score
     """
+    verifier = verifier or get_verifier()
+    memo = memo or get_memo()
     email = company.get("email")
     website = company.get("website")
     phone = company.get("phone")
     
     confidence = 0
     verified_email = None
+    status = None
     
-    # If email provided, validate it
+    domain = registrable_domain(website)
+    if is_aggregator(domain):
+        # A yelp/angi/facebook page is not the company's site
+        company["aggregator"] = domain
+        memo.aggregator_skipped()
+        domain = website = None
+    if email and is_aggregator(email.rsplit("@", 1)[-1]):
+        email = None
+    company["email_domain"] = domain
+    
+    # If email provided, check the mailbox exists
     if email and is_valid_email(email):
-        verified_email = email
-        confidence = 85  # Given email, assume higher confidence
+        status = memo.get(("email", email.lower()), lambda: verifier.verify(email))["status"]
+        if ("provided", status) in CONFIDENCE:
+            verified_email = email
+            confidence = CONFIDENCE[("provided", status)]
     
-    # Try to find email from website
+    # Try common patterns on the website's domain; the first accepted one wins
     if not verified_email and website:
         possible_emails = extract_email_from_website(website)
         if possible_emails:
-            verified_email = possible_emails[0]
-            confidence = 60  # Pattern-matched, lower confidence
+            results = memo.get(("domain", domain), lambda: verifier.verify_candidates(possible_emails))
+            best = next((r for r in results if r["status"] == "valid"), None)
+            best = best or next((r for r in results if ("website_pattern", r["status"]) in CONFIDENCE), None)
+            if best:
+                verified_email = best["email"]
+                status = best["status"]
+                confidence = CONFIDENCE[("website_pattern", status)]
+            else:
+                status = results[0]["status"]
     
     # Phone number suggests business exists (fallback)
     if not verified_email and phone:
@@ -87,6 +189,7 @@ def verify_email(company):
     
     company["verified_email"] = verified_email
     company["confidence_score"] = confidence
+    company["email_status"] = status
     company["verification_method"] = (
         "provided" if email else 
         "website_pattern" if website else 
@@ -96,63 +199,73 @@ def verify_email(company):
     return company
 
 
-def verify_hvac_emails():
-    """Main verification process"""
+def verify_hvac_emails(follow=False, concurrency=CONCURRENCY, smtp=True):
+    """
+    Main verification process.
+    Streams records from the scrape output; with follow=True it starts on
+    the first records while the scrape is still writing. Up to
+    `concurrency` companies are verified at once, output order preserved.
+    """
     
     # Load raw data
-    if not os.path.exists(INPUT_FILE):
+    if not follow and not exists(INPUT_FILE):
         logger.error(f"Input file not found: {INPUT_FILE}")
         return False
     
-    try:
-        with open(INPUT_FILE, "r") as f:
-            companies = json.load(f)
-        logger.info(f"Loaded {len(companies)} companies")
-    except Exception as e:
-        logger.error(f"Error loading input file: {e}")
-        return False
-    
     # Verify emails
-    logger.info("Verifying emails...")
-    verified_companies = []
+    logger.info(f"Verifying emails ({concurrency} workers, SMTP probing {'on' if smtp else 'off'})...")
+    verifier = get_verifier()
+    verifier.smtp = verifier.smtp and smtp
+    processed = 0
     high_confidence = 0
     medium_confidence = 0
     low_confidence = 0
     
-    for i, company in enumerate(companies):
-        company = verify_email(company)
-        verified_companies.append(company)
-        
-        conf = company.get("confidence_score", 0)
-        if conf >= 80:
-            high_confidence += 1
-        elif conf >= 60:
-            medium_confidence += 1
-        else:
-            low_confidence += 1
-        
-        if (i + 1) % 50 == 0:
-            logger.info(f"Processed {i + 1}/{len(companies)} companies")
+    try:
+        with RecordWriter(OUTPUT_FILE) as out:
+            companies = read_companies(INPUT_FILE, follow=follow)
+            for company in parallel_map(verify_email, companies, concurrency):
+                processed += 1
+                
+                conf = company.get("confidence_score", 0)
+                if conf >= 80:
+                    high_confidence += 1
+                elif conf >= 60:
+                    medium_confidence += 1
+                else:
+                    low_confidence += 1
+                
+                # Filter to high and medium confidence only
+                if conf >= MIN_CONFIDENCE:
+                    out.write(company)
+                
+                if processed % 50 == 0:
+                    logger.info(f"Processed {processed} companies")
+                    out.flush()
+            kept = out.count
+    except (OSError, ValueError, StreamError) as e:
+        logger.error(f"Error processing {INPUT_FILE}: {e}")
+        return False
+    finally:
+        verifier.resolver.save()
     
-    # Filter to high and medium confidence only
-    filtered = [c for c in verified_companies if c.get("confidence_score", 0) >= 60]
+    logger.info(verifier.summary())
+    logger.info(get_memo().summary())
     logger.info(f"✓ High confidence (>=80%): {high_confidence}")
     logger.info(f"✓ Medium confidence (60-80%): {medium_confidence}")
     logger.info(f"⚠ Low confidence (<60%): {low_confidence}")
-    logger.info(f"✓ Total with verified emails: {len(filtered)}/{len(companies)}")
-    
-    # Save output
-    try:
-        with open(OUTPUT_FILE, "w") as f:
-            json.dump(filtered, f, indent=2)
-        logger.info(f"✓ Verification complete. Saved to {OUTPUT_FILE}")
-    except Exception as e:
-        logger.error(f"Error saving output: {e}")
-        return False
+    logger.info(f"✓ Total with verified emails: {kept}/{processed}")
+    logger.info(f"✓ Verification complete. Saved to {OUTPUT_FILE}")
     
     return True
 
 
 if __name__ == "__main__":
-    success = verify_hvac_emails()
+    parser = argparse.ArgumentParser(description="Verify HVAC company emails.")
+    parser.add_argument("--follow", action="store_true", help="Stream from a scrape that is still running.")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY, help="Companies verified in parallel.")
+    parser.add_argument("--no-smtp", action="store_true", help="Only check MX records; skip SMTP probing.")
+    args = parser.parse_args()
+
+    success = verify_hvac_emails(follow=args.follow, concurrency=args.concurrency, smtp=not args.no_smtp)
     sys.exit(0 if success else 1)
@@ -0,0 +1,525 @@
+#!/usr/bin/env python3
+"""
+Async website crawler used to enrich HVAC company records.
+
+For each company site it fetches the homepage plus up to two contact/about
+pages linked from it, and extracts emails, phone numbers, the page title,
+service keywords, founding year and an owner's name when one is stated.
+
+It is built on asyncio with a small stdlib HTTP/1.1 client, so no extra
+dependency is needed. Politeness and limits:
+  - a global cap on concurrent requests
+  - one request at a time per host, spaced by a delay (or robots.txt Crawl-delay)
+  - robots.txt fetched once per host and cached
+  - response bodies capped; HTML is parsed as it streams in, never buffered whole
+  - one crawl per registrable domain, shared by every company on it (a
+    website builder's tenant subdomain counts as its own domain);
+    directory/social sites are skipped
+
+Tuning via .env:
+    CRAWL_CONCURRENCY   concurrent requests overall (default 20)
+    CRAWL_HOST_DELAY    seconds between requests to one host (default 1.0)
+    CRAWL_MAX_BYTES     bytes read per page (default 512 KB)
+    CRAWL_TIMEOUT       seconds per request (default 10)
+
+Usage:
+    python execution/website_crawler.py crawl https://acme-hvac.com
+    # Local fixture site for testing
+    python execution/website_crawler.py fixture --port 8765
+    python execution/website_crawler.py crawl http://127.0.0.1:8765 --host-delay 0
+"""
+
+import os
+import re
+import ssl
+import sys
+import json
+import time
+import codecs
+import asyncio
+import argparse
+import threading
+from datetime import date
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlsplit
+from urllib.robotparser import RobotFileParser
+from dotenv import load_dotenv
+from hvac_domains import registrable_domain, host_of, is_aggregator
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+load_dotenv(os.path.join(BASE_DIR, ".env"))
+
+CONCURRENCY = int(os.getenv("CRAWL_CONCURRENCY", "20"))
+HOST_DELAY = float(os.getenv("CRAWL_HOST_DELAY", "1.0"))
+MAX_BYTES = int(os.getenv("CRAWL_MAX_BYTES", str(512 * 1024)))
+TIMEOUT = float(os.getenv("CRAWL_TIMEOUT", "10"))
+USER_AGENT = os.getenv("CRAWL_USER_AGENT", "Mozilla/5.0 (compatible; HVACLeadBot/1.0)")
+
+ROBOTS_MAX_BYTES = 64 * 1024
+MAX_CRAWL_DELAY = 10.0
+MAX_REDIRECTS = 3
+MAX_EXTRA_PAGES = 2
+MAX_TEXT_CHARS = 200_000
+EXTRA_PAGE_HINTS = ("contact", "about", "our-story", "who-we-are")
+
+EMAIL_RE = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
+PHONE_RE = re.compile(r"(?<!\d)(?:\+?1[\s.-]?)?\(?([2-9]\d{2})\)?[\s.-]?(\d{3})[\s.-]?(\d{4})(?!\d)")
+FOUNDED_RE = re.compile(r"\b(?:since|established(?: in)?|est\.?|founded(?: in)?|serving [\w\s,]+ since)\s+(19[0-9]{2}|20[0-9]{2})\b", re.I)
+YEARS_RE = re.compile(r"\b(\d{1,3})\+?\s+years\s+(?:of\s+)?(?:experience|in business|serving)", re.I)
+OWNER_RE = re.compile(r"\b(?i:owner|founder|president|ceo)\b[\s:,\-–]+([A-Z][a-z]+(?:\s[A-Z]\.)?\s[A-Z][a-z]+)")
+ASSET_SUFFIXES = (".png", ".jpg", ".jpeg", ".gif", ".webp", ".svg", ".css", ".js")
+
+SERVICE_KEYWORDS = {
+    "AC Repair": ("ac repair", "a/c repair", "air conditioning repair", "air conditioner repair"),
+    "AC Installation": ("ac installation", "air conditioning installation", "ac replacement", "new ac"),
+    "Heating Repair": ("heating repair", "furnace repair", "heater repair"),
+    "Furnace Installation": ("furnace installation", "furnace replacement", "heating installation"),
+    "Heat Pumps": ("heat pump",),
+    "Ductless Mini-Splits": ("mini-split", "mini split", "ductless"),
+    "Duct Cleaning": ("duct cleaning", "air duct", "ductwork"),
+    "Indoor Air Quality": ("indoor air quality", "air purif", "humidifier", "dehumidifier", "air filtration"),
+    "Maintenance Plans": ("maintenance plan", "tune-up", "tune up", "service agreement", "maintenance agreement"),
+    "Thermostats": ("thermostat",),
+    "Water Heaters": ("water heater",),
+    "Commercial HVAC": ("commercial hvac", "commercial heating", "commercial air", "rooftop unit"),
+    "Refrigeration": ("refrigeration",),
+    "Emergency Service": ("24/7", "24 hour", "emergency service", "emergency repair"),
+}
+
+
+class PageParser(HTMLParser):
+    """Incremental HTML parser collecting the title, visible text, links, mailto: and tel: targets"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title = ""
+        self.text = []
+        self.text_chars = 0
+        self.links = []
+        self.emails = set()
+        self.phones = set()
+        self.skip = 0
+        self.in_title = False
+        self.anchor = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ("script", "style", "noscript", "svg"):
+            self.skip += 1
+        elif tag == "title":
+            self.in_title = True
+        elif tag == "a":
+            href = (dict(attrs).get("href") or "").strip()
+            lowered = href.lower()
+            if lowered.startswith("mailto:"):
+                self.emails.add(href[7:].split("?")[0].strip())
+            elif lowered.startswith("tel:"):
+                self.phones.add(href[4:].strip())
+            elif href and len(self.links) < 300:
+                self.anchor = [href, ""]
+
+    def handle_endtag(self, tag):
+        if tag in ("script", "style", "noscript", "svg"):
+            self.skip = max(0, self.skip - 1)
+        elif tag == "title":
+            self.in_title = False
+        elif tag == "a" and self.anchor is not None:
+            self.links.append(tuple(self.anchor))
+            self.anchor = None
+
+    def handle_data(self, data):
+        if self.skip:
+            return
+        if self.in_title:
+            self.title += data
+            return
+        if self.anchor is not None:
+            self.anchor[1] += data
+        if self.text_chars < MAX_TEXT_CHARS:
+            self.text.append(data)
+            self.text_chars += len(data)
+
+
+def normalize_phone(raw):
+    match = PHONE_RE.search(raw)
+    return f"({match.group(1)}) {match.group(2)}-{match.group(3)}" if match else None
+
+
+def extract(parser):
+    """Structured facts from one parsed page"""
+    text = " ".join(" ".join(parser.text).split())
+    emails = {e.lower() for e in parser.emails | set(EMAIL_RE.findall(text))}
+    emails = {e for e in emails if not e.endswith(ASSET_SUFFIXES) and EMAIL_RE.fullmatch(e)}
+    phones = {normalize_phone(p) for p in parser.phones} | {
+        f"({a}) {b}-{c}" for a, b, c in PHONE_RE.findall(text)
+    }
+    lowered = text.lower()
+    services = [label for label, needles in SERVICE_KEYWORDS.items() if any(n in lowered for n in needles)]
+
+    founded = None
+    years = None
+    match = FOUNDED_RE.search(text)
+    if match and int(match.group(1)) <= date.today().year:
+        founded = int(match.group(1))
+    match = YEARS_RE.search(text)
+    if match and 0 < int(match.group(1)) < 150:
+        years = int(match.group(1))
+    match = OWNER_RE.search(text)
+
+    return {
+        "title": " ".join(parser.title.split()),
+        "emails": emails,
+        "phones": {p for p in phones if p},
+        "services": services,
+        "founded": founded,
+        "years": years,
+        "owner": match.group(1) if match else None,
+    }
+
+
+def site_key(url):
+    """
+    Registrable domain (the tenant host on website builders such as
+    joeshvac.wixsite.com), or the bare host for IPs and single-label hosts
+    """
+    return registrable_domain(url) or host_of(url)
+
+
+def pick_extra_pages(links, base_url, domain):
+    """Contact/about pages on the same site, in link order"""
+    picked = []
+    for href, text in links:
+        url = urljoin(base_url, href).split("#")[0]
+        if not url.startswith(("http://", "https://")) or site_key(url) != domain:
+            continue
+        haystack = f"{urlsplit(url).path} {text}".lower()
+        if any(hint in haystack for hint in EXTRA_PAGE_HINTS) and url not in picked and url != base_url:
+            picked.append(url)
+        if len(picked) >= MAX_EXTRA_PAGES:
+            break
+    return picked
+
+
+def merge(pages, domain):
+    """Combine per-page facts into one site record"""
+    emails = set().union(*(p["emails"] for p in pages))
+    # Addresses on the company's own domain first
+    own = sorted(e for e in emails if e.endswith("@" + domain) or e.endswith("." + domain))
+    other = sorted(emails - set(own))
+    services = []
+    for page in pages:
+        services += [s for s in page["services"] if s not in services]
+    return {
+        "crawl_status": "ok",
+        "pages_crawled": len(pages),
+        "title": pages[0]["title"],
+        "emails": (own + other)[:10],
+        "phones": sorted(set().union(*(p["phones"] for p in pages)))[:5],
+        "services": services,
+        "founded": next((p["founded"] for p in pages if p["founded"]), None),
+        "years": next((p["years"] for p in pages if p["years"]), None),
+        "owner": next((p["owner"] for p in pages if p["owner"]), None),
+    }
+
+
+class Crawler:
+    """
+    Runs an asyncio loop on a background thread; `crawl(website)` is safe to
+    call from any number of worker threads and blocks for that site's result.
+    """
+
+    def __init__(self, concurrency=CONCURRENCY, host_delay=HOST_DELAY, max_bytes=MAX_BYTES,
+                 timeout=TIMEOUT, user_agent=USER_AGENT):
+        self.host_delay = host_delay
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.user_agent = user_agent
+        self.ssl_context = ssl.create_default_context()
+        self.loop = asyncio.new_event_loop()
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.host_locks = {}
+        self.host_next = {}
+        self.crawl_delays = {}
+        self.robots = {}
+        self.sites = {}
+        self.stats = {"sites": 0, "pages": 0, "bytes": 0, "truncated": 0, "robots_blocked": 0, "errors": 0}
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+
+    def crawl(self, website):
+        return asyncio.run_coroutine_threadsafe(self.crawl_site(website), self.loop).result()
+
+    def close(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+    async def crawl_site(self, website):
+        domain = site_key(website)
+        if not domain:
+            return {"crawl_status": "no_website"}
+        if is_aggregator(domain):
+            return {"crawl_status": "skipped_aggregator"}
+        task = self.sites.get(domain)
+        if task is None:
+            task = self.sites[domain] = asyncio.ensure_future(self._crawl(website, domain))
+        return await asyncio.shield(task)
+
+    async def _crawl(self, website, domain):
+        self.stats["sites"] += 1
+        url = website.strip() if "://" in website else f"http://{website.strip()}"
+        try:
+            home_url, home = await self.fetch_page(url, domain)
+        except Exception as e:
+            self.stats["errors"] += 1
+            return {"crawl_status": f"error: {type(e).__name__}: {e}"[:200]}
+        if home is None:
+            return {"crawl_status": home_url}
+
+        pages = [extract(home)]
+        for extra_url in pick_extra_pages(home.links, home_url, domain):
+            try:
+                _, page = await self.fetch_page(extra_url, domain)
+            except Exception:
+                self.stats["errors"] += 1
+                continue
+            if page is not None:
+                pages.append(extract(page))
+        return merge(pages, domain)
+
+    async def fetch_page(self, url, domain=None):
+        """
+        GET an HTML page (following redirects) into a PageParser.
+        Returns (final url, parser), or (status string, None) if it is not usable.
+        With `domain`, a redirect off that site (a parked domain, or a builder
+        tenant forwarding elsewhere) is not followed, so another site's
+        contact details are never attached to the company.
+        """
+        for _ in range(MAX_REDIRECTS + 1):
+            parts = urlsplit(url)
+            if not await self.allowed(parts):
+                self.stats["robots_blocked"] += 1
+                return "blocked_by_robots", None
+            parser = PageParser()
+            status, location, content_type = await self.get(url, parser, self.max_bytes)
+            if location:
+                url = urljoin(url, location)
+                if domain and site_key(url) != domain:
+                    return "redirected_off_site", None
+                continue
+            if status != 200:
+                return f"http_{status}", None
+            if "html" not in content_type:
+                return "not_html", None
+            parser.close()
+            self.stats["pages"] += 1
+            return url, parser
+        return "too_many_redirects", None
+
+    async def allowed(self, parts):
+        origin = f"{parts.scheme}://{parts.netloc}"
+        task = self.robots.get(origin)
+        if task is None:
+            task = self.robots[origin] = asyncio.ensure_future(self._load_robots(origin))
+        robots = await asyncio.shield(task)
+        return robots is None or robots.can_fetch(self.user_agent, parts.geturl())
+
+    async def _load_robots(self, origin):
+        """Parsed robots.txt, or None (allow everything) when there is none"""
+        chunks = []
+        try:
+            status, _, _ = await self.get(f"{origin}/robots.txt", chunks.append, ROBOTS_MAX_BYTES, follow=True)
+        except Exception:
+            return None
+        robots = RobotFileParser()
+        if status in (401, 403):
+            robots.disallow_all = True
+        elif status != 200:
+            return None
+        else:
+            robots.parse(b"".join(chunks).decode("utf-8", "replace").splitlines())
+        delay = robots.crawl_delay(self.user_agent)
+        if delay:
+            self.crawl_delays[urlsplit(origin).netloc] = min(float(delay), MAX_CRAWL_DELAY)
+        return robots
+
+    async def get(self, url, sink, max_bytes, follow=False):
+        """
+        One polite GET. `sink` receives decoded text if it is a PageParser,
+        raw bytes otherwise. Returns (status, redirect location, content type).
+        """
+        host = urlsplit(url).netloc
+        lock = self.host_locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            wait = self.host_next.get(host, 0.0) - self.loop.time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            try:
+                async with self.semaphore:
+                    result = await asyncio.wait_for(self._request(url, sink, max_bytes), self.timeout)
+            finally:
+                delay = max(self.host_delay, self.crawl_delays.get(host, 0.0))
+                self.host_next[host] = self.loop.time() + delay
+        status, location, content_type = result
+        if follow and location:
+            return await self.get(urljoin(url, location), sink, max_bytes)
+        return result
+
+    async def _request(self, url, sink, max_bytes):
+        parts = urlsplit(url)
+        https = parts.scheme == "https"
+        port = parts.port or (443 if https else 80)
+        path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        reader, writer = await asyncio.open_connection(
+            parts.hostname, port, ssl=self.ssl_context if https else None,
+            server_hostname=parts.hostname if https else None,
+        )
+        try:
+            writer.write(
+                f"GET {path} HTTP/1.1\r\nHost: {parts.netloc}\r\nUser-Agent: {self.user_agent}\r\n"
+                f"Accept: text/html,application/xhtml+xml,text/plain;q=0.9,*/*;q=0.5\r\n"
+                f"Accept-Encoding: identity\r\nConnection: close\r\n\r\n".encode()
+            )
+            await writer.drain()
+
+            status_line = (await reader.readline()).decode("latin-1").split()
+            if len(status_line) < 2 or not status_line[1].isdigit():
+                raise ValueError("malformed HTTP response")
+            status = int(status_line[1])
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode("latin-1")
+                if line in ("\r\n", "\n", ""):
+                    break
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            if status in (301, 302, 303, 307, 308) and headers.get("location"):
+                return status, headers["location"], ""
+            content_type = headers.get("content-type", "").lower()
+            if status != 200 or (isinstance(sink, PageParser) and "html" not in content_type):
+                return status, None, content_type
+
+            feed = sink.feed if isinstance(sink, PageParser) else sink
+            decoder = None
+            if isinstance(sink, PageParser):
+                charset = re.search(r"charset=([\w-]+)", content_type)
+                try:
+                    decoder = codecs.getincrementaldecoder(charset.group(1) if charset else "utf-8")("replace")
+                except LookupError:
+                    decoder = codecs.getincrementaldecoder("utf-8")("replace")
+
+            received = 0
+            async for chunk in self._body(reader, headers):
+                chunk = chunk[:max_bytes - received]
+                received += len(chunk)
+                feed(decoder.decode(chunk) if decoder else chunk)
+                if received >= max_bytes:
+                    self.stats["truncated"] += 1
+                    break
+            if decoder:
+                feed(decoder.decode(b"", final=True))
+            self.stats["bytes"] += received
+            return status, None, content_type
+        finally:
+            writer.close()
+
+    async def _body(self, reader, headers):
+        """Yield body chunks for chunked, length-delimited or close-delimited responses"""
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            while True:
+                size = int((await reader.readline()).split(b";")[0].strip() or b"0", 16)
+                if size == 0:
+                    return
+                yield await reader.readexactly(size)
+                await reader.readline()
+        remaining = int(headers["content-length"]) if headers.get("content-length", "").isdigit() else None
+        while remaining is None or remaining > 0:
+            chunk = await reader.read(65536 if remaining is None else min(65536, remaining))
+            if not chunk:
+                return
+            if remaining is not None:
+                remaining -= len(chunk)
+            yield chunk
+
+    def summary(self):
+        return (
+            f"Crawler: {self.stats['sites']} sites, {self.stats['pages']} pages, "
+            f"{self.stats['bytes'] / 1024 / 1024:.1f} MB, {self.stats['truncated']} truncated at the size cap, "
+            f"{self.stats['robots_blocked']} blocked by robots.txt, {self.stats['errors']} errors"
+        )
+
+
+# --- Local fixture site for testing ---
+
+FIXTURE_PAGES = {
+    "/": ("text/html; charset=utf-8",
+          "<html><head><title>Acme Heating &amp; Air | Dallas HVAC</title><script>var x='no@script.com';</script></head>"
+          "<body><h1>Acme Heating &amp; Air</h1><p>Serving Dallas since 1998. 24/7 emergency service.</p>"
+          "<p>AC repair, furnace installation and duct cleaning.</p>"
+          "<a href='/contact-us'>Contact Us</a> <a href='/about'>About</a> <a href='/private/'>Staff</a>"
+          "<a href='https://www.yelp.com/biz/acme'>Yelp</a></body></html>"),
+    "/contact-us": ("text/html",
+                    "<html><body><a href='mailto:service@acme.test'>Email us</a>"
+                    "<a href='tel:+12145550123'>(214) 555-0123</a></body></html>"),
+    "/about": ("text/html", "<html><body><p>Owner: John Smith. Heat pump and thermostat experts.</p></body></html>"),
+    "/private/": ("text/html", "<html><body>info@private.test</body></html>"),
+    "/robots.txt": ("text/plain", "User-agent: *\nDisallow: /private/\n"),
+}
+
+
+def run_fixture(port=8765):
+    from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+    class FixtureHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            page = FIXTURE_PAGES.get(self.path.split("?")[0])
+            if page is None:
+                self.send_response(404)
+                self.end_headers()
+                return
+            body = page[1].encode()
+            self.send_response(200)
+            self.send_header("Content-Type", page[0])
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), FixtureHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Crawl company websites for contact details.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_crawl = sub.add_parser("crawl", help="Crawl sites and print one JSON result per line.")
+    p_crawl.add_argument("websites", nargs="+")
+    p_crawl.add_argument("--concurrency", type=int, default=CONCURRENCY)
+    p_crawl.add_argument("--host-delay", type=float, default=HOST_DELAY)
+    p_crawl.add_argument("--max-bytes", type=int, default=MAX_BYTES)
+
+    p_fixture = sub.add_parser("fixture", help="Serve a small local test site.")
+    p_fixture.add_argument("--port", type=int, default=8765)
+
+    args = parser.parse_args()
+
+    if args.command == "crawl":
+        crawler = Crawler(args.concurrency, args.host_delay, args.max_bytes)
+        try:
+            for website in args.websites:
+                print(json.dumps({"website": website, **crawler.crawl(website)}))
+        finally:
+            crawler.close()
+        print(crawler.summary(), file=sys.stderr)
+    elif args.command == "fixture":
+        run_fixture(args.port)
+        print(f"Fixture site on http://127.0.0.1:{args.port}", flush=True)
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass